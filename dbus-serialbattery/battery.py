@@ -1,14 +1,53 @@
 # -*- coding: utf-8 -*-
-from typing import Union, Tuple, List, Callable
+from typing import Any, Union, Tuple, List, Callable, Coroutine, Dict, NamedTuple
 
 from utils import logger
 import utils
 import logging
 import math
 from datetime import datetime
-from time import time
+from time import monotonic, time
 from abc import ABC, abstractmethod
+import asyncio
+from array import array
+from functools import wraps
 import sys
+import threading
+
+
+def cached_per_refresh(method: Callable) -> Callable:
+    """
+    Cache the return value of a `Battery` getter for the current refresh epoch.
+    The value is calculated at most once per epoch and calculated again after `Battery.new_refresh_epoch()`.
+    While the cache is disabled (e.g. during `refresh_data()`), the getter is always executed.
+
+    Only use it for getters that depend on values which are set by `refresh_data()` or `set_calculated_data()`.
+
+    :param method: The getter to cache
+    :return: The wrapped getter
+    """
+
+    @wraps(method)
+    def wrapper(self, *args):
+        if self.refresh_cache is None:
+            return method(self, *args)
+
+        key = (method.__name__,) + args
+        if key not in self.refresh_cache:
+            self.refresh_cache[key] = method(self, *args)
+
+        elif utils.REFRESH_CACHE_VERIFY:
+            value = method(self, *args)
+            if value != self.refresh_cache[key]:
+                logger.warning(
+                    f"Refresh cache is not coherent: {method.__name__}{args} returned {value}, "
+                    + f"but {self.refresh_cache[key]} was cached in epoch {self.refresh_epoch}"
+                )
+                self.refresh_cache[key] = value
+
+        return self.refresh_cache[key]
+
+    return wrapper
 
 
 class Protection(object):
@@ -91,6 +130,11 @@ class History:
     """
 
     def __init__(self):
+        self.changed: bool = True
+        """
+        True, if a value changed since the values were saved the last time.
+        """
+
         self.exclude_values_to_calculate: list = []
         """
         List of values to exclude from calculation, because they are fetched from the BMS.
@@ -216,6 +260,28 @@ class History:
         Total charged energy in Kilowatt-hour.
         """
 
+    def __setattr__(self, name: str, value) -> None:
+        """
+        Set a value and flag the history as changed, if the value differs.
+
+        :param name: The name of the attribute
+        :param value: The new value
+        :return: None
+        """
+        if name != "changed" and getattr(self, name, None) != value:
+            object.__setattr__(self, "changed", True)
+        object.__setattr__(self, name, value)
+
+    def get_values_to_save(self) -> dict:
+        """
+        Get the values that should be saved to the settings.
+
+        :return: Dictionary with the attribute name as key and the value as value
+        """
+        # remove values that should not be saved
+        exclude_values = self.exclude_values_to_calculate + ["exclude_values_to_calculate", "changed"]
+        return {key: value for key, value in self.__dict__.items() if key not in exclude_values and value is not None}
+
     def reset_values(self, attributes: list = []) -> None:
         """
         Reset all calculated values that are not excluded.
@@ -256,22 +322,393 @@ class Cell:
     """
     This class holds information about a single cell
 
+    As soon as the cell is added to a `CellStore`, the voltage and balance status are kept in the store,
+    additional attributes (e.g. temperature) are still stored on the cell object.
+
     :param voltage: float = the voltage of the cell in Volts
     :param balance: bool = the balance status of the cell
     """
 
-    voltage: float = None
+    def __init__(self, balance: bool = None):
+        self._store: "CellStore" = None
+        """
+        The store this cell belongs to, `None` while the cell is not added to a battery
+        """
+
+        self._index: int = None
+        """
+        The index of the cell in the store
+        """
+
+        self._voltage: float = None
+        self._balance: bool = balance
+
+    @property
+    def voltage(self) -> Union[float, None]:
+        """
+        The voltage of a specific cell in Volts
+        """
+        if self._store is None:
+            return self._voltage
+        return self._store.get_voltage(self._index)
+
+    @voltage.setter
+    def voltage(self, value: Union[float, None]) -> None:
+        if self._store is None:
+            self._voltage = value
+        else:
+            self._store.set_voltage(self._index, value)
+
+    @property
+    def balance(self) -> Union[bool, None]:
+        """
+        The balance status of a specific cell
+        """
+        if self._store is None:
+            return self._balance
+        return self._store.get_balance(self._index)
+
+    @balance.setter
+    def balance(self, value: Union[bool, None]) -> None:
+        if self._store is None:
+            self._balance = value
+        else:
+            self._store.set_balance(self._index, value)
+
+    def detach(self) -> None:
+        """
+        Take the voltage and balance status back from the store.
+        """
+        if self._store is not None:
+            self._voltage = self.voltage
+            self._balance = self.balance
+            self._store = None
+            self._index = None
+
+
+class CellSummary(NamedTuple):
+    """
+    This class holds the aggregates of the cell voltages
+    """
+
+    count: int
+    min_voltage: Union[float, None]
+    min_cell: Union[int, None]
+    max_voltage: Union[float, None]
+    max_cell: Union[int, None]
+    voltage_sum: float
+
+
+class CellStore:
     """
-    The voltage of a specific cell in Volts
+    This class holds the voltages of all cells in mV in an `array("H")` and the balance status as bitmask.
+
+    It behaves like the `List[Cell]` the BMS drivers are used to (`append`, `insert`, `remove`, index access,
+    iteration and `len`). The `Cell` objects write through to the store, which invalidates the aggregates.
+    The aggregates are calculated once, when they are requested the first time after the cell data changed.
+
+    :param cells: The cells to add to the store
     """
 
-    balance: bool = None
+    NO_VOLTAGE = 0xFFFF
     """
-    The balance status of a specific cell
+    Marks a cell voltage that is not set (`None`)
     """
 
-    def __init__(self, balance: bool = None):
-        self.balance = balance
+    def __init__(self, cells: List[Cell] = None):
+        self.voltages: array = array("H")
+        """
+        The cell voltages in mV
+        """
+
+        self.balances: int = 0
+        """
+        The balance status of the cells as bitmask, bit 0 is the first cell
+        """
+
+        self.balances_set: int = 0
+        """
+        The cells that have a balance status as bitmask, all other cells return `None`
+        """
+
+        self.summary: CellSummary = None
+        """
+        The cached aggregates, reset on every change of a cell voltage
+        """
+
+        self._cells: List[Cell] = []
+
+        for cell in cells or []:
+            self.append(cell)
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def __iter__(self):
+        return iter(self._cells)
+
+    def __getitem__(self, idx: Union[int, slice]) -> Union[Cell, List[Cell]]:
+        return self._cells[idx]
+
+    def append(self, cell: Cell) -> None:
+        """
+        Add a cell at the end of the store.
+
+        :param cell: The cell to add
+        """
+        voltage = cell.voltage
+        balance = cell.balance
+        cell.detach()
+        cell._store = self
+        cell._index = len(self._cells)
+        self._cells.append(cell)
+        self.voltages.append(self.NO_VOLTAGE)
+        self.set_voltage(cell._index, voltage)
+        self.set_balance(cell._index, balance)
+
+    def insert(self, idx: int, cell: Cell) -> None:
+        """
+        Insert a cell at a specific position of the store.
+
+        :param idx: The index where to insert the cell
+        :param cell: The cell to insert
+        """
+        cells = list(self._cells)
+        cells.insert(idx, cell)
+        self._rebuild(cells)
+
+    def remove(self, cell: Cell) -> None:
+        """
+        Remove a cell from the store.
+
+        :param cell: The cell to remove
+        """
+        cells = list(self._cells)
+        cells.remove(cell)
+        self._rebuild(cells)
+
+    def clear(self) -> None:
+        """
+        Remove all cells from the store.
+        """
+        self._rebuild([])
+
+    def _rebuild(self, cells: List[Cell]) -> None:
+        """
+        Rebuild the store from a list of cells, since the indexes changed.
+
+        :param cells: The cells in the new order
+        """
+        for cell in self._cells:
+            cell.detach()
+        self._cells = []
+        self.voltages = array("H")
+        self.balances = 0
+        self.balances_set = 0
+        self.summary = None
+        for cell in cells:
+            self.append(cell)
+
+    def get_voltage(self, idx: int) -> Union[float, None]:
+        """
+        Get the voltage of a specific cell.
+
+        :param idx: The index of the cell
+        :return: The voltage of the cell in Volts
+        """
+        voltage = self.voltages[idx]
+        return None if voltage == self.NO_VOLTAGE else voltage / 1000
+
+    def set_voltage(self, idx: int, value: Union[float, None]) -> None:
+        """
+        Set the voltage of a specific cell.
+
+        :param idx: The index of the cell
+        :param value: The voltage of the cell in Volts
+        """
+        voltage = self.NO_VOLTAGE if value is None else min(max(int(round(value * 1000)), 0), self.NO_VOLTAGE - 1)
+        if self.voltages[idx] != voltage:
+            self.voltages[idx] = voltage
+            self.summary = None
+
+    def get_balance(self, idx: int) -> Union[bool, None]:
+        """
+        Get the balance status of a specific cell.
+
+        :param idx: The index of the cell
+        :return: The balance status of the cell
+        """
+        if not self.balances_set >> idx & 1:
+            return None
+        return bool(self.balances >> idx & 1)
+
+    def set_balance(self, idx: int, value: Union[bool, None]) -> None:
+        """
+        Set the balance status of a specific cell.
+
+        :param idx: The index of the cell
+        :param value: The balance status of the cell
+        """
+        bit = 1 << idx
+        if value is None:
+            self.balances_set &= ~bit
+            self.balances &= ~bit
+        else:
+            self.balances_set |= bit
+            if value:
+                self.balances |= bit
+            else:
+                self.balances &= ~bit
+
+    def is_balancing(self, count: int) -> bool:
+        """
+        Check if at least one of the first `count` cells is balancing.
+
+        :param count: The number of cells to check
+        :return: `True` if at least one cell is balancing
+        """
+        return self.balances & ((1 << count) - 1) != 0
+
+    def get_voltage_sum(self, start: int = 0, end: int = None) -> float:
+        """
+        Get the sum of the cell voltages in a range of cells. Cells without voltage are skipped.
+
+        :param start: The index of the first cell
+        :param end: The index after the last cell
+        :return: The sum of the cell voltages in Volts
+        """
+        return sum(voltage for voltage in self.voltages[start:end] if voltage != self.NO_VOLTAGE) / 1000
+
+    def get_summary(self, count: int) -> CellSummary:
+        """
+        Get the aggregates of the first `count` cells. They are only calculated again, if a cell voltage changed.
+
+        :param count: The number of cells to include
+        :return: The aggregates of the cell voltages
+        """
+        if self.summary is not None and self.summary.count == count:
+            return self.summary
+
+        voltages = self.voltages[:count]
+        voltages_set = [voltage for voltage in voltages if voltage != self.NO_VOLTAGE]
+
+        if len(voltages_set) == 0:
+            self.summary = CellSummary(count, None, None, None, None, 0)
+        else:
+            min_voltage = min(voltages_set)
+            max_voltage = max(voltages_set)
+            self.summary = CellSummary(
+                count,
+                min_voltage / 1000,
+                voltages.index(min_voltage),
+                max_voltage / 1000,
+                # a cell with 0 V is never the cell with the highest voltage
+                voltages.index(max_voltage) if max_voltage > 0 else None,
+                sum(voltages_set) / 1000,
+            )
+        return self.summary
+
+
+class RefreshScheduler:
+    """
+    This class decides which command groups of a BMS are read in the current refresh cycle.
+
+    Each command group has a refresh class:
+        - `FAST`: read in every cycle, e.g. voltage, current, SoC and FETs
+        - `MEDIUM`: read every `REFRESH_MEDIUM_INTERVAL` seconds, e.g. cell voltages, temperatures, alarms and balancing
+        - `SLOW`: read every `REFRESH_SLOW_INTERVAL` seconds, e.g. capacity, charge cycles and settings.
+          Only one slow group is read per cycle, so that they are spread over the cycles.
+
+    A group that was never read is read in the next cycle. A fast or medium group that failed is read again
+    in the next cycle, a slow group after its interval.
+
+    :param groups: The command groups of the BMS with their refresh class
+    """
+
+    FAST = 0
+    MEDIUM = 1
+    SLOW = 2
+
+    def __init__(self, groups: Dict[str, int]):
+        self.groups: Dict[str, int] = groups
+        """
+        The command groups of the BMS with their refresh class
+        """
+
+        self.read_last_time: Dict[str, Union[float, None]] = {name: None for name in groups}
+        """
+        Monotonic timestamp of the last successful read of each group
+        """
+
+        self.slow_read_in_cycle: bool = False
+        """
+        If a slow group was already read in the current cycle
+        """
+
+        self.runtimes: Dict[str, float] = {}
+        """
+        Duration in seconds of each group read in the current cycle
+        """
+
+    def start_cycle(self) -> None:
+        """
+        Start a new refresh cycle. Call it at the beginning of `refresh_data()`.
+
+        :return: None
+        """
+        self.slow_read_in_cycle = False
+        self.runtimes = {}
+
+    def reset(self) -> None:
+        """
+        Read all groups in the next cycle. Called by the DbusHelper, when the battery is online again.
+
+        :return: None
+        """
+        self.read_last_time = {name: None for name in self.groups}
+
+    def is_due(self, name: str) -> bool:
+        """
+        Check if a group has to be read in the current cycle.
+
+        :param name: The name of the group
+        :return: True if the group has to be read
+        """
+        refresh_class = self.groups[name]
+        read_last_time = self.read_last_time[name]
+
+        if refresh_class == self.FAST or read_last_time is None:
+            return True
+
+        if refresh_class == self.MEDIUM:
+            return monotonic() - read_last_time >= utils.REFRESH_MEDIUM_INTERVAL
+
+        return not self.slow_read_in_cycle and monotonic() - read_last_time >= utils.REFRESH_SLOW_INTERVAL
+
+    def run(self, name: str, read_function: Callable[[], bool]) -> bool:
+        """
+        Execute the read function of a group, if it is due in the current cycle.
+
+        :param name: The name of the group
+        :param read_function: The function that reads the group and returns True on success
+        :return: The result of the read function or True, if the group was not due
+        """
+        if not self.is_due(name):
+            return True
+
+        # the initial read of a group does not count, so that all values are available after the first cycle
+        if self.groups[name] == self.SLOW and self.read_last_time[name] is not None:
+            self.slow_read_in_cycle = True
+
+        start = monotonic()
+        result = read_function()
+        self.runtimes[name] = monotonic() - start
+
+        # a failed slow group is read again after the next interval, all other groups in the next cycle
+        if result or self.groups[name] == self.SLOW:
+            self.read_last_time[name] = monotonic()
+
+        return result
 
 
 class Battery(ABC):
@@ -281,6 +718,11 @@ class Battery(ABC):
     use the individual implementations as type Battery and work with it.
     """
 
+    _refresh_locks: Dict[str, threading.Lock] = {}
+    """
+    Refresh lock by port, shared by all batteries on the same port
+    """
+
     def __init__(self, port: str, baud: int, address: str):
         self.port: str = port
         self.baud_rate: int = baud
@@ -289,6 +731,15 @@ class Battery(ABC):
         self.role: str = "battery"
         self.type: str = "Generic"
         self.poll_interval: int = 1000
+        self.refresh_scheduler: RefreshScheduler = None
+        """
+        Decides which command groups are read in `refresh_data()`, if the BMS reads them in groups
+        """
+        self.refresh_lock: threading.Lock = Battery._refresh_locks.setdefault(port, threading.Lock())
+        """
+        Held while the BMS is read or written, so that callbacks do not interfere with a refresh in the worker thread.
+        Batteries on the same port share the lock, so that their frames do not collide on the bus
+        """
         self.dbus_external_objects: dict = None
         self.online: bool = True
         self.connection_info: str = "Initializing..."
@@ -320,7 +771,11 @@ class Battery(ABC):
         self.control_allow_discharge: bool = None
 
         self.current_avg: float = None
-        self.current_avg_lst: list = []
+        self.current_avg_window: utils.RollingWindow = utils.RollingWindow(300)
+        """
+        The calculated currents of the last 300 cycles, used for the average current.
+        """
+
         self.previous_current_avg: float = None
         self.current_external: float = None
         self.capacity_remain: float = None
@@ -335,7 +790,7 @@ class Battery(ABC):
         self.temperature_3: float = None
         self.temperature_4: float = None
         self.temperature_mos: float = None
-        self.cells: List[Cell] = []
+        self.cells: CellStore = CellStore()
         self.control_voltage: float = None
         self.soc_reset_requested: bool = False
         self.soc_reset_last_reached: int = 0  # save state to preserve on restart
@@ -349,6 +804,10 @@ class Battery(ABC):
         self.charge_mode_debug: str = ""
         self.charge_mode_debug_float: str = ""
         self.charge_mode_debug_bulk: str = ""
+        self.charge_mode_debug_enabled: bool = utils.GUI_PARAMETERS_SHOW_ADDITIONAL_INFO
+        """
+        Calculate the charge mode debug info. Set by the dbus helper depending on the publishing profile.
+        """
         self.charge_limitation: str = None
         self.discharge_limitation: str = None
         self.linear_cvl_last_set: int = 0
@@ -395,9 +854,9 @@ class Battery(ABC):
         Timestamp when it was last checked, if the error could be reset.
         """
 
-        self.error_timestamps: list = []
+        self.error_timestamps: utils.RollingWindow = utils.RollingWindow(180)
         """
-        List of timestamps when an error occurred.
+        Timestamps of the last 180 errors.
         """
 
         self.custom_field: str = None
@@ -405,6 +864,17 @@ class Battery(ABC):
         Custom field that the user can define in the BMS settings via the BMS app.
         """
 
+        self.refresh_epoch: int = 0
+        """
+        Counts the completed refreshes of the battery data.
+        """
+
+        self.refresh_cache: Union[dict, None] = None
+        """
+        Values of the getters decorated with `cached_per_refresh` for the current refresh epoch.
+        `None` disables the cache, e.g. while the battery data is refreshed.
+        """
+
         self.init_values()
 
     def init_values(self) -> None:
@@ -419,6 +889,55 @@ class Battery(ABC):
         self.current_corrected: float = None
         self.power_calc: float = None
         self.driver_start_time: int = int(time())
+        self.invalidate_refresh_cache()
+
+    def invalidate_refresh_cache(self) -> None:
+        """
+        Drop the cached values and disable the cache until the next refresh epoch starts.
+        Call it before the battery data is changed, e.g. before `refresh_data()`.
+
+        :return: None
+        """
+        self.refresh_cache = None
+
+    def new_refresh_epoch(self) -> None:
+        """
+        Start a new refresh epoch, after `refresh_data()` and `set_calculated_data()` were executed.
+        From now on the getters decorated with `cached_per_refresh` are calculated only once, until the cache is invalidated.
+
+        :return: None
+        """
+        self.refresh_epoch += 1
+        self.refresh_cache = {}
+
+    @property
+    def cells(self) -> CellStore:
+        """
+        The cells of the battery. Assigning a list of `Cell` objects wraps it into a `CellStore`.
+        """
+        return self._cells
+
+    @cells.setter
+    def cells(self, cells: List[Cell]) -> None:
+        self._cells = cells if isinstance(cells, CellStore) else CellStore(cells)
+
+    def get_cell_count_used(self) -> int:
+        """
+        Get the number of cells that are used for the cell values.
+
+        :return: The number of populated cells, limited to the cell count
+        """
+        if self.cell_count is None:
+            return len(self.cells)
+        return min(len(self.cells), self.cell_count)
+
+    def get_cell_summary(self) -> CellSummary:
+        """
+        Get the aggregates of the cell voltages, which are only calculated again, if a cell voltage changed.
+
+        :return: The aggregates of the cell voltages
+        """
+        return self.cells.get_summary(self.get_cell_count_used())
 
     @abstractmethod
     def test_connection(self) -> bool:
@@ -490,6 +1009,17 @@ class Battery(ABC):
         """
         return False
 
+    def get_fet_and_alarm_state(self) -> Union[tuple, None]:
+        """
+        Drivers that use `use_callback` may override this function to return the FET and alarm states
+        of the latest received data, without calling `refresh_data()`.
+        Updates are merged and published every `CALLBACK_MIN_PUBLISH_INTERVAL` seconds, but a change of
+        this state is published immediately.
+
+        :return: tuple with the FET and alarm states or None, if not supported
+        """
+        return None
+
     def set_can_transport_interface(self, can_transport_interface: object) -> None:
         """
         Set the access object for the can interface.
@@ -521,6 +1051,22 @@ class Battery(ABC):
         """
         return False
 
+    def run_test_connection(self) -> bool:
+        """
+        Called by the driver to test the connection. Runs `test_connection()`, see `AsyncBattery` for async drivers.
+
+        :return: True if the connection was successful else False
+        """
+        return self.test_connection()
+
+    def run_refresh_data(self) -> bool:
+        """
+        Called by the driver to read the battery data. Runs `refresh_data()`, see `AsyncBattery` for async drivers.
+
+        :return: False when fail, True if successful
+        """
+        return self.refresh_data()
+
     def to_temperature(self, sensor: int, value: float) -> None:
         """
         Keep the temp value between -20 and 100 to handle sensor issues or no data.
@@ -850,7 +1396,7 @@ class Battery(ABC):
                 self.charge_mode += ", Linear Mode"
 
             # debug information
-            if utils.GUI_PARAMETERS_SHOW_ADDITIONAL_INFO or logger.isEnabledFor(logging.DEBUG):
+            if self.charge_mode_debug_enabled or logger.isEnabledFor(logging.DEBUG):
 
                 soc_reset_days_ago = round((current_time - self.soc_reset_last_reached) / 60 / 60 / 24, 2)
                 soc_reset_in_days = round(utils.SOC_RESET_AFTER_DAYS - soc_reset_days_ago, 2)
@@ -1146,18 +1692,9 @@ class Battery(ABC):
 
         try:
             if utils.CHARGE_MODE == 2:
-                return utils.calc_step_relationship(
-                    self.get_max_cell_voltage(),
-                    utils.CELL_VOLTAGES_WHILE_CHARGING,
-                    utils.MAX_CHARGE_CURRENT_CV,
-                    False,
-                )
+                return utils.MAX_CHARGE_CURRENT_CV_TABLE.get_step(self.get_max_cell_voltage(), False)
             else:
-                return utils.calc_linear_relationship(
-                    self.get_max_cell_voltage(),
-                    utils.CELL_VOLTAGES_WHILE_CHARGING,
-                    utils.MAX_CHARGE_CURRENT_CV,
-                )
+                return utils.MAX_CHARGE_CURRENT_CV_TABLE.get_linear(self.get_max_cell_voltage())
         except Exception:
             # set error code, to show in the GUI that something is wrong
             self.manage_error_code(8)
@@ -1195,18 +1732,9 @@ class Battery(ABC):
 
         try:
             if utils.CHARGE_MODE == 2:
-                return utils.calc_step_relationship(
-                    self.get_min_cell_voltage(),
-                    utils.CELL_VOLTAGES_WHILE_DISCHARGING,
-                    utils.MAX_DISCHARGE_CURRENT_CV,
-                    True,
-                )
+                return utils.MAX_DISCHARGE_CURRENT_CV_TABLE.get_step(self.get_min_cell_voltage(), True)
             else:
-                return utils.calc_linear_relationship(
-                    self.get_min_cell_voltage(),
-                    utils.CELL_VOLTAGES_WHILE_DISCHARGING,
-                    utils.MAX_DISCHARGE_CURRENT_CV,
-                )
+                return utils.MAX_DISCHARGE_CURRENT_CV_TABLE.get_linear(self.get_min_cell_voltage())
         except Exception:
             # set error code, to show in the GUI that something is wrong
             self.manage_error_code(8)
@@ -1244,18 +1772,9 @@ class Battery(ABC):
         try:
             for key, currentMaxTemperature in temperatures.items():
                 if utils.CHARGE_MODE == 2:
-                    temperatures[key] = utils.calc_step_relationship(
-                        currentMaxTemperature,
-                        utils.TEMPERATURES_WHILE_CHARGING,
-                        utils.MAX_CHARGE_CURRENT_T,
-                        False,
-                    )
+                    temperatures[key] = utils.MAX_CHARGE_CURRENT_T_TABLE.get_step(currentMaxTemperature, False)
                 else:
-                    temperatures[key] = utils.calc_linear_relationship(
-                        currentMaxTemperature,
-                        utils.TEMPERATURES_WHILE_CHARGING,
-                        utils.MAX_CHARGE_CURRENT_T,
-                    )
+                    temperatures[key] = utils.MAX_CHARGE_CURRENT_T_TABLE.get_linear(currentMaxTemperature)
             return min(temperatures[0], temperatures[1])
         except Exception:
             # set error code, to show in the GUI that something is wrong
@@ -1294,18 +1813,9 @@ class Battery(ABC):
         try:
             for key, currentMaxTemperature in temperatures.items():
                 if utils.CHARGE_MODE == 2:
-                    temperatures[key] = utils.calc_step_relationship(
-                        currentMaxTemperature,
-                        utils.TEMPERATURES_WHILE_DISCHARGING,
-                        utils.MAX_DISCHARGE_CURRENT_T,
-                        True,
-                    )
+                    temperatures[key] = utils.MAX_DISCHARGE_CURRENT_T_TABLE.get_step(currentMaxTemperature, True)
                 else:
-                    temperatures[key] = utils.calc_linear_relationship(
-                        currentMaxTemperature,
-                        utils.TEMPERATURES_WHILE_DISCHARGING,
-                        utils.MAX_DISCHARGE_CURRENT_T,
-                    )
+                    temperatures[key] = utils.MAX_DISCHARGE_CURRENT_T_TABLE.get_linear(currentMaxTemperature)
             return min(temperatures[0], temperatures[1])
         except Exception:
             # set error code, to show in the GUI that something is wrong
@@ -1332,18 +1842,9 @@ class Battery(ABC):
         """
         try:
             if utils.CHARGE_MODE == 2:
-                return utils.calc_step_relationship(
-                    self.soc_calc,
-                    utils.SOC_WHILE_CHARGING,
-                    utils.MAX_CHARGE_CURRENT_SOC,
-                    True,
-                )
+                return utils.MAX_CHARGE_CURRENT_SOC_TABLE.get_step(self.soc_calc, True)
             else:
-                return utils.calc_linear_relationship(
-                    self.soc_calc,
-                    utils.SOC_WHILE_CHARGING,
-                    utils.MAX_CHARGE_CURRENT_SOC,
-                )
+                return utils.MAX_CHARGE_CURRENT_SOC_TABLE.get_linear(self.soc_calc)
         except Exception:
             # set error code, to show in the GUI that something is wrong
             self.manage_error_code(8)
@@ -1369,18 +1870,9 @@ class Battery(ABC):
         """
         try:
             if utils.CHARGE_MODE == 2:
-                return utils.calc_step_relationship(
-                    self.soc_calc,
-                    utils.SOC_WHILE_DISCHARGING,
-                    utils.MAX_DISCHARGE_CURRENT_SOC,
-                    True,
-                )
+                return utils.MAX_DISCHARGE_CURRENT_SOC_TABLE.get_step(self.soc_calc, True)
             else:
-                return utils.calc_linear_relationship(
-                    self.soc_calc,
-                    utils.SOC_WHILE_DISCHARGING,
-                    utils.MAX_DISCHARGE_CURRENT_SOC,
-                )
+                return utils.MAX_DISCHARGE_CURRENT_SOC_TABLE.get_linear(self.soc_calc)
         except Exception:
             # set error code, to show in the GUI that something is wrong
             self.manage_error_code(8)
@@ -1404,16 +1896,10 @@ class Battery(ABC):
 
         :return: The number of the cell with the lowest voltage
         """
-        min_voltage = 9999
-        min_cell = None
         if len(self.cells) == 0 and hasattr(self, "cell_min_no"):
             return self.cell_min_no
 
-        for c in range(min(len(self.cells), self.cell_count)):
-            if self.cells[c].voltage is not None and min_voltage > self.cells[c].voltage:
-                min_voltage = self.cells[c].voltage
-                min_cell = c
-        return min_cell
+        return self.get_cell_summary().min_cell
 
     def get_max_cell(self) -> int:
         """
@@ -1421,16 +1907,10 @@ class Battery(ABC):
 
         :return: The number of the cell with the highest voltage
         """
-        max_voltage = 0
-        max_cell = None
         if len(self.cells) == 0 and hasattr(self, "cell_max_no"):
             return self.cell_max_no
 
-        for c in range(min(len(self.cells), self.cell_count)):
-            if self.cells[c].voltage is not None and max_voltage < self.cells[c].voltage:
-                max_voltage = self.cells[c].voltage
-                max_cell = c
-        return max_cell
+        return self.get_cell_summary().max_cell
 
     def get_min_cell_desc(self) -> Union[str, None]:
         """
@@ -1457,9 +1937,9 @@ class Battery(ABC):
         :param idx: The index of the cell
         :return: The voltage of the cell
         """
-        if idx >= min(len(self.cells), self.cell_count):
+        if idx >= self.get_cell_count_used():
             return None
-        return self.cells[idx].voltage
+        return self.cells.get_voltage(idx)
 
     def get_cell_voltage_sum(self) -> float:
         """
@@ -1467,12 +1947,7 @@ class Battery(ABC):
 
         :return: The sum of all cell voltages
         """
-        voltage_sum = 0
-        for i in range(self.cell_count):
-            voltage = self.get_cell_voltage(i)
-            if voltage:
-                voltage_sum += voltage
-        return voltage_sum
+        return self.get_cell_summary().voltage_sum
 
     def get_cell_balancing(self, idx: int) -> Union[int, None]:
         """
@@ -1481,12 +1956,11 @@ class Battery(ABC):
         :param idx: The index of the cell
         :return: The balancing status of the cell
         """
-        if idx >= min(len(self.cells), self.cell_count):
+        if idx >= self.get_cell_count_used():
             return None
-        if self.cells[idx].balance is not None and self.cells[idx].balance:
-            return 1
-        return 0
+        return 1 if self.cells.get_balance(idx) else 0
 
+    @cached_per_refresh
     def get_capacity_remain(self) -> Union[float, None]:
         """
         Get the remaining capacity of the battery.
@@ -1500,6 +1974,7 @@ class Battery(ABC):
             return self.capacity * self.soc_calc / 100
         return None
 
+    @cached_per_refresh
     def get_capacity_consumed(self) -> Union[float, None]:
         """
         Get the consumed capacity of the battery.
@@ -1596,10 +2071,7 @@ class Battery(ABC):
             min_voltage = self.cell_min_voltage
 
         if min_voltage is None:
-            try:
-                min_voltage = min(c.voltage for c in self.cells if c.voltage is not None)
-            except ValueError:
-                pass
+            min_voltage = self.get_cell_summary().min_voltage
         return min_voltage
 
     def get_max_cell_voltage(self) -> Union[float, None]:
@@ -1608,10 +2080,7 @@ class Battery(ABC):
             max_voltage = self.cell_max_voltage
 
         if max_voltage is None:
-            try:
-                max_voltage = max(c.voltage for c in self.cells if c.voltage is not None)
-            except ValueError:
-                pass
+            max_voltage = self.get_cell_summary().max_voltage
         return max_voltage
 
     def get_midvoltage(self) -> Tuple[Union[float, None], Union[float, None]]:
@@ -1626,32 +2095,24 @@ class Battery(ABC):
 
         halfcount = int(math.floor(self.cell_count / 2))
         uneven_cells_offset = self.cell_count % 2
-        half1voltage = 0
-        half2voltage = 0
+        half1voltage = self.cells.get_voltage_sum(0, halfcount)
+        half2voltage = self.cells.get_voltage_sum(halfcount + uneven_cells_offset, self.cell_count)
 
         try:
-            half1voltage = sum(cell.voltage for cell in self.cells[:halfcount] if cell.voltage is not None)
-            half2voltage = sum(cell.voltage for cell in self.cells[halfcount + uneven_cells_offset :] if cell.voltage is not None)
-        except ValueError:
-            pass
-
-        try:
-            extra = 0 if self.cell_count % 2 == 0 else self.cells[halfcount].voltage / 2
+            extra = 0 if self.cell_count % 2 == 0 else (self.cells.get_voltage(halfcount) or 0) / 2
             # get the midpoint of the battery
             midpoint = half1voltage + extra
             return (
                 abs(midpoint),
                 abs((half2voltage - half1voltage) / (half2voltage + half1voltage) * 100),
             )
-        except ValueError:
+        except ZeroDivisionError:
             return None, None
 
     def get_balancing(self) -> int:
-        for c in range(min(len(self.cells), self.cell_count)):
-            if self.cells[c].balance is not None and self.cells[c].balance:
-                return 1
-        return 0
+        return 1 if self.cells.is_balancing(self.get_cell_count_used()) else 0
 
+    @cached_per_refresh
     def get_temperature(self) -> Union[float, None]:
         try:
             temperature_map = {1: self.temperature_1, 2: self.temperature_2, 3: self.temperature_3, 4: self.temperature_4}
@@ -1668,6 +2129,7 @@ class Battery(ABC):
         except TypeError:
             return None
 
+    @cached_per_refresh
     def get_min_temperature(self) -> Union[float, None]:
         try:
             temperatures = [t for t in [self.temperature_1, self.temperature_2, self.temperature_3, self.temperature_4] if t is not None]
@@ -1677,6 +2139,7 @@ class Battery(ABC):
         except TypeError:
             return None
 
+    @cached_per_refresh
     def get_min_temperature_id(self) -> Union[str, None]:
         try:
             temperatures = [(t, i) for i, t in enumerate([self.temperature_1, self.temperature_2, self.temperature_3, self.temperature_4]) if t is not None]
@@ -1694,6 +2157,7 @@ class Battery(ABC):
         except TypeError:
             return None
 
+    @cached_per_refresh
     def get_max_temperature(self) -> Union[float, None]:
         try:
             temperatures = [t for t in [self.temperature_1, self.temperature_2, self.temperature_3, self.temperature_4] if t is not None]
@@ -1703,6 +2167,7 @@ class Battery(ABC):
         except TypeError:
             return None
 
+    @cached_per_refresh
     def get_max_temperature_id(self) -> Union[str, None]:
         try:
             temperatures = [(t, i) for i, t in enumerate([self.temperature_1, self.temperature_2, self.temperature_3, self.temperature_4]) if t is not None]
@@ -1750,47 +2215,37 @@ class Battery(ABC):
 
         return True
 
-    def setup_external_sensor(self) -> None:
+    def setup_external_sensor(self, dbus_connection) -> None:
         """
-        Setup external sensor and it's dbus items
+        Setup external sensor and it's dbus items.
+        Called by the DbusHelper, when the external sensor service appears on the dbus.
+
+        :param dbus_connection: The dbus connection of the driver
         """
-        import dbus
-        import os
-        from dbus.mainloop.glib import DBusGMainLoop
         from vedbus import VeDbusItemImport
 
         # setup external dbus paths
         try:
-            DBusGMainLoop(set_as_default=True)
-
-            # connect to the sessionbus, on a CC GX the systembus is used
-            dbus_connection = dbus.SessionBus() if "DBUS_SESSION_BUS_ADDRESS" in os.environ else dbus.SystemBus()
-
             # dictionary containing the different items
             dbus_objects = {}
 
-            # check if the dbus service is available
-            is_present_in_vebus = utils.EXTERNAL_SENSOR_DBUS_DEVICE in dbus_connection.list_names()
-
-            if is_present_in_vebus:
-
-                if utils.EXTERNAL_SENSOR_DBUS_PATH_CURRENT is not None:
-                    logger.info("Using external sensor for current: " + f"{utils.EXTERNAL_SENSOR_DBUS_DEVICE}{utils.EXTERNAL_SENSOR_DBUS_PATH_CURRENT}")
-                    dbus_objects["Current"] = VeDbusItemImport(
-                        dbus_connection,
-                        utils.EXTERNAL_SENSOR_DBUS_DEVICE,
-                        utils.EXTERNAL_SENSOR_DBUS_PATH_CURRENT,
-                    )
+            if utils.EXTERNAL_SENSOR_DBUS_PATH_CURRENT is not None:
+                logger.info("Using external sensor for current: " + f"{utils.EXTERNAL_SENSOR_DBUS_DEVICE}{utils.EXTERNAL_SENSOR_DBUS_PATH_CURRENT}")
+                dbus_objects["Current"] = VeDbusItemImport(
+                    dbus_connection,
+                    utils.EXTERNAL_SENSOR_DBUS_DEVICE,
+                    utils.EXTERNAL_SENSOR_DBUS_PATH_CURRENT,
+                )
 
-                if utils.EXTERNAL_SENSOR_DBUS_PATH_SOC is not None:
-                    logger.info("Using external sensor for SOC: " + f"{utils.EXTERNAL_SENSOR_DBUS_DEVICE}{utils.EXTERNAL_SENSOR_DBUS_PATH_SOC}")
-                    dbus_objects["Soc"] = VeDbusItemImport(
-                        dbus_connection,
-                        utils.EXTERNAL_SENSOR_DBUS_DEVICE,
-                        utils.EXTERNAL_SENSOR_DBUS_PATH_SOC,
-                    )
+            if utils.EXTERNAL_SENSOR_DBUS_PATH_SOC is not None:
+                logger.info("Using external sensor for SOC: " + f"{utils.EXTERNAL_SENSOR_DBUS_DEVICE}{utils.EXTERNAL_SENSOR_DBUS_PATH_SOC}")
+                dbus_objects["Soc"] = VeDbusItemImport(
+                    dbus_connection,
+                    utils.EXTERNAL_SENSOR_DBUS_DEVICE,
+                    utils.EXTERNAL_SENSOR_DBUS_PATH_SOC,
+                )
 
-                self.dbus_external_objects = dbus_objects
+            self.dbus_external_objects = dbus_objects
 
         except Exception:
             # set to None to avoid crashing, fallback to battery current
@@ -1839,14 +2294,7 @@ class Battery(ABC):
             # calculate current only, if lists are different
             if utils.CURRENT_CORRECTION:
                 # calculate current from real current
-                current = round(
-                    utils.calc_linear_relationship(
-                        self.current,
-                        utils.CURRENT_REPORTED_BY_BMS,
-                        utils.CURRENT_MEASURED_BY_USER,
-                    ),
-                    3,
-                )
+                current = round(utils.CURRENT_CORRECTION_TABLE.get_linear(self.current), 3)
                 # set for debugging
                 self.current_corrected = current
             else:
@@ -1918,18 +2366,14 @@ class Battery(ABC):
 
         :param error_code: The error code to display
         """
+        # only the last 180 errors are kept
         self.error_timestamps.append(int(time()))
 
-        # only keep last 180 errors
-        if len(self.error_timestamps) > 180:
-            # remove first element
-            self.error_timestamps.pop(0)
-
         # check if
         #     there are more or equal to 180 errors
         #     the first error in the list is within the last 3 hours
         #     the error code is different from the current error
-        if len(self.error_timestamps) >= 180 and int(time()) - self.error_timestamps[0] <= (60 * 60 * 3) and self.error_code != error_code:
+        if self.error_timestamps.is_full() and int(time()) - self.error_timestamps.get_oldest() <= (60 * 60 * 3) and self.error_code != error_code:
             # set error code
             self.error_code = error_code
 
@@ -1941,7 +2385,7 @@ class Battery(ABC):
         #     there are more or equal to 180 errors
         #     the first error in the list is not within the last 3 hours
         #     the error code is not already None
-        if len(self.error_timestamps) >= 180 and int(time()) - self.error_timestamps[0] > (60 * 60 * 3) and self.error_code is not None:
+        if self.error_timestamps.is_full() and int(time()) - self.error_timestamps.get_oldest() > (60 * 60 * 3) and self.error_code is not None:
             self.error_code = None
 
     def log_cell_data(self) -> bool:
@@ -2165,3 +2609,85 @@ class Battery(ABC):
             self.history_calculate_values()
 
         return True
+
+
+class AsyncBattery(Battery):
+    """
+    Abstract baseclass for BMS drivers with async I/O, e.g. based on `utils_async.AsyncSerial`.
+
+    `test_connection()` and `refresh_data()` are coroutines, so that the I/O of a driver does not block while a reply
+    is awaited. The driver core calls the sync methods `run_test_connection()` and `run_refresh_data()`, which run
+    the coroutines on the event loop of the battery. The event loop is created once and closed with the battery.
+    Callbacks, that write to the BMS, have to run their coroutines with `run()` as well.
+
+    See `BatteryTemplateAsync` in `battery_template.py` for an example.
+    """
+
+    def __init__(self, port: str, baud: int, address: str):
+        super().__init__(port, baud, address)
+        self.event_loop: asyncio.AbstractEventLoop = None
+        """
+        Event loop of the battery, created with the first coroutine that is run
+        """
+
+    @abstractmethod
+    async def test_connection(self) -> bool:
+        """
+        This abstract method needs to be implemented for each BMS. Each driver has to override this function
+        to test, if a connection to the BMS can be made.
+
+        :return: True if the connection was successful else False
+        """
+        return False
+
+    @abstractmethod
+    async def refresh_data(self) -> bool:
+        """
+        Each driver must override this function to read battery data and populate this class.
+        It's called each poll inverval just before the data is published to the vedbus.
+
+        :return: False when fail, True if successful
+        """
+        return False
+
+    def run(self, coroutine: Coroutine) -> Any:
+        """
+        Run a coroutine on the event loop of the battery until it is complete.
+        The event loop is not shared, so this can be called from the main loop or from the worker thread of the battery.
+
+        :param coroutine: The coroutine to run
+        :return: The result of the coroutine
+        """
+        if self.event_loop is None:
+            self.event_loop = asyncio.new_event_loop()
+
+        return self.event_loop.run_until_complete(coroutine)
+
+    def close_event_loop(self) -> None:
+        """
+        Close the event loop of the battery, e.g. when the battery is discarded after a failed connection test.
+
+        :return: None
+        """
+        if self.event_loop is not None and not self.event_loop.is_running() and not self.event_loop.is_closed():
+            self.event_loop.close()
+        self.event_loop = None
+
+    def __del__(self):
+        self.close_event_loop()
+
+    def run_test_connection(self) -> bool:
+        """
+        Called by the driver to test the connection. Runs the coroutine `test_connection()`.
+
+        :return: True if the connection was successful else False
+        """
+        return self.run(self.test_connection())
+
+    def run_refresh_data(self) -> bool:
+        """
+        Called by the driver to read the battery data. Runs the coroutine `refresh_data()`.
+
+        :return: False when fail, True if successful
+        """
+        return self.run(self.refresh_data())
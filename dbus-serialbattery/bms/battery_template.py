@@ -5,9 +5,11 @@
 # in the documentation for a checklist what you have to do, when adding a new BMS
 
 # avoid importing wildcards, remove unused imports
-from battery import Battery, Cell
+from battery import AsyncBattery, Battery, Cell
 from utils import read_serial_data, logger
+from utils_async import AsyncSerial
 from struct import unpack_from
+import asyncio
 import sys
 
 
@@ -362,3 +364,129 @@ class BatteryTemplate(Battery):
         else:
             logger.error(">>> ERROR: Incorrect Reply")
             return False
+
+
+class BatteryTemplateAsync(AsyncBattery):
+    """
+    Template for a BMS driver with async I/O.
+
+    Only the differences to the sync template above are shown. A sync driver can be ported by
+    making `test_connection()`, `refresh_data()` and the functions that read from the BMS coroutines
+    and reading with `AsyncSerial` instead of `read_serial_data()`. The decoding stays the same.
+    """
+
+    def __init__(self, port, baud, address):
+        super(BatteryTemplateAsync, self).__init__(port, baud, address)
+        self.type = self.BATTERYTYPE
+        self.history.exclude_values_to_calculate = []
+        self.address = address
+
+        # the serial port is opened with the first request and stays open
+        self.serial = AsyncSerial(port, baud)
+
+    BATTERYTYPE = "TemplateAsync"
+
+    # BMS specific, could be removed, if not needed
+    LENGTH_CHECK = 4
+
+    # BMS specific, could be removed, if not needed
+    LENGTH_POS = 3
+
+    async def test_connection(self):
+        """
+        call a function that will connect to the battery, send a command and retrieve the result.
+        The result or call should be unique to this BMS. Battery name or version, etc.
+        Return True if success, False for failure
+        """
+        result = False
+        try:
+            # get settings to check if the data is valid and the connection is working
+            result = await self.get_settings_async()
+            # get the rest of the data to be sure, that all data is valid and the correct battery type is recognized
+            result = result and await self.refresh_data()
+        except Exception:
+            (
+                exception_type,
+                exception_object,
+                exception_traceback,
+            ) = sys.exc_info()
+            file = exception_traceback.tb_frame.f_code.co_filename
+            line = exception_traceback.tb_lineno
+            logger.error(f"Exception occurred: {repr(exception_object)} of type {exception_type} in {file} line #{line}")
+            result = False
+
+        if not result:
+            self.serial.close()
+
+        return result
+
+    def get_settings(self):
+        """
+        Called once by the driver core after a successful connection.
+        The values were already read by `get_settings_async()` in `test_connection()`.
+        """
+        return True
+
+    async def get_settings_async(self):
+        """
+        Read all values that only need to be set once, see `get_settings()` of the sync template
+        Return True if success, False for failure
+        """
+        settings_data = await self.read_serial_data_template(self.command_settings)
+
+        if settings_data is False:
+            return False
+
+        # set the MANDATORY values, see `get_settings()` of the sync template
+
+        # init the cell array once
+        if len(self.cells) == 0:
+            for _ in range(self.cell_count):
+                self.cells.append(Cell(False))
+
+        return True
+
+    async def refresh_data(self):
+        """
+        call all functions that will refresh the battery data.
+        This will be called for every iteration (1 second)
+        Return True if success, False for failure
+        """
+        # both requests are started at once, but run one after the other: AsyncSerial keeps
+        # the bus until a reply is complete and the decoding has no await points
+        status_data, cell_data = await asyncio.gather(
+            self.read_serial_data_template(self.command_status),
+            self.read_serial_data_template(self.command_cells),
+        )
+
+        # decode the data like `read_status_data()` and `read_cell_data()` of the sync template
+        return status_data is not False and cell_data is not False
+
+    def force_charging_off_callback(self, path, value):
+        """
+        Callbacks are called synchronously, therefore run the coroutine on the event loop of the battery
+        """
+        if value is None:
+            return False
+
+        return self.run(self.write_serial_data_template(self.command_charge_fet_off if value else self.command_charge_fet_on))
+
+    async def write_serial_data_template(self, command):
+        return await self.read_serial_data_template(command) is not False
+
+    async def read_serial_data_template(self, command):
+        # use AsyncSerial.request() to read the data and then do BMS spesific checks (crc, start bytes, etc)
+        # use AsyncSerial.modbus_read_registers() for Modbus RTU
+        data = await self.serial.request(command, self.LENGTH_POS, self.LENGTH_CHECK)
+        if data is False:
+            logger.error(">>> ERROR: No reply - returning")
+            return False
+
+        start, flag, command_ret, length = unpack_from("BBBB", data)
+        checksum = sum(data[:-1]) & 0xFF
+
+        if start == 165 and length == 8 and checksum == data[12]:
+            return data[4 : length + 4]
+        else:
+            logger.error(">>> ERROR: Incorrect Reply")
+            return False
@@ -3,7 +3,7 @@
 # Notes
 # Updated by https://github.com/transistorgit
 
-from battery import Battery, Cell
+from battery import Battery, Cell, RefreshScheduler
 from utils import (
     bytearray_to_string,
     open_serial_port,
@@ -46,6 +46,20 @@ class Daly(Battery):
             "force_discharging_off_callback",
         ]
         self.history.exclude_values_to_calculate = ["charge_cycles"]
+        # command groups read by refresh_data() with their refresh class
+        self.refresh_scheduler = RefreshScheduler(
+            {
+                "soc": RefreshScheduler.FAST,
+                "fed": RefreshScheduler.FAST,
+                "cell_voltage_range": RefreshScheduler.MEDIUM,
+                "alarm": RefreshScheduler.MEDIUM,
+                "temperature_range": RefreshScheduler.MEDIUM,
+                "balance_state": RefreshScheduler.MEDIUM,
+                "cells_volts": RefreshScheduler.MEDIUM,
+                "status": RefreshScheduler.SLOW,
+                "capacity": RefreshScheduler.SLOW,
+            }
+        )
 
     # command bytes [StartFlag=A5][Address=40][Command=94][DataLength=8][8x fill bytes][checksum]
     # use 0xAA (or 0x55) as fill bytes to allow the daly's "weak" uart to sync better
@@ -118,18 +132,20 @@ class Daly(Battery):
         # Open serial port to be used for all data reads instead of opening multiple times
         try:
             with open_serial_port(self.port, self.baud_rate) as ser:
-                result = self.read_soc_data(ser)
+                self.refresh_scheduler.start_cycle()
+
+                result = self.refresh_scheduler.run("soc", lambda: self.read_soc_data(ser))
                 self.reset_soc = self.soc if self.soc else 0
                 if self.runtime > 0.200:  # TROUBLESHOOTING for no reply errors
                     logger.debug("  |- refresh_data: read_soc_data - result: " + str(result) + " - runtime: " + str(f"{self.runtime:.1f}") + "s")
 
                 # result placed last to ensure all data is read anyway
-                result = self.read_fed_data(ser) and result
+                result = self.refresh_scheduler.run("fed", lambda: self.read_fed_data(ser)) and result
                 if self.runtime > 0.200:  # TROUBLESHOOTING for no reply errors
                     logger.debug("  |- refresh_data: read_fed_data - result: " + str(result) + " - runtime: " + str(f"{self.runtime:.1f}") + "s")
 
                 # result placed last to ensure all data is read anyway
-                result = self.read_cell_voltage_range_data(ser) and result
+                result = self.refresh_scheduler.run("cell_voltage_range", lambda: self.read_cell_voltage_range_data(ser)) and result
                 if self.runtime > 0.200:  # TROUBLESHOOTING for no reply errors
                     logger.debug("  |- refresh_data: read_cell_voltage_range_data - result: " + str(result) + " - runtime: " + str(f"{self.runtime:.1f}") + "s")
 
@@ -138,25 +154,29 @@ class Daly(Battery):
                     logger.debug("  |- refresh_data: write_soc_and_datetime - result: " + str(result) + " - runtime: " + str(f"{self.runtime:.1f}") + "s")
 
                 # result placed last to ensure all data is read anyway
-                result = self.read_alarm_data(ser) and result
+                result = self.refresh_scheduler.run("alarm", lambda: self.read_alarm_data(ser)) and result
                 if self.runtime > 0.200:  # TROUBLESHOOTING for no reply errors
                     logger.debug("  |- refresh_data: read_alarm_data - result: " + str(result) + " - runtime: " + str(f"{self.runtime:.1f}") + "s")
 
                 # result placed last to ensure all data is read anyway
-                result = self.read_temperature_range_data(ser) and result
+                result = self.refresh_scheduler.run("temperature_range", lambda: self.read_temperature_range_data(ser)) and result
                 if self.runtime > 0.200:  # TROUBLESHOOTING for no reply errors
                     logger.debug("  |- refresh_data: read_temperature_range_data - result: " + str(result) + " - runtime: " + str(f"{self.runtime:.1f}") + "s")
 
                 # result placed last to ensure all data is read anyway
-                result = self.read_balance_state(ser) and result
+                result = self.refresh_scheduler.run("balance_state", lambda: self.read_balance_state(ser)) and result
                 if self.runtime > 0.200:  # TROUBLESHOOTING for no reply errors
                     logger.debug("  |- refresh_data: read_balance_state - result: " + str(result) + " - runtime: " + str(f"{self.runtime:.1f}") + "s")
 
                 # result placed last to ensure all data is read anyway
-                result = self.read_cells_volts(ser) and result
+                result = self.refresh_scheduler.run("cells_volts", lambda: self.read_cells_volts(ser)) and result
                 if self.runtime > 0.200:  # TROUBLESHOOTING for no reply errors
                     logger.debug("  |- refresh_data: read_cells_volts - result: " + str(result) + " - runtime: " + str(f"{self.runtime:.1f}") + "s")
 
+                # slow values, only one of them is read per cycle and the refresh does not fail without them
+                self.refresh_scheduler.run("status", lambda: self.read_status_data(ser))
+                self.refresh_scheduler.run("capacity", lambda: self.read_capacity(ser))
+
                 self.write_charge_discharge_mos(ser)
 
                 if AUTO_RESET_SOC:
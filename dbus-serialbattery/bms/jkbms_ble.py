@@ -6,10 +6,11 @@
 # Updated by https://github.com/mr-manuel
 
 from battery import Battery, Cell
-from typing import Callable
+from typing import Callable, Union
 from utils import logger, AUTO_RESET_SOC
 from time import sleep, time
 from bms.jkbms_brn import Jkbms_Brn
+from utils_ble import BleReconnectManager
 import os
 import sys
 
@@ -19,13 +20,13 @@ import sys
 
 class Jkbms_Ble(Battery):
     BATTERYTYPE = "JKBMS BLE"
-    resetting = False
 
     def __init__(self, port, baud, address):
         super(Jkbms_Ble, self).__init__(port, baud, address)
         self.address = address
         self.type = self.BATTERYTYPE
-        self.jk = Jkbms_Brn(address, lambda: self.reset_bluetooth())
+        self.reconnect_manager = BleReconnectManager("Jkbms_Ble " + address, lambda: self.reset_bluetooth())
+        self.jk = Jkbms_Brn(address, self.reconnect_manager)
         self.unique_identifier_tmp = ""
         self.history.exclude_values_to_calculate = ["charge_cycles"]
 
@@ -137,6 +138,18 @@ class Jkbms_Ble(Battery):
         self.jk.set_callback(callback)
         return callback is not None
 
+    def get_fet_and_alarm_state(self) -> Union[tuple, None]:
+        st = self.jk.get_status()
+        if st is None:
+            return None
+
+        return (
+            st["settings"]["charging_switch"],
+            st["settings"]["discharging_switch"],
+            st["settings"]["balancing_switch"],
+            tuple(st.get("warnings", {}).values()),
+        )
+
     def refresh_data(self):
         # call all functions that will refresh the battery data.
         # This will be called for every iteration (1 second)
@@ -150,24 +163,19 @@ class Jkbms_Ble(Battery):
 
         last_update = int(time() - st["last_update"])
         if last_update >= 15 and last_update % 15 == 0:
-            logger.info(f"Jkbms_Ble: Bluetooth connection interrupted. Got no fresh data since {last_update}s.")
-            # show Bluetooth signal strength (RSSI)
-            bluetoothctl_info = os.popen("bluetoothctl info " + self.address + ' | grep -i -E "device|name|alias|pair|trusted|blocked|connected|rssi|power"')
-            logger.info(bluetoothctl_info.read())
-            bluetoothctl_info.close()
+            logger.info(
+                f"Jkbms_Ble: Bluetooth connection interrupted. Got no fresh data since {last_update}s. "
+                + f"Reconnect metrics: {self.reconnect_manager.get_metrics()}"
+            )
 
             # if the thread is still alive but data too old there is something
-            # wrong with the bt-connection; restart whole stack
-            if not self.resetting and last_update >= 60:
-                logger.error("Jkbms_Ble: Bluetooth died. Restarting Bluetooth system driver.")
-                self.reset_bluetooth()
-                sleep(2)
-                self.jk.start_scraping()
-                sleep(2)
+            # wrong with the bt-connection; drop it and let the reconnect manager
+            # reconnect. The Bluetooth stack is only reset, if reconnecting fails repeatedly
+            if last_update % 60 == 0 and self.jk.is_running():
+                logger.warning("Jkbms_Ble: Connected, but no data received. Reconnecting.")
+                self.jk.reconnect()
 
             return False
-        else:
-            self.resetting = False
 
         # update cell voltages
         for c in range(self.cell_count):
@@ -231,7 +239,6 @@ class Jkbms_Ble(Battery):
 
     def reset_bluetooth(self):
         logger.info("Reset of system Bluetooth daemon triggered")
-        self.resetting = True
         if self.jk.is_running():
             if self.jk.stop_scraping():
                 logger.info("Scraping stopped, issuing sys-commands")
@@ -148,11 +148,12 @@ class Jkbms_Brn:
     # translate info placeholder, since it depends on the bms_max_cell_count
     translate_cell_info = []
 
-    def __init__(self, addr, reset_bt_callback=None):
+    def __init__(self, addr, reconnect_manager=None):
         self.address = addr
         self.bt_thread = None
         self.bt_thread_monitor = threading.Thread(target=self.monitor_scraping, name="Thread-JKBMS-Monitor")
-        self.bt_reset = reset_bt_callback
+        # handles the backoff between reconnects and the Bluetooth stack reset as last resort
+        self.reconnect_manager = reconnect_manager
         self.should_be_scraping = False
         self.trigger_soc_reset = False
 
@@ -340,6 +341,8 @@ class Jkbms_Brn:
                 logger.debug("great success! frame complete and sane, lets decode")
                 self.decode()
                 self.frame_buffer = []
+                if self.reconnect_manager is not None:
+                    self.reconnect_manager.data_received()
                 if self._new_data_callback is not None:
                     self._new_data_callback()
 
@@ -515,6 +518,8 @@ class Jkbms_Brn:
                             f"--> asy_connect_and_scrape(): error while disconnecting: {repr(exception_object)} "
                             + f"of type {exception_type} in {file} line #{line}"
                         )
+                if self.reconnect_manager is not None and self.should_be_scraping:
+                    self.reconnect_manager.connection_lost()
 
         logger.info("--> asy_connect_and_scrape(): Exit")
 
@@ -525,10 +530,12 @@ class Jkbms_Brn:
             logger.debug("scraping thread started -> main thread id: " + str(self.main_thread.ident) + " scraping thread: " + str(self.bt_thread.ident))
             self.bt_thread.join()
             if self.should_be_scraping is True:
-                logger.debug("scraping thread ended: reseting bluetooth and restarting")
-                if self.bt_reset is not None:
-                    self.bt_reset()
-                sleep(2)
+                logger.debug("scraping thread ended: reconnecting")
+                # reconnect on the existing adapter, the notifications are subscribed again on connect
+                if self.reconnect_manager is not None:
+                    self.reconnect_manager.wait_for_reconnect()
+                else:
+                    sleep(2)
 
     def start_scraping(self):
         self.main_thread = threading.current_thread()
@@ -538,6 +545,12 @@ class Jkbms_Brn:
         self.should_be_scraping = True
         self.bt_thread_monitor.start()
 
+    def reconnect(self):
+        """
+        Drop the current connection. The monitor thread reconnects and subscribes the notifications again.
+        """
+        self.run = False
+
     def stop_scraping(self):
         self.run = False
         self.should_be_scraping = False
@@ -259,24 +259,6 @@ class Jkbms_pb(Battery):
     def get_balancing(self):
         return 1 if self.balancing else 0
 
-    def get_min_cell(self):
-        min_voltage = 9999
-        min_cell = None
-        for c in range(min(len(self.cells), self.cell_count)):
-            if self.cells[c].voltage is not None and min_voltage > self.cells[c].voltage:
-                min_voltage = self.cells[c].voltage
-                min_cell = c
-        return min_cell
-
-    def get_max_cell(self):
-        max_voltage = 0
-        max_cell = None
-        for c in range(min(len(self.cells), self.cell_count)):
-            if self.cells[c].voltage is not None and max_voltage < self.cells[c].voltage:
-                max_voltage = self.cells[c].voltage
-                max_cell = c
-        return max_cell
-
     def to_protection_bits(self, byte_data):
         """
         Bit 0x00000001: Wire resistance alarm: 1 warning only, 0 nomal -> OK
@@ -3,7 +3,7 @@
 # Notes
 # Updated by https://github.com/idstein
 
-from battery import Protection, Battery, Cell
+from battery import Protection, Battery, Cell, RefreshScheduler
 from utils import (
     bytearray_to_string,
     is_bit_set,
@@ -255,6 +255,13 @@ class LltJbd(Battery):
             "turn_balancing_off_callback",
         ]
         self.history.exclude_values_to_calculate = ["charge_cycles"]
+        # the general data contains voltage, current, SoC, FETs, temperatures and balancing
+        self.refresh_scheduler = RefreshScheduler(
+            {
+                "gen": RefreshScheduler.FAST,
+                "cells": RefreshScheduler.MEDIUM,
+            }
+        )
 
     BATTERYTYPE = "LLT/JBD"
     LENGTH_CHECK = 6
@@ -459,7 +466,8 @@ class LltJbd(Battery):
     def refresh_data(self):
         self.write_charge_discharge_mos()
         self.write_balancer()
-        return self.read_gen_data() and self.read_cell_data()
+        self.refresh_scheduler.start_cycle()
+        return self.refresh_scheduler.run("gen", self.read_gen_data) and self.refresh_scheduler.run("cells", self.read_cell_data)
 
     def to_protection_bits(self, byte_data):
         tmp = bin(byte_data)[2:].rjust(13, ZERO_CHAR)
@@ -16,6 +16,7 @@ from typing import Union, Optional
 from utils import logger
 from bleak import BleakClient, BleakScanner, BLEDevice
 from bleak.exc import BleakDBusError
+from utils_ble import BleReconnectManager
 from bms.lltjbd import LltJbdProtection, LltJbd
 
 BLE_SERVICE_UUID = "0000ff00-0000-1000-8000-00805f9b34fb"
@@ -43,6 +44,10 @@ class LltJbd_Ble(LltJbd):
         self.device: Optional[BLEDevice] = None
         self.response_queue: Optional[asyncio.Queue] = None
         self.ready_event: Optional[asyncio.Event] = None
+        # set to drop the connection, the background loop reconnects and subscribes again
+        self.reconnect_requested = False
+        self.adapter_missing = False
+        self.reconnect_manager = BleReconnectManager(self.BATTERYTYPE + " " + address, self.reset_bluetooth)
 
         self.hci_uart_ok = True
         if not os.path.isfile("/tmp/dbus-blebattery-hciattach"):
@@ -78,17 +83,15 @@ class LltJbd_Ble(LltJbd):
             file = exception_traceback.tb_frame.f_code.co_filename
             line = exception_traceback.tb_lineno
             if "Bluetooth adapters" in repr(exception_object):
-                self.reset_hci_uart()
-            else:
-                logger.error(f"BleakScanner(): Exception occurred: {repr(exception_object)} of type {exception_type} " f"in {file} line #{line}")
+                # no adapter available, reconnecting will not help. The reconnect manager resets the hci_uart stack
+                # after the configured failed reconnects
+                self.adapter_missing = True
+            logger.error(f"BleakScanner(): Exception occurred: {repr(exception_object)} of type {exception_type} " f"in {file} line #{line}")
 
             self.device = None
-            await asyncio.sleep(0.5)
-            # allow the bluetooth connection to recover
-            sleep(5)
 
         if not self.device:
-            self.run = False
+            self.reconnect_manager.connection_lost()
             return
 
         try:
@@ -96,10 +99,11 @@ class LltJbd_Ble(LltJbd):
                 self.bt_client = client
                 self.bt_loop = asyncio.get_event_loop()
                 self.response_queue = asyncio.Queue()
+                self.reconnect_requested = False
+                self.adapter_missing = False
                 self.ready_event.set()
-                while self.run and client.is_connected and self.main_thread.is_alive():
+                while self.run and client.is_connected and not self.reconnect_requested and self.main_thread.is_alive():
                     await asyncio.sleep(0.1)
-            self.bt_loop = None
 
         # Exception occurred: TimeoutError() of type <class 'asyncio.exceptions.TimeoutError'>
         except asyncio.exceptions.TimeoutError:
@@ -107,31 +111,28 @@ class LltJbd_Ble(LltJbd):
             file = exception_traceback.tb_frame.f_code.co_filename
             line = exception_traceback.tb_lineno
             logger.error(f"BleakClient(): asyncio.exceptions.TimeoutError: {repr(exception_object)} of type {exception_type} " f"in {file} line #{line}")
-            # needed?
-            self.run = False
-            return
 
         except TimeoutError:
             exception_type, exception_object, exception_traceback = sys.exc_info()
             file = exception_traceback.tb_frame.f_code.co_filename
             line = exception_traceback.tb_lineno
             logger.error(f"BleakClient(): TimeoutError: {repr(exception_object)} of type {exception_type} " f"in {file} line #{line}")
-            # needed?
-            self.run = False
-            return
 
         except Exception:
             exception_type, exception_object, exception_traceback = sys.exc_info()
             file = exception_traceback.tb_frame.f_code.co_filename
             line = exception_traceback.tb_lineno
             logger.error(f"BleakClient(): Exception occurred: {repr(exception_object)} of type {exception_type} " f"in {file} line #{line}")
-            # needed?
-            self.run = False
-            return
+
+        self.bt_loop = None
+        self.bt_client = None
+        self.reconnect_manager.connection_lost()
 
     def background_loop(self):
         while self.run and self.main_thread.is_alive():
             asyncio.run(self.bt_main_loop())
+            if self.run and self.main_thread.is_alive():
+                self.reconnect_manager.wait_for_reconnect()
 
     async def async_test_connection(self):
         if self.hci_uart_ok:
@@ -217,6 +218,8 @@ class LltJbd_Ble(LltJbd):
             try:
                 bt_task = asyncio.run_coroutine_threadsafe(self.send_command(command), self.bt_loop)
                 result = await asyncio.wait_for(asyncio.wrap_future(bt_task), 20)
+                if result:
+                    self.reconnect_manager.data_received()
                 return result
             except asyncio.TimeoutError:
                 logger.error(">>> ERROR: No reply - returning")
@@ -226,14 +229,16 @@ class LltJbd_Ble(LltJbd):
                 file = exception_traceback.tb_frame.f_code.co_filename
                 line = exception_traceback.tb_lineno
                 logger.error(f"BleakDBusError: {repr(exception_object)} of type {exception_type} in {file} line #{line}")
-                self.reset_bluetooth()
+                # drop the connection and let the background loop reconnect
+                self.reconnect_requested = True
                 return False
             except Exception:
                 exception_type, exception_object, exception_traceback = sys.exc_info()
                 file = exception_traceback.tb_frame.f_code.co_filename
                 line = exception_traceback.tb_lineno
                 logger.error(f"Exception occurred: {repr(exception_object)} of type {exception_type} in {file} line #{line}")
-                self.reset_bluetooth()
+                # drop the connection and let the background loop reconnect
+                self.reconnect_requested = True
                 return False
         else:
             return False
@@ -260,6 +265,10 @@ class LltJbd_Ble(LltJbd):
             return False
 
     def reset_bluetooth(self):
+        if self.adapter_missing:
+            self.reset_hci_uart()
+            return
+
         logger.error("Reset of system Bluetooth daemon triggered")
         self.bt_loop = False
 
@@ -273,7 +282,6 @@ class LltJbd_Ble(LltJbd):
         os.system("/etc/init.d/bluetooth start")
         logger.error("System Bluetooth daemon should have been restarted")
         sleep(5)
-        sys.exit(1)
 
     def reset_hci_uart(self):
         logger.error("Reset of hci_uart stack... Reconnecting to: " + self.address)
@@ -3,7 +3,7 @@
 # Notes
 # Added by https://github.com/KoljaWindeler
 
-from battery import Battery, Cell
+from battery import Battery, Cell, RefreshScheduler
 from utils import read_serial_data, logger
 import sys
 
@@ -17,6 +17,15 @@ class Pace(Battery):
         self.address = address
         self.poll_interval = 5000
         self.cell_voltage_lp = 0.9
+        # the cells store the voltage in mV, keep the filter state in full resolution
+        self.cell_voltages_lp = []
+        # the status frame contains all measurements, the fuses frame only the warnings and alarms
+        self.refresh_scheduler = RefreshScheduler(
+            {
+                "fuses": RefreshScheduler.MEDIUM,
+                "status": RefreshScheduler.FAST,
+            }
+        )
 
     BATTERYTYPE = "PACE RS232"
     LENGTH_CHECK = 0  # ignored
@@ -120,8 +129,9 @@ class Pace(Battery):
         # This will be called for every iteration (1 second)
         # Return True if success, False for failure
         try:
-            result = self.read_fuses_data()
-            result = result and self.read_status_data()
+            self.refresh_scheduler.start_cycle()
+            result = self.refresh_scheduler.run("fuses", self.read_fuses_data)
+            result = result and self.refresh_scheduler.run("status", self.read_status_data)
             return result
         except Exception:
             return False
@@ -346,15 +356,19 @@ class Pace(Battery):
         self.cell_count = int(status_data[17:19], 16)
         logger.debug("Cellcount: " + str(self.cell_count))
 
+        if len(self.cell_voltages_lp) < self.cell_count:
+            self.cell_voltages_lp += [None] * (self.cell_count - len(self.cell_voltages_lp))
+
         for i in range(0, self.cell_count):
             n_v = int(status_data[19 + i * 4 : 19 + i * 4 + 4], 16) / 1000
-            if self.cells[i].voltage is None or self.cells[i].voltage == 0:
-                self.cells[i].voltage = n_v
-                logger.debug("NOT low passing " + str(self.cells[i].voltage))
+            if self.cells[i].voltage is None or self.cells[i].voltage == 0 or self.cell_voltages_lp[i] is None:
+                self.cell_voltages_lp[i] = n_v
+                logger.debug("NOT low passing " + str(n_v))
             else:
-                self.cells[i].voltage = self.cell_voltage_lp * self.cells[i].voltage
-                self.cells[i].voltage += (1.0 - self.cell_voltage_lp) * n_v
-                logger.debug("low passing " + str(n_v) + " to " + str(self.cells[i].voltage))
+                self.cell_voltages_lp[i] = self.cell_voltage_lp * self.cell_voltages_lp[i]
+                self.cell_voltages_lp[i] += (1.0 - self.cell_voltage_lp) * n_v
+                logger.debug("low passing " + str(n_v) + " to " + str(self.cell_voltages_lp[i]))
+            self.cells[i].voltage = self.cell_voltages_lp[i]
             logger.debug("Cell Voltage [" + str(i) + "]: " + str(self.cells[i].voltage))
 
         temperature_sensor_count = int(status_data[83:85], 16)
@@ -408,24 +422,6 @@ class Pace(Battery):
         """
         return self.unique_identifier_tmp
 
-    def get_min_cell(self):
-        min_voltage = 9999
-        min_cell = None
-        for c in range(min(len(self.cells), self.cell_count)):
-            if self.cells[c].voltage is not None and min_voltage > self.cells[c].voltage:
-                min_voltage = self.cells[c].voltage
-                min_cell = c
-        return min_cell
-
-    def get_max_cell(self):
-        max_voltage = 0
-        max_cell = None
-        for c in range(min(len(self.cells), self.cell_count)):
-            if self.cells[c].voltage is not None and max_voltage < self.cells[c].voltage:
-                max_voltage = self.cells[c].voltage
-                max_cell = c
-        return max_cell
-
     def read_serial_data_pace(self, command: str, length: int) -> bool:
         """
         use the read_serial_data() function to read the data and then do BMS specific checks (crc, start bytes, etc)
@@ -4,7 +4,7 @@
 # Added by https://github.com/wollew
 # https://github.com/Louisvdw/dbus-serialbattery/pull/530
 
-from battery import Protection, Battery, Cell
+from battery import Protection, Battery, Cell, RefreshScheduler
 from utils import logger
 import serial
 import sys
@@ -17,6 +17,13 @@ class Seplos(Battery):
         self.type = self.BATTERYTYPE
         self.poll_interval = 5000
         self.history.exclude_values_to_calculate = ["charge_cycles"]
+        # the status frame contains all measurements, the alarm frame only the warnings and alarms
+        self.refresh_scheduler = RefreshScheduler(
+            {
+                "status": RefreshScheduler.FAST,
+                "alarm": RefreshScheduler.MEDIUM,
+            }
+        )
 
     BATTERYTYPE = "Seplos"
 
@@ -144,8 +151,9 @@ class Seplos(Battery):
         # call all functions that will refresh the battery data.
         # This will be called for every iteration (self.poll_interval)
         # Return True if success, False for failure
-        result_status = self.read_status_data()
-        result_alarm = self.read_alarm_data()
+        self.refresh_scheduler.start_cycle()
+        result_status = self.refresh_scheduler.run("status", self.read_status_data)
+        result_alarm = self.refresh_scheduler.run("alarm", self.read_alarm_data)
 
         return result_status and result_alarm
 
@@ -4,8 +4,10 @@ import math
 import os
 import signal
 import sys
-from datetime import datetime
-from time import sleep
+import threading
+import traceback
+from collections import deque
+from time import monotonic, sleep
 from typing import Union
 
 from dbus.mainloop.glib import DBusGMainLoop
@@ -23,80 +25,405 @@ from utils import (
     EXTERNAL_SENSOR_DBUS_PATH_SOC,
     logger,
     BATTERY_ADDRESSES,
+    MEMORY_WATCHDOG_ENABLE,
+    CALLBACK_MIN_PUBLISH_INTERVAL,
     POLL_INTERVAL,
+    POLL_INTERVAL_ADAPTIVE,
+    POLL_INTERVAL_CURRENT_CHANGE,
+    POLL_INTERVAL_IDLE_CURRENT,
+    POLL_INTERVAL_MAX,
+    POLL_IN_WORKER_THREAD,
+    SUPERVISOR_PORTS,
+    SUPERVISOR_PROCESS_WORKERS,
     validate_config_values,
 )
-
-# import battery classes
-# TODO: import only the classes that are needed
-from bms.daly import Daly
-from bms.daren_485 import Daren485
-from bms.ecs import Ecs
-from bms.eg4_lifepower import EG4_Lifepower
-from bms.eg4_ll import EG4_LL
-from bms.felicity import Felicity
-from bms.heltecmodbus import HeltecModbus
-from bms.hlpdatabms4s import HLPdataBMS4S
-from bms.jkbms import Jkbms
-from bms.jkbms_pb import Jkbms_pb
-from bms.lltjbd import LltJbd
-from bms.pace import Pace
-from bms.renogy import Renogy
-from bms.seplos import Seplos
-from bms.seplosv3 import Seplosv3
+from utils_bms import get_bms_class, get_bms_type, get_expected_bms_types, get_supported_bms_types
+from utils_memory import MemoryWatchdog
+from utils_profiler import Profiler
+from utils_worker import PortWorker, WorkerBattery
 
 # add ext folder to sys.path
 sys.path.insert(1, os.path.join(os.path.dirname(__file__), "ext"))
 
-# enabled only if explicitly set in config under "BMS_TYPE"
-if "ANT" in BMS_TYPE:
-    from bms.ant import ANT
-if "MNB" in BMS_TYPE:
-    from bms.mnb import MNB
-if "Sinowealth" in BMS_TYPE:
-    from bms.sinowealth import Sinowealth
-
-supported_bms_types = [
-    {"bms": Daly, "baud": 9600, "address": b"\x40"},
-    {"bms": Daly, "baud": 9600, "address": b"\x80"},
-    {"bms": Daren485, "baud": 19200, "address": b"\x01"},
-    {"bms": Ecs, "baud": 19200},
-    {"bms": EG4_Lifepower, "baud": 9600, "address": b"\x01"},
-    {"bms": EG4_LL, "baud": 9600, "address": b"\x01"},
-    {"bms": Felicity, "baud": 9600, "address": b"\x01"},
-    {"bms": HeltecModbus, "baud": 9600, "address": b"\x01"},
-    {"bms": HLPdataBMS4S, "baud": 9600},
-    {"bms": Jkbms, "baud": 115200},
-    {"bms": Jkbms_pb, "baud": 115200, "address": b"\x01"},
-    {"bms": LltJbd, "baud": 9600, "address": b"\x00"},
-    {"bms": Pace, "baud": 9600, "address": b"\x00"},
-    {"bms": Renogy, "baud": 9600, "address": b"\x30"},
-    {"bms": Renogy, "baud": 9600, "address": b"\xF7"},
-    {"bms": Seplos, "baud": 19200, "address": b"\x00"},
-    {"bms": Seplosv3, "baud": 19200},
-]
-
-# enabled only if explicitly set in config under "BMS_TYPE"
-if "ANT" in BMS_TYPE:
-    supported_bms_types.append({"bms": ANT, "baud": 19200})
-if "MNB" in BMS_TYPE:
-    supported_bms_types.append({"bms": MNB, "baud": 9600})
-if "Sinowealth" in BMS_TYPE:
-    supported_bms_types.append({"bms": Sinowealth, "baud": 9600})
-
-expected_bms_types = [battery_type for battery_type in supported_bms_types if battery_type["bms"].__name__ in BMS_TYPE or len(BMS_TYPE) == 0]
+# the battery classes are imported only when they are tested, see utils_bms
+supported_bms_types = get_supported_bms_types("serial")
+
+expected_bms_types = get_expected_bms_types(supported_bms_types)
 
 logger.info("")
 logger.info("Starting dbus-serialbattery")
 
 
-# count loops
-count_for_loops = 5
-delayed_loop_count = 0
+# coalesce callback driven publishes
+callback_idle_pending = False
+callback_publish_timer = None
+callback_publish_last = 0
+callback_state_last = None
+
+
+class RefreshWorker(threading.Thread):
+    """
+    Reads a single battery in its own thread, so that the main loop is not blocked while it waits for the BMS.
+
+    The battery data is handed over between the threads: While the worker reads the BMS, the main loop does not
+    use the battery data and answers dbus requests with the last published values. After a complete read, the result
+    is passed to the main loop, which calculates and publishes the values, before it requests the next read.
+    Callbacks that write to the BMS, e.g. from the GUI, are queued by the DbusHelper and run by the worker right before
+    the next requested read, while it owns the battery data.
+
+    :param helper: The DbusHelper of the battery
+    :param on_refreshed: Called in the main loop with the result of the read, its start, its durations and if an exception occurred
+    """
+
+    def __init__(self, helper: DbusHelper, on_refreshed):
+        super().__init__(name=f"RefreshWorker-{helper.battery.port}-{helper.battery.address}", daemon=True)
+        self.helper: DbusHelper = helper
+        self.on_refreshed = on_refreshed
+        self.requested: threading.Event = threading.Event()
+        self.callbacks: deque = deque()
+        """
+        Queued callbacks with path, value and the value before the write
+        """
+        helper.queue_callback = self.queue_callback
+
+    def request(self) -> None:
+        """
+        Request the next read.
+
+        :return: None
+        """
+        self.requested.set()
+
+    def queue_callback(self, callback, path: str, value, previous_value) -> None:
+        """
+        Queue a callback that writes to the BMS, it is run before the next read. Called in the main loop.
+
+        :param callback: The callback with the arguments path and value
+        :param path: The dbus path
+        :param value: The new value
+        :param previous_value: The value before the write, restored if the callback fails
+        :return: None
+        """
+        self.callbacks.append((callback, path, value, previous_value))
+
+    def run_callbacks(self) -> None:
+        """
+        Run the queued callbacks and let the main loop restore the value of the failed ones.
+
+        :return: None
+        """
+        while self.callbacks:
+            callback, path, value, previous_value = self.callbacks.popleft()
+            try:
+                with self.helper.battery.refresh_lock:
+                    result = callback(path, value)
+            except Exception:
+                traceback.print_exc()
+                result = False
+
+            if not result:
+                gobject.idle_add(self.helper.callback_rejected, path, previous_value)
+
+    def run(self) -> None:
+        """
+        Run the queued callbacks and read the battery whenever requested and pass the result to the main loop.
+
+        :return: None
+        """
+        while True:
+            self.requested.wait()
+            self.requested.clear()
+
+            start = monotonic()
+            timings = None
+            try:
+                # the main loop does not use the battery data until the result is passed back
+                self.run_callbacks()
+                result, timings = self.helper.refresh_battery()
+                error = False
+            except Exception:
+                traceback.print_exc()
+                result = False
+                error = True
+
+            gobject.idle_add(self.on_refreshed, result, start, timings, error)
+
+
+class PollTimer:
+    """
+    Polls a single battery with its own timer.
+
+    The next poll is scheduled from a monotonic deadline, so that the interval does not drift by the poll duration.
+    With `POLL_IN_WORKER_THREAD` or in supervisor mode the BMS is read by a `RefreshWorker` and the next poll is scheduled, after
+    the main loop processed the read data.
+    After every poll the interval is adapted and stored in `battery.poll_interval`:
+        - If polling takes longer than the interval for `SLOW_CYCLES` cycles, the interval is increased to the poll
+          duration. It is decreased again, when polling was fast enough for `FAST_CYCLES` cycles.
+        - With `POLL_INTERVAL_ADAPTIVE` the interval is increased step by step up to `POLL_INTERVAL_MAX`,
+          while the battery is idle, and reset to the shortest interval, when the current changes quickly.
+
+    In supervisor mode a battery that failed completely does not quit the main loop. Instead polling is paused and the battery
+    is re-detected on its port, see `failed()`.
+
+    :param battery: The battery to poll
+    :param helper: The DbusHelper of the battery
+    :param loop: The main loop of the driver
+    :param use_worker: Read the BMS in a `RefreshWorker`
+    """
+
+    REDETECT_INTERVAL = 60
+    """
+    Seconds between the attempts to re-detect a failed battery
+    """
+
+    SLOW_CYCLES = 5
+    """
+    Number of too slow polls, after which the interval is increased
+    """
+
+    FAST_CYCLES = 30
+    """
+    Number of fast enough polls, after which an increased interval is decreased again
+    """
+
+    def __init__(self, battery: Battery, helper: DbusHelper, loop, use_worker: bool = False):
+        self.battery: Battery = battery
+        self.helper: DbusHelper = helper
+        self.loop = loop
+
+        self.interval_min: float = battery.poll_interval
+        """
+        Shortest poll interval in milliseconds, the BMS default value or `POLL_INTERVAL`
+        """
+
+        self.interval_activity: float = self.interval_min
+        """
+        Poll interval in milliseconds based on the activity of the battery
+        """
+
+        self.interval_runtime: float = 0
+        """
+        Poll interval in milliseconds based on the poll duration, 0 if polling is fast enough
+        """
+
+        self.deadline: float = None
+        self.slow_count: int = 0
+        self.fast_count: int = 0
+        self.fast_runtime_max: float = 0
+        self.current_last: float = None
+
+        self.worker: RefreshWorker = RefreshWorker(helper, self.refreshed) if use_worker else None
+        """
+        Reads the BMS in its own thread, None if the BMS is read in the main loop
+        """
+
+        self.redetecting: bool = False
+        """
+        Polling is paused, while the failed battery is re-detected
+        """
+
+    def start(self) -> None:
+        """
+        Schedule the first poll.
+
+        :return: None
+        """
+        if self.worker is not None:
+            self.worker.start()
+
+        self.deadline = monotonic() + self.battery.poll_interval / 1000
+        self.schedule()
+
+    def schedule(self) -> None:
+        """
+        Schedule the next poll at the deadline.
+
+        :return: None
+        """
+        gobject.timeout_add(max(int((self.deadline - monotonic()) * 1000), 0), self.poll)
+
+    def poll(self) -> bool:
+        """
+        Poll the battery, adapt the interval and schedule the next poll.
+        With a worker thread only the read is requested, the rest is done in `refreshed()`.
+
+        :return: Always returns False, since the next poll is scheduled with a new timer
+        """
+        if self.worker is not None:
+            # the next poll is scheduled, when the read data was processed
+            self.worker.request()
+            return False
+
+        start = monotonic()
+        self.helper.publish_battery(self.loop)
+        self.finish(start)
+
+        return False
+
+    def refreshed(self, result: bool, start: float, timings: dict, error: bool) -> bool:
+        """
+        Process the data read by the worker thread and schedule the next poll.
+
+        :param result: The result of the read
+        :param start: Monotonic timestamp of when the read started
+        :param timings: The durations of the read, see `DbusHelper.refresh_battery()`
+        :param error: If an exception occurred while reading
+        :return: Always returns False, to run only once
+        """
+        if error:
+            self.helper.battery_failed(self.loop)
+        else:
+            self.helper.process_battery(self.loop, result, start, timings)
+
+        self.finish(start)
+
+        return False
+
+    def finish(self, start: float) -> None:
+        """
+        Adapt the interval to the duration of the poll and schedule the next poll.
+
+        :param start: Monotonic timestamp of when the poll started
+        :return: None
+        """
+        runtime = monotonic() - start
+        logger.debug(f"Polling data took {runtime:.3f} seconds")
+
+        self.adapt_to_runtime(runtime)
+        if POLL_INTERVAL_ADAPTIVE:
+            self.adapt_to_activity()
+        self.battery.poll_interval = max(self.interval_activity, self.interval_runtime)
+
+        self.deadline += self.battery.poll_interval / 1000
+        # if the poll took longer than the interval, continue from now instead of catching up
+        if self.deadline < monotonic():
+            self.deadline = monotonic() + self.battery.poll_interval / 1000
+
+        # polling is resumed by resume(), when the failed battery was found again
+        if not self.redetecting:
+            self.schedule()
+
+    def failed(self) -> None:
+        """
+        Called by the DbusHelper in supervisor mode instead of quitting the main loop, when the battery failed completely.
+        Pauses polling and re-detects the battery on its port in its own thread, so that the other batteries keep running.
+        A `WorkerBattery` is polled further, since its worker process is restarted by `PortWorker.check()`.
+
+        :return: None
+        """
+        if self.redetecting or isinstance(self.battery, WorkerBattery):
+            return
+
+        logger.error(f"ERROR >>> Battery at {self.battery.port} failed, re-detecting it every {self.REDETECT_INTERVAL} s")
+        self.redetecting = True
+        threading.Thread(target=self.redetect, name=f"Redetect-{self.battery.port}-{self.battery.address}", daemon=True).start()
+
+    def redetect(self) -> None:
+        """
+        Test the connection of the failed battery until it responds again and resume polling. Runs in its own thread,
+        since the test waits for the timeouts of the BMS. While polling is paused, the main loop does not use the battery data.
+
+        :return: None
+        """
+        while True:
+            sleep(self.REDETECT_INTERVAL)
+
+            try:
+                with self.battery.refresh_lock:
+                    found = self.battery.run_test_connection()
+            except Exception:
+                traceback.print_exc()
+                found = False
+
+            if found:
+                logger.info(f"-- Connection re-established to {self.battery.__class__.__name__} at {self.battery.port}")
+                gobject.idle_add(self.resume)
+                return
+
+    def resume(self) -> bool:
+        """
+        Resume polling after the failed battery was found again. Called in the main loop.
+
+        :return: Always returns False, to run only once
+        """
+        self.redetecting = False
+        self.deadline = monotonic()
+        self.schedule()
+
+        return False
+
+    def adapt_to_runtime(self, runtime: float) -> None:
+        """
+        Increase the interval, if polling takes too long, and decrease it again, if polling is fast enough.
+        The first polls are always slower, therefore the interval is only changed after `SLOW_CYCLES` cycles.
+
+        :param runtime: The duration of the last poll in seconds
+        """
+        if runtime * 1000 > self.battery.poll_interval:
+            self.fast_count = 0
+            self.fast_runtime_max = 0
+            self.slow_count += 1
+            if self.slow_count > 1:
+                logger.warning(
+                    f"Polling data took {runtime:.3f} seconds. Automatically increase interval in {self.SLOW_CYCLES - self.slow_count} cycles."
+                )
+
+            if self.slow_count >= self.SLOW_CYCLES:
+                # round up to the next half second and limit to 60 seconds
+                self.interval_runtime = min(math.ceil((runtime + 0.05) * 2) / 2 * 1000, 60000)
+                logger.warning(f"Polling took too long for the last {self.SLOW_CYCLES} cycles. Set to {self.interval_runtime/1000:.3f} s")
+                self.slow_count = 0
+
+        else:
+            self.slow_count = 0
+            if self.interval_runtime > 0:
+                self.fast_count += 1
+                self.fast_runtime_max = max(self.fast_runtime_max, runtime)
+
+                if self.fast_count >= self.FAST_CYCLES:
+                    interval = math.ceil((self.fast_runtime_max + 0.05) * 2) / 2 * 1000
+                    if interval < self.interval_runtime:
+                        self.interval_runtime = interval if interval > self.interval_min else 0
+                        logger.info(f"Polling is fast enough again. Set to {max(self.interval_runtime, self.interval_min)/1000:.3f} s")
+                    self.fast_count = 0
+                    self.fast_runtime_max = 0
+
+    def adapt_to_activity(self) -> None:
+        """
+        Increase the interval step by step, while the battery is idle, and reset it, when the current changes quickly.
+
+        :return: None
+        """
+        current = self.battery.current_calc
+
+        if current is None or (self.current_last is not None and abs(current - self.current_last) >= POLL_INTERVAL_CURRENT_CHANGE):
+            self.interval_activity = self.interval_min
+        elif abs(current) < POLL_INTERVAL_IDLE_CURRENT:
+            self.interval_activity = max(min(self.interval_activity * 1.5, POLL_INTERVAL_MAX), self.interval_min)
+        else:
+            self.interval_activity = max(self.interval_activity / 2, self.interval_min)
+
+        self.current_last = current
 
 
 def main():
-    global expected_bms_types, supported_bms_types
+    # Batteries and DbusHelper instances by port and address, also used by exit_driver to save the pending battery state
+    battery = {}
+    helper = {}
+
+    # CanReceiverThread instances of the CAN ports, stopped by exit_driver
+    can_threads = []
+
+    # PortWorker instances of the serial ports read in their own process, stopped by exit_driver
+    port_workers = []
+
+    # in supervisor mode one process hosts the batteries of all ports in SUPERVISOR_PORTS
+    supervisor = len(sys.argv) > 1 and sys.argv[1] == "--supervisor"
+
+    # (port, Bluetooth address) of the SUPERVISOR_PORTS, e.g. "Jkbms_Ble:C8:47:8C:12:34:56" is ("Jkbms_Ble", "C8:47:8C:12:34:56")
+    supervisor_ports = [
+        (entry.split(":", 1)[0], entry.split(":", 1)[1]) if entry.split(":", 1)[0].endswith("_Ble") else (entry, None) for entry in SUPERVISOR_PORTS
+    ]
 
     def exit_driver(sig, frame, code: int = 0) -> None:
         """
@@ -107,27 +434,35 @@ def main():
         """
         logger.info("Exit signal received, exiting gracefully...")
 
-        port = get_port()
+        # Save the pending battery state to dbus
+        for key_address in helper:
+            if helper[key_address].settings_store is not None:
+                helper[key_address].save_current_battery_state()
+                helper[key_address].flush_battery_state()
+
+        # Write the running profile
+        Profiler.get_instance().stop()
 
         # Stop the main loop, if set
         if "mainloop" in globals() and mainloop is not None:
             mainloop.quit()
 
-        # For BLE connections, disconnect from the BLE device
-        if port.endswith("_Ble"):
-            if battery and len(battery) > 0 and hasattr(battery[0], "disconnect") and callable(battery[0].disconnect):
-                battery[0].disconnect()
+        # For BLE connections, disconnect from the BLE device, which are keyed by (BMS type, Bluetooth address)
+        for key_address in battery:
+            if key_address[0].endswith("_Ble") and hasattr(battery[key_address], "disconnect") and callable(battery[key_address].disconnect):
+                battery[key_address].disconnect()
 
-        # Stop the CanReceiverThread
-        elif port.startswith(("can", "vecan", "vcan")):
-            if "can_thread" in globals() and can_thread is not None:
-                can_thread.stop()
+        # Stop the CanReceiverThreads
+        for can_thread in can_threads:
+            can_thread.stop()
+
+        # Stop the worker processes and free their shared memory
+        for port_worker in port_workers:
+            port_worker.stop()
 
         # Close the serial connection
-        else:
-            # Currently not feasible to close the serial connection
-            # TODO: Is it worth implementing this?
-            pass
+        # Currently not feasible to close the serial connection
+        # TODO: Is it worth implementing this?
 
         logger.info(f"Stopped dbus-serialbattery with exit code {code}")
         sys.exit(code)
@@ -136,55 +471,95 @@ def main():
     signal.signal(signal.SIGINT, exit_driver)
     signal.signal(signal.SIGTERM, exit_driver)
 
+    # Start/stop the CPU profiler, e.g. with "kill -USR1 <pid>"
+    signal.signal(signal.SIGUSR1, Profiler.get_instance().signal_handler)
+
     def poll_battery(loop) -> bool:
         """
-        Polls the battery for data and updates it on the dbus.
+        Updates the data of all batteries on the dbus.
         Calls `publish_battery` from DbusHelper for each battery instance.
+        Used for batteries that provide value updates on their own, all other batteries are polled by a `PollTimer`.
 
         :param loop: The main event loop
         :return: Always returns True
         """
-        global count_for_loops, delayed_loop_count
-
-        # count execution time in milliseconds
-        start = datetime.now()
+        start = monotonic()
 
         for key_address in battery:
             helper[key_address].publish_battery(loop)
 
-        runtime = (datetime.now() - start).total_seconds()
-        logger.debug(f"Polling data took {runtime:.3f} seconds")
+        logger.debug(f"Publishing data took {monotonic() - start:.3f} seconds")
 
-        # check if polling took too long and adjust poll interval, but only after 5 loops
-        # since the first polls are always slower
-        if runtime > battery[first_key].poll_interval / 1000:
-            delayed_loop_count += 1
-            if delayed_loop_count > 1:
-                logger.warning(f"Polling data took {runtime:.3f} seconds. Automatically increase interval in {count_for_loops - delayed_loop_count} cycles.")
-        else:
-            delayed_loop_count = 0
+        return True
+
+    def poll_battery_callback() -> None:
+        """
+        Called by batteries that provide value updates on their own for every complete frame.
+        Since this runs in the thread of the battery, the data is handed over to the main loop,
+        where bursts of updates are merged by `coalesce_poll_battery`.
+
+        :return: None
+        """
+        global callback_idle_pending
 
-        if delayed_loop_count >= count_for_loops:
-            # round up to the next half second
-            new_poll_interval = math.ceil((runtime + 0.05) * 2) / 2 * 1000
+        # one pending idle call is enough, since it reads the latest data
+        if not callback_idle_pending:
+            callback_idle_pending = True
+            gobject.idle_add(coalesce_poll_battery)
 
-            # limit max poll interval to 60 seconds
-            if new_poll_interval > 60000:
-                new_poll_interval = 60000
+    def coalesce_poll_battery() -> bool:
+        """
+        Publishes the latest battery data at most every `CALLBACK_MIN_PUBLISH_INTERVAL` seconds.
+        A change of the FET or alarm states is published immediately.
 
-            battery[first_key].poll_interval = new_poll_interval
-            logger.warning(f"Polling took too long for the last {count_for_loops} cycles. Set to {new_poll_interval/1000:.3f} s")
+        :return: Always returns False to remove the idle source
+        """
+        global callback_idle_pending, callback_publish_timer
+
+        callback_idle_pending = False
+
+        since_last_publish = monotonic() - callback_publish_last
+        if since_last_publish >= CALLBACK_MIN_PUBLISH_INTERVAL or battery[first_key].get_fet_and_alarm_state() != callback_state_last:
+            if callback_publish_timer is not None:
+                gobject.source_remove(callback_publish_timer)
+                callback_publish_timer = None
+            publish_callback_data()
+        elif callback_publish_timer is None:
+            # publish the freshest data at the end of the interval
+            callback_publish_timer = gobject.timeout_add(
+                int((CALLBACK_MIN_PUBLISH_INTERVAL - since_last_publish) * 1000),
+                publish_callback_data,
+                True,
+            )
 
-            delayed_loop_count = 0
+        return False
 
-        return True
+    def publish_callback_data(from_timer: bool = False) -> bool:
+        """
+        Publishes the latest battery data received by callback.
 
-    def get_battery(_port: str, _bus_address: hex = None, can_transport_interface: object = None) -> Union[Battery, None]:
+        :param from_timer: True if called by the timer of `coalesce_poll_battery`
+        :return: Always returns False to remove the timer source
+        """
+        global callback_publish_timer, callback_publish_last, callback_state_last
+
+        if from_timer:
+            callback_publish_timer = None
+
+        callback_publish_last = monotonic()
+        callback_state_last = battery[first_key].get_fet_and_alarm_state()
+        poll_battery(mainloop)
+
+        return False
+
+    def get_battery(_port: str, _bus_address: hex = None, can_transport_interface: object = None, bms_types: list = None) -> Union[Battery, None]:
         """
         Attempts to establish a connection to the battery and returns the battery object if successful.
 
         :param _port: The port to connect to.
         :param _bus_address: The Modbus/CAN address to connect to (optional).
+        :param can_transport_interface: The access object for the CAN interface (optional).
+        :param bms_types: The BMS types to test, `expected_bms_types` if not set.
         :return: The battery object if a connection is established, otherwise None.
         """
         # Try to establish communications with the battery 3 times, else exit
@@ -193,7 +568,7 @@ def main():
         while retry <= retries:
             logger.info("-- Testing BMS: " + str(retry) + " of " + str(retries) + " rounds")
             # Create a new battery object that can read the battery and run connection test
-            for test in expected_bms_types:
+            for test in bms_types if bms_types is not None else expected_bms_types:
                 # noinspection PyBroadException
                 try:
                     if _bus_address is not None:
@@ -204,14 +579,12 @@ def main():
                     else:
                         _bms_address = None
 
-                    logger.info(
-                        "Testing " + test["bms"].__name__ + (' at address "' + bytearray_to_string(_bms_address) + '"' if _bms_address is not None else "")
-                    )
-                    batteryClass = test["bms"]
+                    logger.info("Testing " + test["bms"] + (' at address "' + bytearray_to_string(_bms_address) + '"' if _bms_address is not None else ""))
+                    batteryClass = get_bms_class(test)
                     baud = test["baud"] if "baud" in test else None
                     battery: Battery = batteryClass(port=_port, baud=baud, address=_bms_address)
                     battery.set_can_transport_interface(can_transport_interface)
-                    if battery.test_connection() and battery.validate_data():
+                    if battery.run_test_connection() and battery.validate_data():
                         logger.info("-- Connection established to " + battery.__class__.__name__)
                         return battery
                 except KeyboardInterrupt:
@@ -240,7 +613,12 @@ def main():
         """
         if len(sys.argv) > 1:
             port = sys.argv[1]
-            if port not in EXCLUDED_DEVICES:
+            if port in SUPERVISOR_PORTS or (len(sys.argv) > 2 and port + ":" + sys.argv[2] in SUPERVISOR_PORTS):
+                logger.debug("Stopping dbus-serialbattery: " + str(port) + " is handled by the supervisor")
+                sleep(60)
+                # Exit with error so that the serialstarter continues
+                exit_driver(None, None, 1)
+            elif port not in EXCLUDED_DEVICES:
                 return port
             else:
                 logger.debug("Stopping dbus-serialbattery: " + str(port) + " is excluded through the config file")
@@ -278,14 +656,136 @@ def main():
 
         if len(bms_types) > 0:
             for bms_type in bms_types:
-                if bms_type not in [bms["bms"].__name__ for bms in supported_bms_types]:
+                if bms_type not in [bms["bms"] for bms in supported_bms_types]:
                     logger.error(
                         f'ERROR >>> BMS type "{bms_type}" is not supported. Supported BMS types are: '
-                        + f"{', '.join([bms['bms'].__name__ for bms in supported_bms_types])}"
+                        + f"{', '.join(dict.fromkeys(bms['bms'] for bms in supported_bms_types))}"
                         + "; Disabled by default: ANT, MNB, Sinowealth"
                     )
                     exit_driver(None, None, 1)
 
+    def detect_batteries(port: str, ble_address: str = None, wait: bool = True) -> Union[dict, None]:
+        """
+        Detects the batteries connected to a port.
+
+        :param port: The port to connect to.
+        :param ble_address: The Bluetooth address, only needed for BLE ports.
+        :param wait: Wait until the serial connection is ready.
+        :return: The found batteries by address, for BLE ports by Bluetooth address, or None, if the CAN interface could not be accessed.
+        """
+        batteries = {}
+
+        # BLUETOOTH
+        if port.endswith("_Ble"):
+            """
+            The BLE classes are imported only if it's a BLE port; otherwise, the driver won't start due to missing Python modules.
+            This prevents issues when using the driver exclusively with a serial connection.
+            """
+
+            if ble_address is None:
+                logger.error("Bluetooth address is missing in the command line arguments")
+            elif get_bms_type(port) is None or get_bms_type(port)["transport"] != "ble":
+                logger.error(f'ERROR >>> Bluetooth BMS type "{port}" is not supported')
+            else:
+                class_ = get_bms_class(get_bms_type(port))
+
+                # do not remove ble_ prefix, since the dbus service cannot be only numbers
+                testbms = class_("ble_" + ble_address.replace(":", "").lower(), 9600, ble_address)
+
+                if testbms.run_test_connection():
+                    logger.info("-- Connection established to " + testbms.__class__.__name__)
+                    # key by the Bluetooth address, since BLE batteries of the same type share the port name
+                    batteries[ble_address] = testbms
+
+        # CAN
+        elif port.startswith(("can", "vecan", "vcan")):
+            """
+            Import CAN classes only if it's a CAN port; otherwise, the driver won't start due to missing Python modules.
+            This prevents issues when using the driver exclusively with a serial connection.
+
+            can: Older GX devices and Raspberry Pi with CAN hat
+            vecan: Newer Venus GX devices
+            vcan: Virtual CAN interface for testing
+            """
+            # only try CAN BMS on CAN port
+            supported_can_bms_types = get_supported_bms_types("can")
+
+            # check if BMS_TYPE is not empty and all BMS types in the list are supported
+            check_bms_types(supported_can_bms_types, "can")
+
+            expected_can_bms_types = get_expected_bms_types(supported_can_bms_types)
+
+            # If no BMS type is supported, use all supported BMS types
+            if len(expected_can_bms_types) == 0:
+                logger.warning(f"No supported CAN BMS type found in BMS_TYPE: {', '.join(BMS_TYPE)}. Using all supported BMS types.")
+                expected_can_bms_types = supported_can_bms_types
+
+            # start the corresponding CanReceiverThread if BMS for this type found
+            from utils_can import CanReceiverThread, CanTransportInterface
+
+            try:
+                can_thread = CanReceiverThread.get_instance(bustype="socketcan", channel=port)
+            except Exception as e:
+                logger.error(f"Error while accessing CAN interface: {e}")
+                return None
+
+            # wait until thread has initialized
+            if not can_thread.can_initialised.wait(2):
+                logger.error("Timeout while accessing CAN interface")
+                return None
+
+            can_threads.append(can_thread)
+
+            can_transport_interface = CanTransportInterface()
+            can_transport_interface.can_message_cache_callback = can_thread.get_message_cache
+            can_transport_interface.can_bus = can_thread.can_bus
+            logger.debug("Wait shortly to make sure that all needed data is in the cache")
+            # Slowest message cycle transmission is every 1 second, wait a bit more for the first time to fetch all needed data (only jk bms)
+            sleep(2)
+            addresses = [None] if len(BATTERY_ADDRESSES) == 0 else BATTERY_ADDRESSES  # use default address, if not configured
+
+            for busspeed in [250, 500]:
+                for address in addresses:
+                    bat = get_battery(port, address, can_transport_interface, expected_can_bms_types)
+                    if bat:
+                        batteries[address] = bat
+                        logger.info(f"Successful battery connection at {port} and this address {str(address)}")
+                    else:
+                        logger.warning(f"No battery connection at {port} and this address {str(address)}")
+
+                # if we've found at least 1 battery, stop the search here. otherwise retry with other bus speeds
+                if len(batteries) > 0:
+                    break
+
+                logger.info(f"Found no devices on can bus, retrying with {busspeed} kbps")
+                can_thread.setup_can(channel=port, bitrate=busspeed, force=True)
+                sleep(2)
+
+        # SERIAL
+        else:
+            # check if BMS_TYPE is not empty and all BMS types in the list are supported
+            check_bms_types(supported_bms_types, "serial")
+
+            # wait some seconds to be sure that the serial connection is ready
+            # else the error throw a lot of timeouts
+            if wait:
+                sleep(16)
+
+            # Check if BATTERY_ADDRESSES is not empty
+            if BATTERY_ADDRESSES:
+                for address in BATTERY_ADDRESSES:
+                    found_battery = get_battery(port, address)
+                    if found_battery:
+                        batteries[address] = found_battery
+                        logger.info(f"Successful battery connection at {port} and this address {address}")
+                    else:
+                        logger.warning(f"No battery connection at {port} and this address {address}")
+            # Use default address
+            else:
+                batteries[0] = get_battery(port)
+
+        return {address: bat for address, bat in batteries.items() if bat is not None}
+
     # read the version of Venus OS
     with open("/opt/victronenergy/version", "r") as f:
         venus_version = f.readline().strip()
@@ -300,148 +800,77 @@ def main():
     # show the version of the driver
     logger.info("dbus-serialbattery v" + str(DRIVER_VERSION))
 
-    port = get_port()
-    battery = {}
-
-    # BLUETOOTH
-    if port.endswith("_Ble"):
-        """
-        Import BLE classes only if it's a BLE port; otherwise, the driver won't start due to missing Python modules.
-        This prevents issues when using the driver exclusively with a serial connection.
-        """
-
-        if len(sys.argv) <= 2:
-            logger.error("Bluetooth address is missing in the command line arguments")
-        else:
-            ble_address = sys.argv[2]
-
-            if port == "Jkbms_Ble":
-                # noqa: F401 --> ignore flake "imported but unused" error
-                from bms.jkbms_ble import Jkbms_Ble  # noqa: F401
+    # SUPERVISOR: one process hosts the batteries of all ports in SUPERVISOR_PORTS
+    if supervisor:
+        Profiler.get_instance().name = "dbus-serialbattery.supervisor"
 
-            if port == "LltJbd_Ble":
-                # noqa: F401 --> ignore flake "imported but unused" error
-                from bms.lltjbd_ble import LltJbd_Ble  # noqa: F401
+        # wait once for all serial ports, see detect_batteries()
+        if any(not port.endswith("_Ble") and not port.startswith(("can", "vecan", "vcan")) for port, _ in supervisor_ports):
+            sleep(16)
 
-            if port == "LiTime_Ble":
-                # noqa: F401 --> ignore flake "imported but unused" error
-                from bms.litime_ble import LiTime_Ble  # noqa: F401
+        for port, ble_address in supervisor_ports:
+            logger.info(f"-- Detecting batteries at {port}" + (f" {ble_address}" if ble_address is not None else ""))
+            found_batteries = detect_batteries(port, ble_address, wait=False)
 
-            if port == "Renogy_Ble":
-                # noqa: F401 --> ignore flake "imported but unused" error
-                from bms.renogy_ble import Renogy_Ble  # noqa: F401
+            if not found_batteries:
+                logger.error(
+                    "ERROR >>> No battery connection at "
+                    + port
+                    + (" and this bus addresses: " + ", ".join(BATTERY_ADDRESSES) if BATTERY_ADDRESSES else "")
+                )
+                continue
 
-            class_ = eval(port)
+            for address, found_battery in found_batteries.items():
+                if (port, address) in battery:
+                    logger.error(f"ERROR >>> {port} {address} is set more than once in SUPERVISOR_PORTS")
+                    continue
 
-            # do not remove ble_ prefix, since the dbus service cannot be only numbers
-            testbms = class_("ble_" + ble_address.replace(":", "").lower(), 9600, ble_address)
+                battery[(port, address)] = found_battery
 
-            if testbms.test_connection():
-                logger.info("-- Connection established to " + testbms.__class__.__name__)
-                battery[0] = testbms
-
-    # CAN
-    elif port.startswith(("can", "vecan", "vcan")):
-        """
-        Import CAN classes only if it's a CAN port; otherwise, the driver won't start due to missing Python modules.
-        This prevents issues when using the driver exclusively with a serial connection.
+        if len(battery) == 0:
+            logger.error("ERROR >>> No battery connection at any port of SUPERVISOR_PORTS")
+            exit_driver(None, None, 1)
 
-        can: Older GX devices and Raspberry Pi with CAN hat
-        vecan: Newer Venus GX devices
-        vcan: Virtual CAN interface for testing
-        """
-        from bms.daly_can import Daly_Can
-        from bms.jkbms_can import Jkbms_Can
+        # read the batteries of each serial port in its own process, the supervisor only publishes them
+        if SUPERVISOR_PROCESS_WORKERS:
+            for port in dict.fromkeys(key_address[0] for key_address in battery):
+                if port.endswith("_Ble") or port.startswith(("can", "vecan", "vcan")):
+                    continue
 
-        # only try CAN BMS on CAN port
-        supported_bms_types = [
-            {"bms": Daly_Can},
-            {"bms": Jkbms_Can},
-        ]
+                logger.info(f"-- Starting worker process for {port}")
+                port_worker = PortWorker(port, {key_address[1]: battery[key_address] for key_address in battery if key_address[0] == port})
+                worker_batteries = port_worker.start_batteries()
 
-        # check if BMS_TYPE is not empty and all BMS types in the list are supported
-        check_bms_types(supported_bms_types, "can")
+                if worker_batteries is None:
+                    logger.error(f"ERROR >>> Reading {port} in the supervisor process instead")
+                    continue
 
-        expected_bms_types = [battery_type for battery_type in supported_bms_types if battery_type["bms"].__name__ in BMS_TYPE or len(BMS_TYPE) == 0]
+                port_workers.append(port_worker)
+                for address, worker_battery in worker_batteries.items():
+                    battery[(port, address)] = worker_battery
 
-        # If no BMS type is supported, use all supported BMS types
-        if len(expected_bms_types) == 0:
-            logger.warning(f"No supported CAN BMS type found in BMS_TYPE: {', '.join(BMS_TYPE)}. Using all supported BMS types.")
-            expected_bms_types = supported_bms_types
+    else:
+        port = get_port()
+        Profiler.get_instance().name = "dbus-serialbattery." + port[port.rfind("/") + 1 :]
 
-        # start the corresponding CanReceiverThread if BMS for this type found
-        from utils_can import CanReceiverThread, CanTransportInterface
+        found_batteries = detect_batteries(port, sys.argv[2] if len(sys.argv) > 2 else None)
 
-        try:
-            can_thread = CanReceiverThread.get_instance(bustype="socketcan", channel=port)
-        except Exception as e:
-            logger.error(f"Error while accessing CAN interface: {e}")
+        # the CAN interface could not be accessed
+        if found_batteries is None:
             sleep(60)
             exit_driver(None, None, 1)
 
-        # wait until thread has initialized
-        if not can_thread.can_initialised.wait(2):
-            logger.error("Timeout while accessing CAN interface")
-            sleep(60)
+        # check if at least one BMS was found
+        if len(found_batteries) == 0:
+            logger.error(
+                "ERROR >>> No battery connection at "
+                + port
+                + (" and this bus addresses: " + ", ".join(BATTERY_ADDRESSES) if BATTERY_ADDRESSES else "")
+            )
             exit_driver(None, None, 1)
 
-        can_transport_interface = CanTransportInterface()
-        can_transport_interface.can_message_cache_callback = can_thread.get_message_cache
-        can_transport_interface.can_bus = can_thread.can_bus
-        logger.debug("Wait shortly to make sure that all needed data is in the cache")
-        # Slowest message cycle transmission is every 1 second, wait a bit more for the first time to fetch all needed data (only jk bms)
-        sleep(2)
-        addresses = [None] if len(BATTERY_ADDRESSES) == 0 else BATTERY_ADDRESSES  # use default address, if not configured
-
-        for busspeed in [250, 500]:
-            for address in addresses:
-                bat = get_battery(port, address, can_transport_interface)
-                if bat:
-                    battery[address] = bat
-                    logger.info(f"Successful battery connection at {port} and this address {str(address)}")
-                else:
-                    logger.warning(f"No battery connection at {port} and this address {str(address)}")
-
-            # if we've found at least 1 battery, stop the search here. otherwise retry with other bus speeds
-            if len(battery) > 0:
-                break
-
-            logger.info(f"Found no devices on can bus, retrying with {busspeed} kbps")
-            can_thread.setup_can(channel=port, bitrate=busspeed, force=True)
-            sleep(2)
-
-    # SERIAL
-    else:
-        # check if BMS_TYPE is not empty and all BMS types in the list are supported
-        check_bms_types(supported_bms_types, "serial")
-
-        # wait some seconds to be sure that the serial connection is ready
-        # else the error throw a lot of timeouts
-        sleep(16)
-
-        # Check if BATTERY_ADDRESSES is not empty
-        if BATTERY_ADDRESSES:
-            for address in BATTERY_ADDRESSES:
-                found_battery = get_battery(port, address)
-                if found_battery:
-                    battery[address] = found_battery
-                    logger.info(f"Successful battery connection at {port} and this address {address}")
-                else:
-                    logger.warning(f"No battery connection at {port} and this address {address}")
-        # Use default address
-        else:
-            battery[0] = get_battery(port)
-
-    # check if at least one BMS was found
-    battery_found = False
-
-    for key_address in battery:
-        if battery[key_address] is not None:
-            battery_found = True
-
-    if not battery_found:
-        logger.error("ERROR >>> No battery connection at " + port + (" and this bus addresses: " + ", ".join(BATTERY_ADDRESSES) if BATTERY_ADDRESSES else ""))
-        exit_driver(None, None, 1)
+        for address, found_battery in found_batteries.items():
+            battery[(port, address)] = found_battery
 
     # Have a mainloop, so we can send/receive asynchronous calls to and from dbus
     DBusGMainLoop(set_as_default=True)
@@ -450,13 +879,14 @@ def main():
     mainloop = gobject.MainLoop()
 
     # Get the initial values for the battery used by setup_vedbus
-    helper = {}
-
     for key_address in battery:
-        helper[key_address] = DbusHelper(battery[key_address], key_address)
+        # BLE batteries are already unique by their port "ble_<address>", so the Bluetooth address is not appended
+        helper[key_address] = DbusHelper(battery[key_address], 0 if key_address[0].endswith("_Ble") else key_address[1])
         if not helper[key_address].setup_vedbus():
             logger.error(
-                "ERROR >>> Problem with battery set up at " + port + (" and this Modbus address: " + ", ".join(BATTERY_ADDRESSES) if BATTERY_ADDRESSES else "")
+                "ERROR >>> Problem with battery set up at "
+                + key_address[0]
+                + (" and this Modbus address: " + ", ".join(BATTERY_ADDRESSES) if BATTERY_ADDRESSES else "")
             )
             exit_driver(None, None, 1)
 
@@ -467,18 +897,29 @@ def main():
     first_key = list(battery.keys())[0]
 
     # try using active callback on this battery (normally only used for Bluetooth BMS)
-    if not battery[first_key].use_callback(lambda: poll_battery(mainloop)):
-        # change poll interval if set in config
-        if POLL_INTERVAL is not None:
-            battery[first_key].poll_interval = POLL_INTERVAL
+    # the supervisor polls all batteries, each in its own worker thread, so that a slow port does not block the others
+    if supervisor or not battery[first_key].use_callback(poll_battery_callback):
+        # if not possible, poll each battery with its own timer
+        for key_address in battery:
+            # change poll interval if set in config
+            if POLL_INTERVAL is not None:
+                battery[key_address].poll_interval = POLL_INTERVAL
+
+            logger.info(f"Polling interval: {battery[key_address].poll_interval/1000:.3f} s")
+
+            # a WorkerBattery only reads the shared memory, so it does not need a worker thread
+            poll_timer = PollTimer(
+                battery[key_address],
+                helper[key_address],
+                mainloop,
+                POLL_IN_WORKER_THREAD or (supervisor and not isinstance(battery[key_address], WorkerBattery)),
+            )
 
-        logger.info(f"Polling interval: {battery[first_key].poll_interval/1000:.3f} s")
+            # the supervisor keeps running the other batteries, if one failed completely
+            if supervisor:
+                helper[key_address].on_battery_failed = poll_timer.failed
 
-        # if not possible, poll the battery every poll_interval milliseconds
-        gobject.timeout_add(
-            battery[first_key].poll_interval,
-            lambda: poll_battery(mainloop),
-        )
+            poll_timer.start()
 
     # print log at this point, else not all data is correctly populated
     for key_address in battery:
@@ -494,13 +935,20 @@ def main():
     # check, if external current sensor should be used
     if EXTERNAL_SENSOR_DBUS_DEVICE is not None and (EXTERNAL_SENSOR_DBUS_PATH_CURRENT is not None or EXTERNAL_SENSOR_DBUS_PATH_SOC is not None):
         for key_address in battery:
-            battery[key_address].setup_external_sensor()
+            helper[key_address].setup_external_sensor()
+
+    # track the memory usage of the driver, if enabled
+    if MEMORY_WATCHDOG_ENABLE:
+        MemoryWatchdog.get_instance().start()
 
     # Run the main loop
     try:
         mainloop.run()
     except KeyboardInterrupt:
-        pass
+        exit_driver(None, None, 0)
+
+    # the main loop is only quit, if a battery failed completely
+    exit_driver(None, None, 1)
 
 
 if __name__ == "__main__":
@@ -4,9 +4,12 @@ import os
 import platform
 import dbus
 import traceback
-from time import sleep, time
+from time import monotonic, sleep, time
+from typing import Callable, Tuple, Union
 from utils import logger, publish_config_variables
 import utils
+from utils_memory import MemoryWatchdog
+from utils_profiler import Profiler
 from xml.etree import ElementTree
 import requests
 import threading
@@ -14,7 +17,7 @@ import json
 
 # add path to velib_python
 sys.path.insert(1, os.path.join(os.path.dirname(__file__), "ext", "velib_python"))
-from vedbus import VeDbusService  # noqa: E402
+from vedbus import ServiceContext, VeDbusService, VeDbusItemExport, VeDbusItemImport  # noqa: E402
 from ve_utils import get_vrm_portal_id  # noqa: E402
 from settingsdevice import SettingsDevice  # noqa: E402
 
@@ -33,6 +36,500 @@ def get_bus() -> dbus.bus.BusConnection:
     return SessionBus() if "DBUS_SESSION_BUS_ADDRESS" in os.environ else SystemBus()
 
 
+class DbusPublisher(ServiceContext):
+    """
+    Publish layer between the DbusHelper and the VeDbusService, based on the `ServiceContext` of velib.
+
+    A value is only published, if it differs from the last published value of the path. The last published
+    value is the value of the exported item, so values changed from outside with `SetValue` are also restored.
+    All changes of a publish cycle are collected and sent with one `ItemsChanged` signal by `flush()`,
+    instead of one `PropertiesChanged` signal per path.
+
+    Numeric values of paths with a deadband (see `PUBLISH_DEADBAND_*` in the config) are only published, if they
+    changed at least by the deadband or if the last publish is older than `PUBLISH_DEADBAND_MAX_AGE` seconds.
+    """
+
+    EXEMPT_PATHS = ("/Info/", "/Alarms/", "/Io/")
+    """
+    Control paths and alarms are always published immediately
+    """
+
+    TEMPERATURE_PATHS = (
+        "/Dc/0/Temperature",
+        "/System/MinCellTemperature",
+        "/System/MaxCellTemperature",
+        "/System/MOSTemperature",
+        "/System/Temperature1",
+        "/System/Temperature2",
+        "/System/Temperature3",
+        "/System/Temperature4",
+    )
+
+    def __init__(self, dbusservice: VeDbusService):
+        super().__init__(dbusservice)
+        self._deadbands: dict = {}
+        """
+        Deadband by path, filled on first use
+        """
+        self._published_time: dict = {}
+        """
+        Monotonic timestamp of the last publish by path, only for paths with a deadband
+        """
+        self.values: dict = {}
+        """
+        Paths and values changed in the current cycle
+        """
+
+    def __setitem__(self, path: str, value) -> None:
+        deadband = self._deadbands.get(path)
+        if deadband is None:
+            deadband = self._deadbands[path] = self.get_deadband(path)
+
+        if deadband:
+            now = monotonic()
+            current = self.parent._dbusobjects[path].local_get_value()
+            if (
+                type(value) in (int, float)
+                and type(current) in (int, float)
+                and abs(value - current) < deadband
+                and now - self._published_time.get(path, 0) < utils.PUBLISH_DEADBAND_MAX_AGE
+            ):
+                return
+            self._published_time[path] = now
+
+        super().__setitem__(path, value)
+        if path in self.changes:
+            self.values[path] = value
+
+    def get_deadband(self, path: str) -> float:
+        """
+        Get the deadband of a path from the config.
+
+        :param path: The dbus path
+        :return: The deadband, 0 if every change should be published
+        """
+        if path.startswith(self.EXEMPT_PATHS):
+            return 0
+
+        for deadband_path, deadband in utils.PUBLISH_DEADBAND_PATHS.items():
+            if path == deadband_path or (deadband_path.endswith("*") and path.startswith(deadband_path[:-1])):
+                return deadband
+
+        if (
+            path in ("/System/MinCellVoltage", "/System/MaxCellVoltage")
+            or path.startswith("/Voltages/Cell")
+            or (path.startswith("/Cell/") and path.endswith("/Volts"))
+        ):
+            return utils.PUBLISH_DEADBAND_CELL_VOLTAGE
+
+        if path in self.TEMPERATURE_PATHS:
+            return utils.PUBLISH_DEADBAND_TEMPERATURE
+
+        if path == "/Dc/0/Power":
+            return utils.PUBLISH_DEADBAND_POWER
+
+        return 0
+
+    def flush(self) -> None:
+        """
+        Send all changes of the current cycle with one `ItemsChanged` signal and start a new cycle.
+
+        :return: None
+        """
+        super().flush()
+        self.values = {}
+
+
+class DemandDbusItemExport(VeDbusItemExport):
+    """
+    Exported dbus item, that remembers when it was read the last time.
+
+    Used for paths that are expensive to calculate, so that they are only calculated while someone reads them.
+    Only reads of the item over the bus count: velib calls `GetText()` also from Python, when a value is
+    published or the root tree is read, which has no sender.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.read_last_time: float = 0
+        """
+        Monotonic time of the last `GetValue`/`GetText` call over the bus
+        """
+        super().__init__(*args, **kwargs)
+
+    @dbus.service.method("com.victronenergy.BusItem", out_signature="v", sender_keyword="sender")
+    def GetValue(self, sender=None):
+        if sender is not None:
+            self.read_last_time = monotonic()
+        return super().GetValue()
+
+    @dbus.service.method("com.victronenergy.BusItem", out_signature="s", sender_keyword="sender")
+    def GetText(self, sender=None):
+        if sender is not None:
+            self.read_last_time = monotonic()
+        return super().GetText()
+
+
+class JsonSnapshot:
+    """
+    Nested battery data for `/JsonData` and `/JsonDataCompact`, maintained incrementally from the
+    changes of the DbusPublisher.
+
+    The position of each path in the nested data is computed once, afterwards a change is a single
+    dict assignment. The data is only serialized again, if a value changed.
+    """
+
+    EXCLUDED_PATHS = ("/JsonData", "/JsonDataCompact", "/Settings/ResetSoc", "/Settings/HasSettings")
+
+    DEBUG_PATHS = ("/Info/ChargeModeDebug", "/Info/Config/", "/Mgmt/", "/Diagnostics/")
+    """
+    Paths starting with these are not part of the compact variant
+    """
+
+    def __init__(self, dbusservice: VeDbusService):
+        self._dbusservice = dbusservice
+        self.data: dict = {}
+        self.data_compact: dict = {}
+        self._nodes: dict = {}
+        """
+        Parent dicts and key of each path: (parent, key, parent of the compact variant or None)
+        """
+        self.changed: bool = True
+        self.changed_compact: bool = True
+
+        for path in dbusservice._dbusobjects:
+            self.add(path)
+
+    def add(self, path: str) -> None:
+        """
+        Add a path to the nested data.
+
+        :param path: The dbus path
+        :return: None
+        """
+        if path in self.EXCLUDED_PATHS or path not in self._dbusservice:
+            return
+
+        parts = path.strip("/").split("/")
+        parent = self.data
+        for part in parts[:-1]:
+            parent = parent.setdefault(part, {})
+
+        parent_compact = None
+        if not path.startswith(self.DEBUG_PATHS):
+            parent_compact = self.data_compact
+            for part in parts[:-1]:
+                parent_compact = parent_compact.setdefault(part, {})
+
+        self._nodes[path] = (parent, parts[-1], parent_compact)
+        self.set(path, self._dbusservice[path])
+
+    def set(self, path: str, value) -> None:
+        """
+        Set the value of a path in the nested data.
+
+        :param path: The dbus path
+        :param value: The new value
+        :return: None
+        """
+        parent, key, parent_compact = self._nodes[path]
+
+        # set invalid values and empty lists to empty string
+        if value is None or value == []:
+            value = ""
+
+        parent[key] = value
+        self.changed = True
+        if parent_compact is not None:
+            parent_compact[key] = value
+            self.changed_compact = True
+
+    def update(self, changes: dict) -> None:
+        """
+        Apply the changes of a publish cycle.
+
+        :param changes: Paths and values changed in the current cycle
+        :return: None
+        """
+        for path, value in changes.items():
+            if path in self._nodes:
+                self.set(path, value)
+            else:
+                self.add(path)
+
+    def sync(self) -> None:
+        """
+        Apply values that were changed from outside with `SetValue` and are therefore not part of the changes.
+
+        :return: None
+        """
+        for path, (parent, key, _) in self._nodes.items():
+            value = self._dbusservice[path]
+            if parent[key] != ("" if value == [] else value):
+                self.set(path, value)
+
+    def dumps(self) -> str:
+        """
+        Serialize the nested data.
+
+        :return: JSON string
+        """
+        self.changed = False
+        return json.dumps(self.data)
+
+    def dumps_compact(self) -> str:
+        """
+        Serialize the nested data without debug fields and whitespaces.
+
+        :return: JSON string
+        """
+        self.changed_compact = False
+        return json.dumps(self.data_compact, separators=(",", ":"))
+
+
+class VictronSettings:
+    """
+    Cache for values of `com.victronenergy.settings` that are read on the poll path.
+
+    The values are kept up to date by `PropertiesChanged`/`ItemsChanged` signals, so reading them
+    is a dict lookup instead of dbus calls. If the settings service restarts, all values are read again.
+    The batteries of a process subscribe their paths on the same cache, see `get_instance()`.
+    """
+
+    _instance = None
+
+    SERVICE = "com.victronenergy.settings"
+
+    def __init__(self, bus: dbus.bus.BusConnection):
+        # singleton
+        if VictronSettings._instance is not None:
+            raise Exception("Instance already exists!")
+
+        self._bus = bus
+        self._items: dict = {}
+        self._bus.add_signal_receiver(
+            self._name_owner_changed,
+            signal_name="NameOwnerChanged",
+            dbus_interface="org.freedesktop.DBus",
+            arg0=self.SERVICE,
+        )
+        VictronSettings._instance = self
+
+    @classmethod
+    def get_instance(cls) -> "VictronSettings":
+        """
+        Get the instance of the settings cache
+
+        :return: instance of the settings cache
+        """
+        if cls._instance is None:
+            cls(get_bus())
+        return cls._instance
+
+    def subscribe(self, paths: list) -> None:
+        """
+        Read the values of the paths once and keep them up to date by signals.
+
+        :param paths: List of setting paths, e.g. `/Settings/CGwacs/Hub4Mode`
+        :return: None
+        """
+        for path in paths:
+            if path not in self._items:
+                self._items[path] = VeDbusItemImport(self._bus, self.SERVICE, path)
+
+    def get_value(self, path: str, default=None):
+        """
+        Get the cached value of a setting. Paths that are not subscribed yet are subscribed on first use.
+
+        :param path: The setting path
+        :param default: Returned if the setting does not exist
+        :return: The value of the setting
+        """
+        if path not in self._items:
+            self.subscribe([path])
+
+        value = self._items[path].get_value()
+        return default if value is None else value
+
+    def _name_owner_changed(self, name: str, old_owner: str, new_owner: str) -> None:
+        """
+        Read all values again, when the settings service (re)appears on the dbus.
+        """
+        if not new_owner:
+            return
+
+        for item in self._items.values():
+            try:
+                item._refreshcachedvalue()
+            except dbus.exceptions.DBusException:
+                pass
+
+
+class SettingsStore:
+    """
+    Write-behind store for the battery state saved to `com.victronenergy.settings`.
+
+    Values are only marked as dirty when they differ from the last written value and all dirty values
+    are written at once by `flush()`. The settings items are created once and reused for every write,
+    so no new bus connection is needed.
+    """
+
+    SERVICE = "com.victronenergy.settings"
+
+    def __init__(self, bus: dbus.bus.BusConnection, path: str, values: dict = {}):
+        self._bus = bus
+        self._path = path
+        self._items: dict = {}
+        self._values: dict = dict(values)
+        """
+        Last written value by setting name
+        """
+        self._dirty: dict = {}
+        """
+        Values to write with the next flush by setting name
+        """
+        self.flushed_last_time: float = monotonic()
+
+    def set(self, setting_name: str, value) -> None:
+        """
+        Mark a setting as dirty, if the value differs from the last written value.
+
+        :param setting_name: The setting name below the path
+        :param value: The new value
+        :return: None
+        """
+        if value is None:
+            return
+
+        if setting_name in self._values and self._values[setting_name] == value:
+            self._dirty.pop(setting_name, None)
+        else:
+            self._dirty[setting_name] = value
+
+    def flush(self) -> bool:
+        """
+        Write all dirty values to the settings.
+
+        :return: True if all values were written, otherwise False
+        """
+        self.flushed_last_time = monotonic()
+        result = True
+
+        for setting_name, value in list(self._dirty.items()):
+            try:
+                if setting_name not in self._items:
+                    self._items[setting_name] = VeDbusItemImport(self._bus, self.SERVICE, self._path + "/" + setting_name, createsignal=False)
+
+                if self._items[setting_name].set_value(value) == 0:
+                    logger.debug(f"Saved {setting_name}. Before {self._values.get(setting_name)}, after {value}")
+                    self._values[setting_name] = value
+                    del self._dirty[setting_name]
+                else:
+                    logger.error(f"Failed to save setting {self._path}/{setting_name}")
+                    result = False
+
+            except dbus.exceptions.DBusException as e:
+                # keep the value dirty and try again with the next flush
+                self._items.pop(setting_name, None)
+                logger.error(f"Failed to save setting {self._path}/{setting_name}: {e}")
+                result = False
+
+        return result
+
+
+class PollTiming:
+    """
+    Duration of the stages of the poll cycle, published as percentiles to `/Diagnostics/Timing/<Stage>/`.
+
+    The durations are collected in a `LatencyHistogram` per stage. Every `DIAGNOSTICS_TIMING_INTERVAL` seconds
+    P50, P95 and the maximum in ms are published and the histograms are reset.
+
+    :param stages: The names of the stages
+    :param groups: The command groups of the BMS, each is measured as sub stage of `RefreshData`
+    """
+
+    PATH = "/Diagnostics/Timing/"
+
+    def __init__(self, stages: list, groups: list = None):
+        if groups is None:
+            groups = []
+        self.group_stages: dict = {group: "RefreshData/" + "".join(part.capitalize() for part in group.split("_")) for group in groups}
+        """
+        Stage name by command group, e.g. `cells_volts` is measured as `RefreshData/CellsVolts`
+        """
+        self.histograms: dict = {stage: utils.LatencyHistogram() for stage in list(stages) + list(self.group_stages.values())}
+        """
+        Histogram of the durations by stage
+        """
+        self.published_last_time: float = monotonic()
+
+    def add_paths(self, dbusservice: VeDbusService) -> None:
+        """
+        Add the dbus paths of all stages.
+
+        :param dbusservice: The dbus service to add the paths to
+        :return: None
+        """
+        for stage in self.histograms:
+            for name in ("P50", "P95", "Max"):
+                dbusservice.add_path(
+                    self.PATH + stage + "/" + name,
+                    None,
+                    writeable=False,
+                    gettextcallback=lambda p, v: "{:0.1f}ms".format(v),
+                )
+
+    def record(self, stage: str, duration: float) -> None:
+        """
+        Record the duration of a stage.
+
+        :param stage: The name of the stage
+        :param duration: The duration in seconds
+        :return: None
+        """
+        if stage in self.histograms:
+            self.histograms[stage].record(duration)
+
+    def record_groups(self, runtimes: dict) -> None:
+        """
+        Record the durations of the command groups read in the last refresh cycle.
+
+        :param runtimes: The durations in seconds by command group, see `RefreshScheduler.runtimes`
+        :return: None
+        """
+        for group, duration in runtimes.items():
+            if group in self.group_stages:
+                self.histograms[self.group_stages[group]].record(duration)
+
+    def publish(self, publisher: DbusPublisher) -> None:
+        """
+        Publish the percentiles of all stages and reset the histograms, if the interval elapsed.
+
+        :param publisher: The publisher of the battery
+        :return: None
+        """
+        if monotonic() - self.published_last_time < utils.DIAGNOSTICS_TIMING_INTERVAL:
+            return
+
+        self.published_last_time = monotonic()
+        summary = []
+
+        for stage, histogram in self.histograms.items():
+            if histogram.count == 0:
+                continue
+
+            p50 = round(histogram.get_percentile(50), 1)
+            p95 = round(histogram.get_percentile(95), 1)
+            maximum = round(histogram.max, 1)
+            publisher[self.PATH + stage + "/P50"] = p50
+            publisher[self.PATH + stage + "/P95"] = p95
+            publisher[self.PATH + stage + "/Max"] = maximum
+            summary.append(f"{stage} {p50}/{p95}/{maximum}")
+            histogram.reset()
+
+        if utils.DIAGNOSTICS_TIMING_LOG and len(summary) > 0:
+            logger.info("Poll timing P50/P95/Max in ms: " + ", ".join(summary))
+
+
 class DbusHelper:
     """
     This class is used to handle all the dbus communication.
@@ -40,6 +537,26 @@ class DbusHelper:
 
     EMPTY_DICT = {}
 
+    POLL_TIMING_STAGES = (
+        "RefreshData",
+        "SetCalculatedData",
+        "ManageChargeVoltage",
+        "ManageChargeAndDischargeCurrent",
+        "PublishDbus",
+        "History",
+        "SaveBatteryState",
+        "Total",
+    )
+    """
+    Stages of the poll cycle measured, if `DIAGNOSTICS_TIMING_ENABLE` is set.
+    `History` and `SaveBatteryState` are part of `PublishDbus`.
+    """
+
+    settings_devices: dict = None
+    """
+    Settings below `/Settings/Devices`, read once and shared by all batteries of the process.
+    """
+
     def __init__(self, battery, bms_address=None):
         self.battery = battery
         self.instance = 1
@@ -52,23 +569,42 @@ class DbusHelper:
             + ("__" + str(bms_address) if bms_address is not None and bms_address != 0 else "")
         )
         self._dbusservice = VeDbusService(self._dbusname, get_bus(), register=False)
+        self.publisher = DbusPublisher(self._dbusservice)
         self.bms_id = "".join(
             # remove all non alphanumeric characters except underscore from the identifier
             c if c.isalnum() else "_"
             for c in self.battery.unique_identifier()
         )
         self.path_battery = None
-        self.save_charge_details_last = {
-            "allow_max_voltage": self.battery.allow_max_voltage,
-            "max_voltage_start_time": self.battery.max_voltage_start_time,
-            "soc_calc": (self.battery.soc_calc if self.battery.soc_calc is not None else ""),
-            "soc_reset_last_reached": self.battery.soc_reset_last_reached,
-            "history_values": "",
-        }
+        self.debug_items: list = []
+        """
+        Exported items of the driver debug info, empty if not published by the publishing profile.
+        """
+        self.settings_store: SettingsStore = None
+        """
+        Write-behind store for the battery state saved to the settings.
+        """
         self.history_calculated_last_time: int = 0
         """
         Last time the history values were calculated.
         """
+        self.json_snapshot: JsonSnapshot = None
+        self.json_snapshot_synced_last_time: int = 0
+        """
+        Last time the JSON data was synced with values changed from outside.
+        """
+        self.poll_timing: PollTiming = None
+        """
+        Duration of the stages of the poll cycle, None if disabled by `DIAGNOSTICS_TIMING_ENABLE`.
+        """
+        self.queue_callback: Callable = None
+        """
+        Passes a callback that writes to the BMS to the worker thread of the battery, None if the BMS is read in the main loop.
+        """
+        self.on_battery_failed: Callable = None
+        """
+        Called instead of quitting the main loop, when the battery failed completely, e.g. in supervisor mode. None to quit the main loop.
+        """
         self.telemetry_upload_error_count: int = 0
         self.telemetry_upload_interval: int = 60 * 60 * 24 * 7  # 1 week
         self.telemetry_upload_last: int = 0
@@ -172,13 +708,10 @@ class DbusHelper:
         self.settings = SettingsDevice(get_bus(), self.EMPTY_DICT, self.handle_changed_setting)
         logger.debug("setup_instance(): SettingsDevice")
 
-        # get all the settings from the dbus
-        settings_from_dbus = self.get_settings_with_values(
-            get_bus(),
-            "com.victronenergy.settings",
-            "/Settings/Devices",
-        )
-        logger.debug("setup_instance(): get_settings_with_values")
+        # get all the settings from the dbus, read only once for all batteries of the process
+        settings_from_dbus = self.get_settings_devices(get_bus())
+        devices_removed = []
+        logger.debug("setup_instance(): get_settings_devices")
         # output:
         # {
         #     "Settings": {
@@ -325,6 +858,7 @@ class DbusHelper:
                             ],
                         )
                         logger.info(f"Remove /Settings/Devices/{key} from dbus. Delete result: {del_return}")
+                        devices_removed.append(key)
 
                     # check if the battery has a last seen time, if not then it's an old entry and can be removed
                     elif "LastSeen" not in value:
@@ -335,6 +869,7 @@ class DbusHelper:
                             ["ClassAndVrmInstance"],
                         )
                         logger.info(f"Remove /Settings/Devices/{key} from dbus. " + f"Old entry. Delete result: {del_return}")
+                        devices_removed.append(key)
 
                 if "ruuvi" in key:
                     # check if Ruuvi tag is enabled, if not remove entry.
@@ -349,9 +884,14 @@ class DbusHelper:
                             f"Remove /Settings/Devices/{key} from dbus. "
                             + f"Ruuvi tag was disabled and had no ClassAndVrmInstance. Delete result: {del_return}"
                         )
+                        devices_removed.append(key)
 
         logger.debug("setup_instance(): for loop ended")
 
+        # keep the cached settings in sync for the next battery
+        for key in devices_removed:
+            del settings_from_dbus["Settings"]["Devices"][key]
+
         # create class and crm instance
         class_and_vrm_instance = "battery:" + str(device_instance)
 
@@ -425,6 +965,23 @@ class DbusHelper:
 
         self.settings.addSettings(settings)
         self.battery.role, self.instance = self.get_role_instance()
+
+        # add the settings of this battery to the cached settings, so that the next battery
+        # of the process does not use the same device instance
+        for setting, options in settings.items():
+            self.merge_dicts(settings_from_dbus, self.create_nested_dict(options[0], str(self.settings[setting])))
+
+        # values read from the settings don't have to be written again
+        self.settings_store = SettingsStore(
+            get_bus(),
+            self.path_battery,
+            {
+                "AllowMaxVoltage": 1 if self.battery.allow_max_voltage else 0,
+                "MaxVoltageStartTime": (self.battery.max_voltage_start_time if self.battery.max_voltage_start_time is not None else ""),
+                "SocCalc": (self.battery.soc_calc if self.battery.soc_calc is not None else ""),
+                "SocResetLastReached": self.battery.soc_reset_last_reached,
+            },
+        )
         logger.info(f"Use DeviceInstance: {self.instance}")
 
         logger.debug(f"Found DeviceInstances: {device_instances_used}")
@@ -532,10 +1089,16 @@ class DbusHelper:
         )
 
         self._dbusservice.add_path("/Info/ChargeMode", None, writeable=True)
-        self._dbusservice.add_path("/Info/ChargeModeDebug", None, writeable=True)
-        self._dbusservice.add_path("/Info/ChargeModeDebugFloat", None, writeable=True)
-        self._dbusservice.add_path("/Info/ChargeModeDebugBulk", None, writeable=True)
+        if utils.PUBLISH_PROFILE == "full" or (utils.PUBLISH_PROFILE == "standard" and utils.GUI_PARAMETERS_SHOW_ADDITIONAL_INFO):
+            for path in ("/Info/ChargeModeDebug", "/Info/ChargeModeDebugFloat", "/Info/ChargeModeDebugBulk"):
+                self.debug_items.append(self._dbusservice.add_path(path, None, writeable=True, itemtype=DemandDbusItemExport))
         self._dbusservice.add_path("/Info/ChargeLimitation", None, writeable=True)
+        self._dbusservice.add_path(
+            "/Info/PollInterval",
+            self.battery.poll_interval / 1000,
+            writeable=False,
+            gettextcallback=lambda p, v: "{:0.3f}s".format(v),
+        )
         self._dbusservice.add_path("/Info/DischargeLimitation", None, writeable=True)
 
         self._dbusservice.add_path("/System/NrOfCellsPerBattery", self.battery.cell_count, writeable=True)
@@ -587,18 +1150,19 @@ class DbusHelper:
             gettextcallback=lambda p, v: "{:0.0f}W".format(v),
         )
         self._dbusservice.add_path("/Dc/0/Temperature", None, writeable=True)
-        self._dbusservice.add_path(
-            "/Dc/0/MidVoltage",
-            None,
-            writeable=True,
-            gettextcallback=lambda p, v: "{:0.2f}V".format(v),
-        )
-        self._dbusservice.add_path(
-            "/Dc/0/MidVoltageDeviation",
-            None,
-            writeable=True,
-            gettextcallback=lambda p, v: "{:0.1f}%".format(v),
-        )
+        if utils.MIDPOINT_ENABLE and utils.PUBLISH_PROFILE != "minimal":
+            self._dbusservice.add_path(
+                "/Dc/0/MidVoltage",
+                None,
+                writeable=True,
+                gettextcallback=lambda p, v: "{:0.2f}V".format(v),
+            )
+            self._dbusservice.add_path(
+                "/Dc/0/MidVoltageDeviation",
+                None,
+                writeable=True,
+                gettextcallback=lambda p, v: "{:0.1f}%".format(v),
+            )
 
         # Create battery extras
         self._dbusservice.add_path("/System/MinCellTemperature", None, writeable=True)
@@ -606,14 +1170,15 @@ class DbusHelper:
         self._dbusservice.add_path("/System/MaxCellTemperature", None, writeable=True)
         self._dbusservice.add_path("/System/MaxTemperatureCellId", None, writeable=True)
         self._dbusservice.add_path("/System/MOSTemperature", None, writeable=True)
-        self._dbusservice.add_path("/System/Temperature1", None, writeable=True)
-        self._dbusservice.add_path("/System/Temperature1Name", None, writeable=True)
-        self._dbusservice.add_path("/System/Temperature2", None, writeable=True)
-        self._dbusservice.add_path("/System/Temperature2Name", None, writeable=True)
-        self._dbusservice.add_path("/System/Temperature3", None, writeable=True)
-        self._dbusservice.add_path("/System/Temperature3Name", None, writeable=True)
-        self._dbusservice.add_path("/System/Temperature4", None, writeable=True)
-        self._dbusservice.add_path("/System/Temperature4Name", None, writeable=True)
+        if utils.PUBLISH_PROFILE != "minimal":
+            self._dbusservice.add_path("/System/Temperature1", None, writeable=True)
+            self._dbusservice.add_path("/System/Temperature1Name", None, writeable=True)
+            self._dbusservice.add_path("/System/Temperature2", None, writeable=True)
+            self._dbusservice.add_path("/System/Temperature2Name", None, writeable=True)
+            self._dbusservice.add_path("/System/Temperature3", None, writeable=True)
+            self._dbusservice.add_path("/System/Temperature3Name", None, writeable=True)
+            self._dbusservice.add_path("/System/Temperature4", None, writeable=True)
+            self._dbusservice.add_path("/System/Temperature4Name", None, writeable=True)
         self._dbusservice.add_path(
             "/System/MaxCellVoltage",
             None,
@@ -629,25 +1194,26 @@ class DbusHelper:
         )
         self._dbusservice.add_path("/System/MinVoltageCellId", None, writeable=True)
 
-        self._dbusservice.add_path("/History/DeepestDischarge", None, writeable=True)
-        self._dbusservice.add_path("/History/LastDischarge", None, writeable=True)
-        self._dbusservice.add_path("/History/AverageDischarge", None, writeable=True)
-        self._dbusservice.add_path("/History/ChargeCycles", None, writeable=True)
-        self._dbusservice.add_path("/History/FullDischarges", None, writeable=True)
-        self._dbusservice.add_path("/History/TotalAhDrawn", None, writeable=True)
-        self._dbusservice.add_path("/History/MinimumVoltage", None, writeable=True)
-        self._dbusservice.add_path("/History/MaximumVoltage", None, writeable=True)
-        self._dbusservice.add_path("/History/MinimumCellVoltage", None, writeable=True)
-        self._dbusservice.add_path("/History/MaximumCellVoltage", None, writeable=True)
-        self._dbusservice.add_path("/History/TimeSinceLastFullCharge", None, writeable=True)
-        self._dbusservice.add_path("/History/LowVoltageAlarms", None, writeable=True)
-        self._dbusservice.add_path("/History/HighVoltageAlarms", None, writeable=True)
-        self._dbusservice.add_path("/History/MinimumTemperature", None, writeable=True)
-        self._dbusservice.add_path("/History/MaximumTemperature", None, writeable=True)
-        self._dbusservice.add_path("/History/DischargedEnergy", None, writeable=True)
-        self._dbusservice.add_path("/History/ChargedEnergy", None, writeable=True)
-        self._dbusservice.add_path("/History/Clear", self.battery.history.clear, writeable=True, onchangecallback=self.battery.history_reset_callback)
-        self._dbusservice.add_path("/History/CanBeCleared", 1, writeable=True)
+        if utils.PUBLISH_PROFILE != "minimal":
+            self._dbusservice.add_path("/History/DeepestDischarge", None, writeable=True)
+            self._dbusservice.add_path("/History/LastDischarge", None, writeable=True)
+            self._dbusservice.add_path("/History/AverageDischarge", None, writeable=True)
+            self._dbusservice.add_path("/History/ChargeCycles", None, writeable=True)
+            self._dbusservice.add_path("/History/FullDischarges", None, writeable=True)
+            self._dbusservice.add_path("/History/TotalAhDrawn", None, writeable=True)
+            self._dbusservice.add_path("/History/MinimumVoltage", None, writeable=True)
+            self._dbusservice.add_path("/History/MaximumVoltage", None, writeable=True)
+            self._dbusservice.add_path("/History/MinimumCellVoltage", None, writeable=True)
+            self._dbusservice.add_path("/History/MaximumCellVoltage", None, writeable=True)
+            self._dbusservice.add_path("/History/TimeSinceLastFullCharge", None, writeable=True)
+            self._dbusservice.add_path("/History/LowVoltageAlarms", None, writeable=True)
+            self._dbusservice.add_path("/History/HighVoltageAlarms", None, writeable=True)
+            self._dbusservice.add_path("/History/MinimumTemperature", None, writeable=True)
+            self._dbusservice.add_path("/History/MaximumTemperature", None, writeable=True)
+            self._dbusservice.add_path("/History/DischargedEnergy", None, writeable=True)
+            self._dbusservice.add_path("/History/ChargedEnergy", None, writeable=True)
+            self._dbusservice.add_path("/History/Clear", self.battery.history.clear, writeable=True, onchangecallback=self.battery.history_reset_callback)
+            self._dbusservice.add_path("/History/CanBeCleared", 1, writeable=True)
 
         self._dbusservice.add_path("/Balancing", None, writeable=True)
         self._dbusservice.add_path("/Io/AllowToCharge", 0, writeable=True)
@@ -657,19 +1223,19 @@ class DbusHelper:
             "/Io/ForceChargingOff",
             (0 if "force_charging_off_callback" in self.battery.available_callbacks else None),
             writeable=True,
-            onchangecallback=self.battery.force_charging_off_callback,
+            onchangecallback=self.locked_callback(self.battery.force_charging_off_callback),
         )
         self._dbusservice.add_path(
             "/Io/ForceDischargingOff",
             (0 if "force_discharging_off_callback" in self.battery.available_callbacks else None),
             writeable=True,
-            onchangecallback=self.battery.force_discharging_off_callback,
+            onchangecallback=self.locked_callback(self.battery.force_discharging_off_callback),
         )
         self._dbusservice.add_path(
             "/Io/TurnBalancingOff",
             (0 if "turn_balancing_off_callback" in self.battery.available_callbacks else None),
             writeable=True,
-            onchangecallback=self.battery.turn_balancing_off_callback,
+            onchangecallback=self.locked_callback(self.battery.turn_balancing_off_callback),
         )
         # self._dbusservice.add_path('/SystemSwitch', 1, writeable=True)
 
@@ -694,16 +1260,21 @@ class DbusHelper:
 
         # cell voltages
         if utils.BATTERY_CELL_DATA_FORMAT > 0:
-            for i in range(1, self.battery.cell_count + 1):
-                cellpath = "/Cell/%s/Volts" if (utils.BATTERY_CELL_DATA_FORMAT & 2) else "/Voltages/Cell%s"
-                self._dbusservice.add_path(
-                    cellpath % (str(i)),
-                    None,
-                    writeable=True,
-                    gettextcallback=lambda p, v: "{:0.3f}V".format(v),
-                )
-                if utils.BATTERY_CELL_DATA_FORMAT & 1:
-                    self._dbusservice.add_path("/Balances/Cell%s" % (str(i)), None, writeable=True)
+            if utils.BATTERY_CELL_DATA_FORMAT & 3:
+                for i in range(1, self.battery.cell_count + 1):
+                    cellpath = "/Cell/%s/Volts" if (utils.BATTERY_CELL_DATA_FORMAT & 2) else "/Voltages/Cell%s"
+                    self._dbusservice.add_path(
+                        cellpath % (str(i)),
+                        None,
+                        writeable=True,
+                        gettextcallback=lambda p, v: "{:0.3f}V".format(v),
+                    )
+                    if utils.BATTERY_CELL_DATA_FORMAT & 1:
+                        self._dbusservice.add_path("/Balances/Cell%s" % (str(i)), None, writeable=True)
+            if utils.BATTERY_CELL_DATA_FORMAT & 4:
+                # all cells in one path
+                self._dbusservice.add_path("/Voltages/Array", None, writeable=True)
+                self._dbusservice.add_path("/Balances/Array", None, writeable=True)
             pathbase = "Cell" if (utils.BATTERY_CELL_DATA_FORMAT & 2) else "Voltages"
             self._dbusservice.add_path(
                 "/%s/Sum" % pathbase,
@@ -719,6 +1290,17 @@ class DbusHelper:
             )
 
         self._dbusservice.add_path("/TimeToGo", None, writeable=True)
+        if utils.TIME_TO_GO_ENABLE:
+            # settings used to calculate the Time-To-Go, kept up to date by signals
+            self.victron_settings = VictronSettings.get_instance()
+            self.victron_settings.subscribe(
+                [
+                    "/Settings/CGwacs/Hub4Mode",
+                    "/Settings/CGwacs/BatteryLife/State",
+                    "/Settings/CGwacs/BatteryLife/MinimumSocLimit",
+                    "/Settings/CGwacs/BatteryLife/SocLimit",
+                ]
+            )
         self._dbusservice.add_path(
             "/CurrentAvg",
             None,
@@ -727,7 +1309,7 @@ class DbusHelper:
         )
 
         # Create TimeToSoC items only if enabled, battery capacity is set and points are available
-        if utils.TIME_TO_GO_ENABLE and self.battery.capacity is not None and len(utils.TIME_TO_SOC_POINTS) > 0:
+        if utils.TIME_TO_GO_ENABLE and self.battery.capacity is not None and len(utils.TIME_TO_SOC_POINTS) > 0 and utils.PUBLISH_PROFILE != "minimal":
             for num in utils.TIME_TO_SOC_POINTS:
                 self._dbusservice.add_path("/TimeToSoC/" + str(num), None, writeable=True)
 
@@ -743,10 +1325,38 @@ class DbusHelper:
                 "/Settings/ResetSoc",
                 0,
                 writeable=True,
-                onchangecallback=self.battery.reset_soc_callback,
+                onchangecallback=self.locked_callback(self.battery.reset_soc_callback),
+            )
+
+        if utils.DIAGNOSTICS_TIMING_ENABLE:
+            self.poll_timing = PollTiming(
+                self.POLL_TIMING_STAGES,
+                self.battery.refresh_scheduler.groups if self.battery.refresh_scheduler is not None else [],
             )
+            self.poll_timing.add_paths(self._dbusservice)
+
+        # start/stop the CPU profiler: 0 = stop, 1 = cProfile, 2 = sampler
+        profiler = Profiler.get_instance()
+        self._dbusservice.add_path(
+            "/Diagnostics/Profile",
+            profiler.mode,
+            writeable=True,
+            onchangecallback=lambda path, value: profiler.set_mode(value),
+        )
+        profiler.on_change.append(self.profiler_changed)
+
+        if utils.MEMORY_WATCHDOG_ENABLE:
+            self._dbusservice.add_path("/Diagnostics/Memory/Rss", None, writeable=False, gettextcallback=lambda p, v: "{:0.2f}MB".format(v))
+            self._dbusservice.add_path("/Diagnostics/Memory/PythonHeap", None, writeable=False, gettextcallback=lambda p, v: "{:0.2f}MB".format(v))
+            MemoryWatchdog.get_instance().on_update.append(self.memory_updated)
 
         self._dbusservice.add_path("/JsonData", None, writeable=False)
+        if utils.PUBLISH_BATTERY_DATA_AS_JSON_COMPACT:
+            self._dbusservice.add_path("/JsonDataCompact", None, writeable=False)
+
+        if utils.PUBLISH_BATTERY_DATA_AS_JSON:
+            # the nested structure is computed once, afterwards only the changes are applied
+            self.json_snapshot = JsonSnapshot(self._dbusservice)
 
         # register VeDbusService after all paths where added
         # https://github.com/victronenergy/velib_python/commit/494f9aef38f46d6cfcddd8b1242336a0a3a79563
@@ -755,6 +1365,40 @@ class DbusHelper:
 
         return True
 
+    def setup_external_sensor(self) -> None:
+        """
+        Track the presence of the external sensor service with a `NameOwnerChanged` signal match
+        and switch between the internal and the external sensor, when it appears or disappears.
+        """
+        bus = self._dbusservice.dbusconn
+        bus.add_signal_receiver(
+            self.external_sensor_owner_changed,
+            signal_name="NameOwnerChanged",
+            dbus_interface="org.freedesktop.DBus",
+            arg0=utils.EXTERNAL_SENSOR_DBUS_DEVICE,
+        )
+
+        # initial state, afterwards only the signal is used
+        if bus.name_has_owner(utils.EXTERNAL_SENSOR_DBUS_DEVICE):
+            self.battery.setup_external_sensor(bus)
+        else:
+            logger.warning(f"External sensor {utils.EXTERNAL_SENSOR_DBUS_DEVICE} not found, using internal sensor until it's available")
+
+    def external_sensor_owner_changed(self, name: str, old_owner: str, new_owner: str) -> None:
+        """
+        Called when the external sensor service appears on or disappears from the dbus.
+
+        :param name: The dbus service name
+        :param old_owner: The old owner, empty if the service appeared
+        :param new_owner: The new owner, empty if the service disappeared
+        """
+        if new_owner:
+            logger.info("External current sensor was connected, switching to external sensor")
+            self.battery.setup_external_sensor(self._dbusservice.dbusconn)
+        elif self.battery.dbus_external_objects is not None:
+            logger.error("External current sensor was disconnected, falling back to internal sensor")
+            self.battery.dbus_external_objects = None
+
     def publish_battery(self, loop) -> None:
         """
         Publishes the battery data to dbus.
@@ -762,30 +1406,72 @@ class DbusHelper:
 
         :param loop: The main loop of the driver.
         """
+        start = monotonic()
         try:
+            result, timings = self.refresh_battery()
+        except Exception:
+            traceback.print_exc()
+            self.battery_failed(loop)
+            return
+
+        self.process_battery(loop, result, start, timings)
+
+    def refresh_battery(self) -> Tuple[bool, Union[dict, None]]:
+        """
+        Read the data from the BMS.
+        With `POLL_IN_WORKER_THREAD` this is called from the worker thread of the battery. The main loop
+        does not use the battery data, until `process_battery()` is called with the result.
+        The durations are not recorded here, since the histograms are published by the main loop.
+
+        :return: The result of `refresh_data()` and the durations of the read and its command groups in seconds,
+            None if the timing is disabled
+        """
+        start = monotonic()
+        with self.battery.refresh_lock:
             # Call the battery's refresh_data function
-            result = self.battery.refresh_data()
+            self.battery.invalidate_refresh_cache()
+            result = self.battery.run_refresh_data()
 
-            # Check if external sensor is still connected
-            if utils.EXTERNAL_SENSOR_DBUS_DEVICE is not None and (
-                utils.EXTERNAL_SENSOR_DBUS_PATH_CURRENT is not None or utils.EXTERNAL_SENSOR_DBUS_PATH_SOC is not None
-            ):
-                # Check if external sensor was and is still connected
-                if self.battery.dbus_external_objects is not None and utils.EXTERNAL_SENSOR_DBUS_DEVICE not in get_bus().list_names():
-                    logger.error("External current sensor was disconnected, falling back to internal sensor")
-                    self.battery.dbus_external_objects = None
+        timings = None
+        if self.poll_timing is not None:
+            timings = {
+                "RefreshData": monotonic() - start,
+                "groups": dict(self.battery.refresh_scheduler.runtimes) if self.battery.refresh_scheduler is not None else {},
+            }
+
+        return result, timings
 
-                # Check if external current sensor was not connected and is now connected
-                elif self.battery.dbus_external_objects is None and utils.EXTERNAL_SENSOR_DBUS_DEVICE in get_bus().list_names():
-                    logger.info("External current sensor was connected, switching to external sensor")
-                    self.battery.setup_external_sensor()
+    def process_battery(self, loop, result: bool, start: float, timings: dict = None) -> None:
+        """
+        Calculate the values of the battery and publish them to dbus, after the data was read from the BMS.
+
+        :param loop: The main loop of the driver.
+        :param result: The result of `refresh_battery()`
+        :param start: Monotonic timestamp of when the refresh started
+        :param timings: The durations of the read from `refresh_battery()`
+        """
+        try:
+            if self.poll_timing is not None and timings is not None:
+                self.poll_timing.record("RefreshData", timings["RefreshData"])
+                self.poll_timing.record_groups(timings["groups"])
+
+            now = monotonic()
 
             # Calculate the values for the battery
             self.battery.set_calculated_data()
+            now = self.record_timing("SetCalculatedData", now)
+
+            # Derived values are calculated only once until the next refresh
+            self.battery.new_refresh_epoch()
 
             if result:
                 # reset error variables
                 self.error["count"] = 0
+
+                # read also the slow groups in the next cycle, since they are outdated after an offline period
+                if not self.battery.online and self.battery.refresh_scheduler is not None:
+                    self.battery.refresh_scheduler.reset()
+
                 self.battery.online = True
                 self.battery.connection_info = "Connected"
 
@@ -845,17 +1531,23 @@ class DbusHelper:
 
                 # if the battery did not update in 60 second, it's assumed to be completely failed
                 if time_since_first_error >= 60 and (utils.BLOCK_ON_DISCONNECT or not self.cell_voltages_good):
-                    loop.quit()
+                    self.battery_failed(loop)
 
                 # if the cells are between 3.2 and 3.3 volt we can continue for some time
                 if time_since_first_error >= 60 * utils.BLOCK_ON_DISCONNECT_TIMEOUT_MINUTES and not utils.BLOCK_ON_DISCONNECT:
-                    loop.quit()
+                    self.battery_failed(loop)
+
+            # Calculate the driver debug info only if it's published and read
+            self.battery.charge_mode_debug_enabled = self.is_debug_requested()
 
             # This is to manage CVCL
+            now = monotonic()
             self.battery.manage_charge_voltage()
+            now = self.record_timing("ManageChargeVoltage", now)
 
             # This is to manage CCL\DCL
             self.battery.manage_charge_and_discharge_current()
+            self.record_timing("ManageChargeAndDischargeCurrent", now)
 
             # Manage battery error code reset
             # Check if the error code should be reset every hour
@@ -879,159 +1571,296 @@ class DbusHelper:
                 self.battery.state = 9
 
             # publish all the data from the battery object to dbus
+            now = monotonic()
             self.publish_dbus()
+            self.record_timing("PublishDbus", now)
+            self.record_timing("Total", start)
 
             # upload telemetry data
             self.telemetry_upload()
 
         except Exception:
             traceback.print_exc()
+            self.battery_failed(loop)
+
+    def battery_failed(self, loop) -> None:
+        """
+        Called, when the battery failed completely. Quits the main loop, so that the driver is restarted and detects
+        the battery again. With `on_battery_failed` only this battery is marked offline and the main loop keeps running.
+
+        :param loop: The main loop of the driver.
+        :return: None
+        """
+        if self.on_battery_failed is None:
             loop.quit()
+            return
+
+        if self.battery.online:
+            self.battery.online = False
+            self.battery.init_values()
+
+        self.on_battery_failed()
+
+    def record_timing(self, stage: str, start: float) -> float:
+        """
+        Record the duration of a stage of the poll cycle, if the timing is enabled.
+
+        :param stage: The name of the stage
+        :param start: Monotonic timestamp of when the stage started
+        :return: Monotonic timestamp of now, to be used as start of the next stage
+        """
+        now = monotonic()
+        if self.poll_timing is not None:
+            self.poll_timing.record(stage, now - start)
+        return now
+
+    def profiler_changed(self, mode: int) -> None:
+        """
+        Update `/Diagnostics/Profile`, when a profile is started or stopped.
+
+        :param mode: The mode of the profiler
+        :return: None
+        """
+        self.publisher["/Diagnostics/Profile"] = mode
+        self.flush_publisher()
+
+    def flush_publisher(self) -> None:
+        """
+        Send the values written to the publisher outside of the poll cycle.
+        The values are also applied to the JSON data, which is serialized with the next poll cycle.
+
+        :return: None
+        """
+        if self.json_snapshot is not None:
+            self.json_snapshot.update(self.publisher.values)
+        self.publisher.flush()
+
+    def memory_updated(self, watchdog: MemoryWatchdog) -> None:
+        """
+        Update `/Diagnostics/Memory/`, when the memory watchdog read the memory usage.
+
+        :param watchdog: The memory watchdog
+        :return: None
+        """
+        self.publisher["/Diagnostics/Memory/Rss"] = round(watchdog.rss / 1024 / 1024, 2) if watchdog.rss is not None else None
+        self.publisher["/Diagnostics/Memory/PythonHeap"] = round(watchdog.heap / 1024 / 1024, 2) if watchdog.heap is not None else None
+        self.flush_publisher()
+
+    def locked_callback(self, callback: Callable) -> Callable:
+        """
+        Wrap a callback that writes to the BMS, so that it does not interfere with a running refresh.
+
+        If the BMS is read in a worker thread, the callback is queued to the worker, which runs it between two reads.
+        The value is accepted immediately, so that the main loop is not blocked while the worker waits for the BMS,
+        and restored by `callback_rejected()`, if the callback fails.
+
+        :param callback: The callback with the arguments path and value
+        :return: The wrapped callback
+        """
+
+        def wrapper(path, value):
+            if self.queue_callback is not None:
+                self.queue_callback(callback, path, value, self._dbusservice[path])
+                return True
+
+            with self.battery.refresh_lock:
+                return callback(path, value)
+
+        return wrapper
+
+    def callback_rejected(self, path: str, value) -> bool:
+        """
+        Restore the value of a path, after its queued callback failed. Called in the main loop.
+
+        :param path: The dbus path
+        :param value: The value before the write
+        :return: Always returns False, to run only once
+        """
+        logger.error(f"Setting {path} failed, restoring the previous value")
+        self.publisher[path] = value
+        self.flush_publisher()
+        return False
+
+    def is_debug_requested(self) -> bool:
+        """
+        Check if the driver debug info should be calculated.
+
+        It's calculated, if the debug paths are published and, with PUBLISH_DEBUG_ON_DEMAND_TIMEOUT set,
+        one of them was read within the timeout.
+
+        :return: True if the debug info should be calculated, otherwise False
+        """
+        if not self.debug_items:
+            return False
+
+        if utils.PUBLISH_DEBUG_ON_DEMAND_TIMEOUT == 0:
+            return True
+
+        read_last_time = max(item.read_last_time for item in self.debug_items)
+        return read_last_time > 0 and monotonic() - read_last_time < utils.PUBLISH_DEBUG_ON_DEMAND_TIMEOUT
 
     def publish_dbus(self) -> None:
         """
         Publishes the battery data to dbus and refresh it.
         """
-        self._dbusservice["/System/NrOfCellsPerBattery"] = self.battery.cell_count
+        self.publisher["/System/NrOfCellsPerBattery"] = self.battery.cell_count
         if utils.SOC_CALCULATION or utils.EXTERNAL_SENSOR_DBUS_PATH_SOC is not None:
-            self._dbusservice["/Soc"] = round(self.battery.soc_calc, 2) if self.battery.soc_calc is not None else None
+            self.publisher["/Soc"] = round(self.battery.soc_calc, 2) if self.battery.soc_calc is not None else None
             # add original SOC for comparing
-            self._dbusservice["/SocBms"] = round(self.battery.soc, 2) if self.battery.soc is not None else None
+            self.publisher["/SocBms"] = round(self.battery.soc, 2) if self.battery.soc is not None else None
         else:
-            self._dbusservice["/Soc"] = round(self.battery.soc_calc, 2) if self.battery.soc is not None else None
-        self._dbusservice["/Dc/0/Voltage"] = round(self.battery.voltage, 2) if self.battery.voltage is not None else None
-        self._dbusservice["/Dc/0/Current"] = round(self.battery.current_calc, 2) if self.battery.current_calc is not None else None
-        self._dbusservice["/Dc/0/Power"] = round(self.battery.power_calc, 2) if self.battery.power_calc is not None else None
-        self._dbusservice["/Dc/0/Temperature"] = self.battery.get_temperature()
-        self._dbusservice["/Capacity"] = self.battery.get_capacity_remain()
-        self._dbusservice["/ConsumedAmphours"] = self.battery.get_capacity_consumed()
-
-        midpoint, deviation = self.battery.get_midvoltage()
-        if midpoint is not None:
-            self._dbusservice["/Dc/0/MidVoltage"] = midpoint
-            self._dbusservice["/Dc/0/MidVoltageDeviation"] = deviation
+            self.publisher["/Soc"] = round(self.battery.soc_calc, 2) if self.battery.soc is not None else None
+        self.publisher["/Dc/0/Voltage"] = round(self.battery.voltage, 2) if self.battery.voltage is not None else None
+        self.publisher["/Dc/0/Current"] = round(self.battery.current_calc, 2) if self.battery.current_calc is not None else None
+        self.publisher["/Dc/0/Power"] = round(self.battery.power_calc, 2) if self.battery.power_calc is not None else None
+        self.publisher["/Dc/0/Temperature"] = self.battery.get_temperature()
+        self.publisher["/Capacity"] = self.battery.get_capacity_remain()
+        self.publisher["/ConsumedAmphours"] = self.battery.get_capacity_consumed()
+
+        if utils.MIDPOINT_ENABLE and utils.PUBLISH_PROFILE != "minimal":
+            midpoint, deviation = self.battery.get_midvoltage()
+            if midpoint is not None:
+                self.publisher["/Dc/0/MidVoltage"] = midpoint
+                self.publisher["/Dc/0/MidVoltageDeviation"] = deviation
 
         # Update battery extras
-        self._dbusservice["/State"] = self.battery.state
+        self.publisher["/State"] = self.battery.state
         # https://github.com/victronenergy/veutil/blob/master/inc/veutil/ve_regs_payload.h
         # https://github.com/victronenergy/veutil/blob/master/src/qt/bms_error.cpp
-        self._dbusservice["/ErrorCode"] = self.battery.error_code
-        self._dbusservice["/ConnectionInformation"] = self.battery.connection_info
+        self.publisher["/ErrorCode"] = self.battery.error_code
+        self.publisher["/ConnectionInformation"] = self.battery.connection_info
 
-        self._dbusservice["/History/DeepestDischarge"] = (
-            abs(self.battery.history.deepest_discharge) * -1 if self.battery.history.deepest_discharge is not None else None
-        )
-        self._dbusservice["/History/LastDischarge"] = abs(self.battery.history.last_discharge) * -1 if self.battery.history.last_discharge is not None else None
-        self._dbusservice["/History/AverageDischarge"] = (
-            abs(self.battery.history.average_discharge) * -1 if self.battery.history.average_discharge is not None else None
-        )
-        self._dbusservice["/History/TotalAhDrawn"] = abs(self.battery.history.total_ah_drawn) * -1 if self.battery.history.total_ah_drawn is not None else None
-        self._dbusservice["/History/ChargeCycles"] = self.battery.history.charge_cycles
-        self._dbusservice["/History/FullDischarges"] = self.battery.history.full_discharges
-        self._dbusservice["/History/MinimumVoltage"] = self.battery.history.minimum_voltage
-        self._dbusservice["/History/MaximumVoltage"] = self.battery.history.maximum_voltage
-        self._dbusservice["/History/MinimumCellVoltage"] = self.battery.history.minimum_cell_voltage
-        self._dbusservice["/History/MaximumCellVoltage"] = self.battery.history.maximum_cell_voltage
-        self._dbusservice["/History/TimeSinceLastFullCharge"] = (
-            int(time()) - self.battery.history.timestamp_last_full_charge if self.battery.history.timestamp_last_full_charge is not None else None
-        )
-        self._dbusservice["/History/LowVoltageAlarms"] = self.battery.history.low_voltage_alarms
-        self._dbusservice["/History/HighVoltageAlarms"] = self.battery.history.high_voltage_alarms
-        self._dbusservice["/History/MinimumTemperature"] = self.battery.history.minimum_temperature
-        self._dbusservice["/History/MaximumTemperature"] = self.battery.history.maximum_temperature
-        self._dbusservice["/History/DischargedEnergy"] = self.battery.history.discharged_energy
-        self._dbusservice["/History/ChargedEnergy"] = self.battery.history.charged_energy
-        self._dbusservice["/History/Clear"] = self.battery.history.clear
-
-        self._dbusservice["/Io/AllowToCharge"] = 1 if self.battery.get_allow_to_charge() else 0
-        self._dbusservice["/Io/AllowToDischarge"] = 1 if self.battery.get_allow_to_discharge() else 0
-        self._dbusservice["/Io/AllowToBalance"] = 1 if self.battery.get_allow_to_balance() else 0
-        self._dbusservice["/System/NrOfModulesBlockingCharge"] = 0 if self.battery.get_allow_to_charge() else 1
-        self._dbusservice["/System/NrOfModulesBlockingDischarge"] = 0 if self.battery.get_allow_to_discharge() else 1
-        self._dbusservice["/System/NrOfModulesOnline"] = 1 if self.battery.online else 0
-        self._dbusservice["/System/NrOfModulesOffline"] = 0 if self.battery.online else 1
-        self._dbusservice["/System/MinCellTemperature"] = self.battery.get_min_temperature()
-        self._dbusservice["/System/MinTemperatureCellId"] = self.battery.get_min_temperature_id()
-        self._dbusservice["/System/MaxCellTemperature"] = self.battery.get_max_temperature()
-        self._dbusservice["/System/MaxTemperatureCellId"] = self.battery.get_max_temperature_id()
-        self._dbusservice["/System/MOSTemperature"] = self.battery.temperature_mos
-        self._dbusservice["/System/Temperature1"] = self.battery.temperature_1
-        self._dbusservice["/System/Temperature1Name"] = utils.TEMPERATURE_1_NAME
-        self._dbusservice["/System/Temperature2"] = self.battery.temperature_2
-        self._dbusservice["/System/Temperature2Name"] = utils.TEMPERATURE_2_NAME
-        self._dbusservice["/System/Temperature3"] = self.battery.temperature_3
-        self._dbusservice["/System/Temperature3Name"] = utils.TEMPERATURE_3_NAME
-        self._dbusservice["/System/Temperature4"] = self.battery.temperature_4
-        self._dbusservice["/System/Temperature4Name"] = utils.TEMPERATURE_4_NAME
+        if utils.PUBLISH_PROFILE != "minimal":
+            self.publisher["/History/DeepestDischarge"] = (
+                abs(self.battery.history.deepest_discharge) * -1 if self.battery.history.deepest_discharge is not None else None
+            )
+            self.publisher["/History/LastDischarge"] = (
+                abs(self.battery.history.last_discharge) * -1 if self.battery.history.last_discharge is not None else None
+            )
+            self.publisher["/History/AverageDischarge"] = (
+                abs(self.battery.history.average_discharge) * -1 if self.battery.history.average_discharge is not None else None
+            )
+            self.publisher["/History/TotalAhDrawn"] = abs(self.battery.history.total_ah_drawn) * -1 if self.battery.history.total_ah_drawn is not None else None
+            self.publisher["/History/ChargeCycles"] = self.battery.history.charge_cycles
+            self.publisher["/History/FullDischarges"] = self.battery.history.full_discharges
+            self.publisher["/History/MinimumVoltage"] = self.battery.history.minimum_voltage
+            self.publisher["/History/MaximumVoltage"] = self.battery.history.maximum_voltage
+            self.publisher["/History/MinimumCellVoltage"] = self.battery.history.minimum_cell_voltage
+            self.publisher["/History/MaximumCellVoltage"] = self.battery.history.maximum_cell_voltage
+            self.publisher["/History/TimeSinceLastFullCharge"] = (
+                int(time()) - self.battery.history.timestamp_last_full_charge if self.battery.history.timestamp_last_full_charge is not None else None
+            )
+            self.publisher["/History/LowVoltageAlarms"] = self.battery.history.low_voltage_alarms
+            self.publisher["/History/HighVoltageAlarms"] = self.battery.history.high_voltage_alarms
+            self.publisher["/History/MinimumTemperature"] = self.battery.history.minimum_temperature
+            self.publisher["/History/MaximumTemperature"] = self.battery.history.maximum_temperature
+            self.publisher["/History/DischargedEnergy"] = self.battery.history.discharged_energy
+            self.publisher["/History/ChargedEnergy"] = self.battery.history.charged_energy
+            self.publisher["/History/Clear"] = self.battery.history.clear
+
+        self.publisher["/Io/AllowToCharge"] = 1 if self.battery.get_allow_to_charge() else 0
+        self.publisher["/Io/AllowToDischarge"] = 1 if self.battery.get_allow_to_discharge() else 0
+        self.publisher["/Io/AllowToBalance"] = 1 if self.battery.get_allow_to_balance() else 0
+        self.publisher["/System/NrOfModulesBlockingCharge"] = 0 if self.battery.get_allow_to_charge() else 1
+        self.publisher["/System/NrOfModulesBlockingDischarge"] = 0 if self.battery.get_allow_to_discharge() else 1
+        self.publisher["/System/NrOfModulesOnline"] = 1 if self.battery.online else 0
+        self.publisher["/System/NrOfModulesOffline"] = 0 if self.battery.online else 1
+        self.publisher["/System/MinCellTemperature"] = self.battery.get_min_temperature()
+        self.publisher["/System/MinTemperatureCellId"] = self.battery.get_min_temperature_id()
+        self.publisher["/System/MaxCellTemperature"] = self.battery.get_max_temperature()
+        self.publisher["/System/MaxTemperatureCellId"] = self.battery.get_max_temperature_id()
+        self.publisher["/System/MOSTemperature"] = self.battery.temperature_mos
+        if utils.PUBLISH_PROFILE != "minimal":
+            self.publisher["/System/Temperature1"] = self.battery.temperature_1
+            self.publisher["/System/Temperature1Name"] = utils.TEMPERATURE_1_NAME
+            self.publisher["/System/Temperature2"] = self.battery.temperature_2
+            self.publisher["/System/Temperature2Name"] = utils.TEMPERATURE_2_NAME
+            self.publisher["/System/Temperature3"] = self.battery.temperature_3
+            self.publisher["/System/Temperature3Name"] = utils.TEMPERATURE_3_NAME
+            self.publisher["/System/Temperature4"] = self.battery.temperature_4
+            self.publisher["/System/Temperature4Name"] = utils.TEMPERATURE_4_NAME
 
         # Voltage control
-        self._dbusservice["/Info/BatteryLowVoltage"] = self.battery.min_battery_voltage
-        self._dbusservice["/Info/MaxChargeVoltage"] = (
+        self.publisher["/Info/BatteryLowVoltage"] = self.battery.min_battery_voltage
+        self.publisher["/Info/MaxChargeVoltage"] = (
             round(self.battery.control_voltage + utils.VOLTAGE_DROP, 2) if self.battery.control_voltage is not None else None
         )
 
         # Charge control
-        self._dbusservice["/Info/MaxChargeCurrent"] = self.battery.control_charge_current
-        self._dbusservice["/Info/MaxDischargeCurrent"] = self.battery.control_discharge_current
+        self.publisher["/Info/MaxChargeCurrent"] = self.battery.control_charge_current
+        self.publisher["/Info/MaxDischargeCurrent"] = self.battery.control_discharge_current
 
         # Voltage and charge control info (custom dbus paths)
-        self._dbusservice["/Info/ChargeMode"] = self.battery.charge_mode
-        self._dbusservice["/Info/ChargeModeDebug"] = self.battery.charge_mode_debug
-        self._dbusservice["/Info/ChargeModeDebugFloat"] = self.battery.charge_mode_debug_float
-        self._dbusservice["/Info/ChargeModeDebugBulk"] = self.battery.charge_mode_debug_bulk
-        self._dbusservice["/Info/ChargeLimitation"] = self.battery.charge_limitation
-        self._dbusservice["/Info/DischargeLimitation"] = self.battery.discharge_limitation
+        self.publisher["/Info/ChargeMode"] = self.battery.charge_mode
+        self.publisher["/Info/PollInterval"] = self.battery.poll_interval / 1000
+        if self.battery.charge_mode_debug_enabled:
+            self.publisher["/Info/ChargeModeDebug"] = self.battery.charge_mode_debug
+            self.publisher["/Info/ChargeModeDebugFloat"] = self.battery.charge_mode_debug_float
+            self.publisher["/Info/ChargeModeDebugBulk"] = self.battery.charge_mode_debug_bulk
+        self.publisher["/Info/ChargeLimitation"] = self.battery.charge_limitation
+        self.publisher["/Info/DischargeLimitation"] = self.battery.discharge_limitation
 
         # Updates from cells
-        self._dbusservice["/System/MinVoltageCellId"] = self.battery.get_min_cell_desc()
-        self._dbusservice["/System/MaxVoltageCellId"] = self.battery.get_max_cell_desc()
-        self._dbusservice["/System/MinCellVoltage"] = self.battery.get_min_cell_voltage()
-        self._dbusservice["/System/MaxCellVoltage"] = self.battery.get_max_cell_voltage()
-        self._dbusservice["/Balancing"] = self.battery.get_balancing()
+        self.publisher["/System/MinVoltageCellId"] = self.battery.get_min_cell_desc()
+        self.publisher["/System/MaxVoltageCellId"] = self.battery.get_max_cell_desc()
+        self.publisher["/System/MinCellVoltage"] = self.battery.get_min_cell_voltage()
+        self.publisher["/System/MaxCellVoltage"] = self.battery.get_max_cell_voltage()
+        self.publisher["/Balancing"] = self.battery.get_balancing()
 
         # Update the alarms
         self.battery.protection.set_previous()
-        self._dbusservice["/Alarms/LowVoltage"] = self.battery.protection.low_voltage
-        self._dbusservice["/Alarms/LowCellVoltage"] = self.battery.protection.low_cell_voltage
+        self.publisher["/Alarms/LowVoltage"] = self.battery.protection.low_voltage
+        self.publisher["/Alarms/LowCellVoltage"] = self.battery.protection.low_cell_voltage
         # disable high voltage warning temporarly, if loading to bulk voltage and bulk voltage reached is 30 minutes ago
-        self._dbusservice["/Alarms/HighVoltage"] = (
+        self.publisher["/Alarms/HighVoltage"] = (
             self.battery.protection.high_voltage
             if (self.battery.soc_reset_requested is False and self.battery.soc_reset_last_reached < int(time()) - (60 * 30))
             else 0
         )
-        self._dbusservice["/Alarms/HighCellVoltage"] = (
+        self.publisher["/Alarms/HighCellVoltage"] = (
             self.battery.protection.high_cell_voltage
             if (self.battery.soc_reset_requested is False and self.battery.soc_reset_last_reached < int(time()) - (60 * 30))
             else 0
         )
-        self._dbusservice["/Alarms/LowSoc"] = self.battery.protection.low_soc
-        self._dbusservice["/Alarms/HighChargeCurrent"] = self.battery.protection.high_charge_current
-        self._dbusservice["/Alarms/HighDischargeCurrent"] = self.battery.protection.high_discharge_current
-        self._dbusservice["/Alarms/CellImbalance"] = self.battery.protection.cell_imbalance
-        self._dbusservice["/Alarms/InternalFailure"] = self.battery.protection.internal_failure
-        self._dbusservice["/Alarms/HighChargeTemperature"] = self.battery.protection.high_charge_temperature
-        self._dbusservice["/Alarms/LowChargeTemperature"] = self.battery.protection.low_charge_temperature
-        self._dbusservice["/Alarms/HighTemperature"] = self.battery.protection.high_temperature
-        self._dbusservice["/Alarms/LowTemperature"] = self.battery.protection.low_temperature
-        self._dbusservice["/Alarms/BmsCable"] = 2 if self.battery.block_because_disconnect else 0
-        self._dbusservice["/Alarms/HighInternalTemperature"] = self.battery.protection.high_internal_temperature
-        self._dbusservice["/Alarms/FuseBlown"] = self.battery.protection.fuse_blown
+        self.publisher["/Alarms/LowSoc"] = self.battery.protection.low_soc
+        self.publisher["/Alarms/HighChargeCurrent"] = self.battery.protection.high_charge_current
+        self.publisher["/Alarms/HighDischargeCurrent"] = self.battery.protection.high_discharge_current
+        self.publisher["/Alarms/CellImbalance"] = self.battery.protection.cell_imbalance
+        self.publisher["/Alarms/InternalFailure"] = self.battery.protection.internal_failure
+        self.publisher["/Alarms/HighChargeTemperature"] = self.battery.protection.high_charge_temperature
+        self.publisher["/Alarms/LowChargeTemperature"] = self.battery.protection.low_charge_temperature
+        self.publisher["/Alarms/HighTemperature"] = self.battery.protection.high_temperature
+        self.publisher["/Alarms/LowTemperature"] = self.battery.protection.low_temperature
+        self.publisher["/Alarms/BmsCable"] = 2 if self.battery.block_because_disconnect else 0
+        self.publisher["/Alarms/HighInternalTemperature"] = self.battery.protection.high_internal_temperature
+        self.publisher["/Alarms/FuseBlown"] = self.battery.protection.fuse_blown
 
         # cell voltages
         if utils.BATTERY_CELL_DATA_FORMAT > 0:
             try:
                 voltage_sum = 0
+                voltages = []
+                balances = []
                 for i in range(self.battery.cell_count):
                     voltage = self.battery.get_cell_voltage(i)
-                    cellpath = "/Cell/%s/Volts" if (utils.BATTERY_CELL_DATA_FORMAT & 2) else "/Voltages/Cell%s"
-                    self._dbusservice[cellpath % (str(i + 1))] = voltage
-                    if utils.BATTERY_CELL_DATA_FORMAT & 1:
-                        self._dbusservice["/Balances/Cell%s" % (str(i + 1))] = self.battery.get_cell_balancing(i)
+                    if utils.BATTERY_CELL_DATA_FORMAT & 3:
+                        cellpath = "/Cell/%s/Volts" if (utils.BATTERY_CELL_DATA_FORMAT & 2) else "/Voltages/Cell%s"
+                        self.publisher[cellpath % (str(i + 1))] = voltage
+                        if utils.BATTERY_CELL_DATA_FORMAT & 1:
+                            self.publisher["/Balances/Cell%s" % (str(i + 1))] = self.battery.get_cell_balancing(i)
+                    if utils.BATTERY_CELL_DATA_FORMAT & 4:
+                        # 0 for cells without a value, since an array can't contain invalid values
+                        voltages.append(float(voltage) if voltage is not None else 0.0)
+                        balances.append(self.battery.get_cell_balancing(i) or 0)
                     if voltage:
                         voltage_sum += voltage
+                if utils.BATTERY_CELL_DATA_FORMAT & 4:
+                    # publish all cells at once, which needs only one signal instead of one per cell
+                    self.publisher["/Voltages/Array"] = voltages
+                    self.publisher["/Balances/Array"] = balances
                 pathbase = "Cell" if (utils.BATTERY_CELL_DATA_FORMAT & 2) else "Voltages"
-                self._dbusservice["/%s/Sum" % pathbase] = round(voltage_sum, 2)
-                self._dbusservice["/%s/Diff" % pathbase] = round(
+                self.publisher["/%s/Sum" % pathbase] = round(voltage_sum, 2)
+                self.publisher["/%s/Diff" % pathbase] = round(
                     self.battery.get_max_cell_voltage() - self.battery.get_min_cell_voltage(),
                     3,
                 )
@@ -1047,19 +1876,13 @@ class DbusHelper:
         # Calculate average current for the last 300 cycles
         self.battery.previous_current_avg = self.battery.current_avg
         if self.battery.current_calc is not None:
-            self.battery.current_avg_lst.append(self.battery.current_calc)
-            # delete oldest value
-            if len(self.battery.current_avg_lst) > 300:
-                del self.battery.current_avg_lst[0]
-
-            self.battery.current_avg = round(
-                sum(self.battery.current_avg_lst) / len(self.battery.current_avg_lst),
-                2,
-            )
+            # the window drops the oldest value and keeps the sum up to date
+            self.battery.current_avg_window.append(self.battery.current_calc)
+            self.battery.current_avg = round(self.battery.current_avg_window.get_mean(), 2)
         else:
             self.battery.current_avg = None
 
-        self._dbusservice["/CurrentAvg"] = self.battery.current_avg
+        self.publisher["/CurrentAvg"] = self.battery.current_avg
 
         # Update TimeToGo and/or TimeToSoC
         try:
@@ -1078,39 +1901,22 @@ class DbusHelper:
                 # Update TimeToGo item
                 if utils.TIME_TO_GO_ENABLE and percent_per_seconds is not None:
 
-                    # Get settings from dbus
-                    settings_battery_life = self.get_settings_with_values(
-                        get_bus(),
-                        "com.victronenergy.settings",
-                        "/Settings/CGwacs/BatteryLife",
-                    )
-                    settings_hub4mode = self.get_settings_with_values(
-                        get_bus(),
-                        "com.victronenergy.settings",
-                        "/Settings/CGwacs/Hub4Mode",
-                    )
-
-                    hub4mode = int(settings_hub4mode["Settings"]["CGwacs"]["Hub4Mode"]) if "Settings" in settings_hub4mode else None
-                    state = (
-                        int(settings_battery_life["Settings"]["CGwacs"]["BatteryLife"]["State"])
-                        if "Settings" in settings_battery_life and "State" in settings_battery_life["Settings"]["CGwacs"]["BatteryLife"]
-                        else None
-                    )
+                    # Get settings from the cache, which is kept up to date by dbus signals
+                    hub4mode = self.victron_settings.get_value("/Settings/CGwacs/Hub4Mode")
+                    hub4mode = int(hub4mode) if hub4mode is not None else None
+                    state = self.victron_settings.get_value("/Settings/CGwacs/BatteryLife/State")
+                    state = int(state) if state is not None else None
+                    minimum_soc_limit = self.victron_settings.get_value("/Settings/CGwacs/BatteryLife/MinimumSocLimit")
+                    soc_limit = self.victron_settings.get_value("/Settings/CGwacs/BatteryLife/SocLimit")
 
-                    if (
-                        hub4mode == 1
-                        and state != 9
-                        and "Settings" in settings_battery_life
-                        and "MinimumSocLimit" in settings_battery_life["Settings"]["CGwacs"]["BatteryLife"]
-                        and "SocLimit" in settings_battery_life["Settings"]["CGwacs"]["BatteryLife"]
-                    ):
+                    if hub4mode == 1 and state != 9 and minimum_soc_limit is not None and soc_limit is not None:
                         # Optimized without BatteryLife
-                        if state >= 10 and state <= 12:
-                            time_to_go_soc = int(float(settings_battery_life["Settings"]["CGwacs"]["BatteryLife"]["MinimumSocLimit"]))
+                        if state is not None and state >= 10 and state <= 12:
+                            time_to_go_soc = int(float(minimum_soc_limit))
                             logger.debug(f"Time-to-Go: Use /Settings/CGwacs/BatteryLife/MinimumSocLimit: {time_to_go_soc}")
                         # Optimized with BatteryLife
                         else:
-                            time_to_go_soc = int(float(settings_battery_life["Settings"]["CGwacs"]["BatteryLife"]["SocLimit"]))
+                            time_to_go_soc = int(float(soc_limit))
                             logger.debug(f"Time-to-Go: Use /Settings/CGwacs/BatteryLife/SocLimit: {time_to_go_soc}")
                     # External control
                     # Keep batteries charged
@@ -1128,12 +1934,12 @@ class DbusHelper:
                     )
 
                     # Check that time_to_go is not None and current is not near zero
-                    self._dbusservice["/TimeToGo"] = abs(int(time_to_go)) if time_to_go is not None and abs(self.battery.current_avg) > 0.1 else None
+                    self.publisher["/TimeToGo"] = abs(int(time_to_go)) if time_to_go is not None and abs(self.battery.current_avg) > 0.1 else None
 
                 # Update TimeToSoc items
-                if len(utils.TIME_TO_SOC_POINTS) > 0:
+                if len(utils.TIME_TO_SOC_POINTS) > 0 and utils.PUBLISH_PROFILE != "minimal":
                     for num in utils.TIME_TO_SOC_POINTS:
-                        self._dbusservice["/TimeToSoC/" + str(num)] = (
+                        self.publisher["/TimeToSoC/" + str(num)] = (
                             self.battery.get_time_to_soc(num, percent_per_seconds) if self.battery.current_avg else None
                         )
 
@@ -1147,80 +1953,92 @@ class DbusHelper:
             logger.error("Non blocking exception occurred: " + f"{repr(exception_object)} of type {exception_type} in {file} line #{line}")
 
         # calculate history values every 60 seconds
-        if utils.HISTORY_ENABLE and int(time()) - self.history_calculated_last_time > 60:
+        if utils.HISTORY_ENABLE and utils.PUBLISH_PROFILE != "minimal" and int(time()) - self.history_calculated_last_time > 60:
+            start = monotonic()
             self.battery.history_calculate_values()
             self.history_calculated_last_time = int(time())
+            self.record_timing("History", start)
 
-        # save settings every 15 seconds to dbus
-        if int(time()) % 15:
-            self.save_current_battery_state()
+        # collect the changed battery state and save it every SAVE_BATTERY_STATE_INTERVAL seconds to dbus
+        start = monotonic()
+        self.save_current_battery_state()
+        if monotonic() - self.settings_store.flushed_last_time >= utils.SAVE_BATTERY_STATE_INTERVAL:
+            self.flush_battery_state()
+        self.record_timing("SaveBatteryState", start)
 
         if self.battery.soc is not None:
             logger.debug("logged to dbus [%s]" % str(round(self.battery.soc, 2)))
             self.battery.log_cell_data()
 
         if self.battery.has_settings:
-            self._dbusservice["/Settings/ResetSoc"] = self.battery.reset_soc
+            self.publisher["/Settings/ResetSoc"] = self.battery.reset_soc
 
-        # get all paths from the dbus service
-        if utils.PUBLISH_BATTERY_DATA_AS_JSON:
-            all_items = self._dbusservice._dbusnodes["/"].GetItems()
+        # publish the durations of the poll cycle stages every DIAGNOSTICS_TIMING_INTERVAL seconds
+        if self.poll_timing is not None:
+            self.poll_timing.publish(self.publisher)
 
-            # Convert dbus data types to python native data types
-            all_items = {key: self.dbus_to_python(value["Value"]) for key, value in all_items.items()}
+        # apply the changes of this cycle to the JSON data and serialize it only if something changed
+        if utils.PUBLISH_BATTERY_DATA_AS_JSON:
+            self.json_snapshot.update(self.publisher.values)
 
-            # Filter out unwanted keys
-            filtered_data = {key: value for key, value in all_items.items() if key not in ["/JsonData", "/Settings/ResetSoc", "/Settings/HasSettings"]}
+            # apply values changed from outside every 60 seconds
+            if int(time()) - self.json_snapshot_synced_last_time >= 60:
+                self.json_snapshot.sync()
+                self.json_snapshot_synced_last_time = int(time())
 
-            # Set empty lists to empty string
-            filtered_data = {key: "" if value == [] else value for key, value in filtered_data.items()}
+            if self.json_snapshot.changed:
+                self.publisher["/JsonData"] = self.json_snapshot.dumps()
 
-            cascaded_data_json = json.dumps(self.cascade_data(filtered_data))
+            if utils.PUBLISH_BATTERY_DATA_AS_JSON_COMPACT and self.json_snapshot.changed_compact:
+                self.publisher["/JsonDataCompact"] = self.json_snapshot.dumps_compact()
 
-            # publish the data to the JsonData path
-            self._dbusservice["/JsonData"] = cascaded_data_json
+        # send all changes of this cycle at once
+        self.publisher.flush()
 
-    def dbus_to_python(self, data) -> any:
+    def get_settings_devices(self, bus) -> dict:
         """
-        convert dbus data types to python native data types
+        Get all settings with values below `/Settings/Devices` from dbus.
+
+        The settings are read only once and shared by all batteries of the process.
+        Each battery adds its own settings to the cached settings in `setup_instance()`.
 
-        :param data: The data to convert.
-        :return: The converted data.
+        :param bus: The dbus object.
+        :return: A dictionary with all settings and values.
         """
-        if isinstance(data, dbus.String):
-            data = str(data)
-        elif isinstance(data, dbus.Boolean):
-            data = bool(data)
-        elif isinstance(data, dbus.Int64):
-            data = int(data)
-        elif isinstance(data, dbus.Double):
-            data = float(data)
-        elif isinstance(data, dbus.Array):
-            data = [self.dbus_to_python(value) for value in data]
-        elif isinstance(data, dbus.Dictionary):
-            new_data = dict()
-            for key in data.keys():
-                new_data[self.dbus_to_python(key)] = self.dbus_to_python(data[key])
-            data = new_data
-        return data
+        if DbusHelper.settings_devices is None:
+            DbusHelper.settings_devices = self.get_settings_subtree(bus, "com.victronenergy.settings", "/Settings/Devices")
 
-    def cascade_data(self, data) -> dict:
+        return DbusHelper.settings_devices
+
+    def get_settings_subtree(self, bus, service: str, object_path: str) -> dict:
         """
-        Cascade the data to a nested dictionary structure.
+        Get all settings with values below a path from dbus with one call.
+
+        Localsettings returns all values below a path with a single `GetValue` call on the path.
+        If this is not supported, it falls back to `get_settings_with_values()`, which introspects each node.
 
-        :param data: The data to cascade.
-        :return: The cascaded data.
+        :param bus: The dbus object.
+        :param service: The service name.
+        :param object_path: The object path.
+        :return: A dictionary with all settings and values.
         """
-        cascaded = {}
-        for key, value in data.items():
-            parts = key.strip("/").split("/")
-            d = cascaded
-            for part in parts[:-1]:
-                if part not in d:
-                    d[part] = {}
-                d = d[part]
-            d[parts[-1]] = value
-        return cascaded
+        try:
+            obj = bus.get_object(service, object_path, introspect=False)
+            values = dbus.Interface(obj, "com.victronenergy.BusItem").GetValue()
+
+            if isinstance(values, dbus.Dictionary):
+                result = {}
+                for path, value in values.items():
+                    self.merge_dicts(
+                        result,
+                        self.create_nested_dict(object_path + "/" + str(path).strip("/"), str(value)),
+                    )
+                return result
+
+        except dbus.exceptions.DBusException as e:
+            logger.debug(f"get_settings_subtree(): GetValue on {object_path} not supported: {e}")
+
+        return self.get_settings_with_values(bus, service, object_path)
 
     def get_settings_with_values(self, bus, service: str, object_path: str, recursive: bool = True) -> dict:
         """
@@ -1386,92 +2204,41 @@ class DbusHelper:
         return value if result else None
 
     # save current battery states to dbus
-    def save_current_battery_state(self) -> bool:
+    def save_current_battery_state(self) -> None:
         """
-        Save the current battery state to dbus.
+        Collect the current battery state for saving to dbus.
 
-        This function saves the current battery state to dbus. It checks if the values have changed and
-        only saves the values that have changed.
+        Only values that changed since they were saved the last time are marked as dirty in the settings store.
+        They are written by `flush_battery_state()`.
 
-        :return: True if the values have been saved, otherwise False.
+        :return: None
         """
-        result = True
+        self.settings_store.set("AllowMaxVoltage", 1 if self.battery.allow_max_voltage else 0)
+        self.settings_store.set(
+            "MaxVoltageStartTime",
+            (self.battery.max_voltage_start_time if self.battery.max_voltage_start_time is not None else ""),
+        )
+        self.settings_store.set("SocCalc", self.battery.soc_calc)
+        self.settings_store.set("SocResetLastReached", self.battery.soc_reset_last_reached)
 
-        if self.battery.allow_max_voltage != self.save_charge_details_last["allow_max_voltage"]:
-            result = result + self.set_settings(
-                get_bus(),
-                "com.victronenergy.settings",
-                self.path_battery,
-                "AllowMaxVoltage",
-                1 if self.battery.allow_max_voltage else 0,
-            )
-            logger.debug(f"Saved AllowMaxVoltage. Before {self.save_charge_details_last['allow_max_voltage']}, " + f"after {self.battery.allow_max_voltage}")
-            self.save_charge_details_last["allow_max_voltage"] = self.battery.allow_max_voltage
+        # serialize the history values only if one of them changed
+        if self.battery.history.changed:
+            self.settings_store.set("HistoryValues", json.dumps(self.battery.history.get_values_to_save()))
+            self.battery.history.changed = False
 
-        if self.battery.max_voltage_start_time != self.save_charge_details_last["max_voltage_start_time"]:
-            result = result and self.set_settings(
-                get_bus(),
-                "com.victronenergy.settings",
-                self.path_battery,
-                "MaxVoltageStartTime",
-                (self.battery.max_voltage_start_time if self.battery.max_voltage_start_time is not None else ""),
-            )
-            logger.debug(
-                f"Saved MaxVoltageStartTime. Before {self.save_charge_details_last['max_voltage_start_time']}, "
-                + f"after {self.battery.max_voltage_start_time}"
-            )
-            self.save_charge_details_last["max_voltage_start_time"] = self.battery.max_voltage_start_time
+    def flush_battery_state(self) -> bool:
+        """
+        Write the collected battery state to dbus.
 
-        if self.battery.soc_calc != self.save_charge_details_last["soc_calc"]:
-            result = result and self.set_settings(
-                get_bus(),
-                "com.victronenergy.settings",
-                self.path_battery,
-                "SocCalc",
-                self.battery.soc_calc,
-            )
-            logger.debug(f"soc_calc written to dbus: {self.battery.soc_calc}")
-            self.save_charge_details_last["soc_calc"] = self.battery.soc_calc
+        :return: True if the values have been saved, otherwise False.
+        """
+        if self.settings_store is None:
+            return True
 
-        if self.battery.soc_reset_last_reached != self.save_charge_details_last["soc_reset_last_reached"]:
-            result = result and self.set_settings(
-                get_bus(),
-                "com.victronenergy.settings",
-                self.path_battery,
-                "SocResetLastReached",
-                self.battery.soc_reset_last_reached,
-            )
-            logger.debug(
-                f"Saved SocResetLastReached. Before {self.save_charge_details_last['soc_reset_last_reached']}, "
-                + f"after {self.battery.soc_reset_last_reached}",
-            )
-            self.save_charge_details_last["soc_reset_last_reached"] = self.battery.soc_reset_last_reached
-
-        # copy history values
-        history_values_dict = self.battery.history.__dict__.copy()
-        # remove values that should not be saved
-        history_remove_values = self.battery.history.exclude_values_to_calculate + ["exclude_values_to_calculate"]
-        # remove keys that should not be saved
-        for key in history_remove_values:
-            history_values_dict.pop(key, None)
-        # remove keys with None values
-        keys_to_remove = [key for key, value in history_values_dict.items() if value is None]
-        for key in keys_to_remove:
-            history_values_dict.pop(key)
-
-        history_values = json.dumps(history_values_dict)
-        if history_values != self.save_charge_details_last["history_values"]:
-            result = result and self.set_settings(
-                get_bus(),
-                "com.victronenergy.settings",
-                self.path_battery,
-                "HistoryValues",
-                history_values,
-            )
-            logger.debug(
-                f"Saved HistoryValues. Before {self.save_charge_details_last['history_values']}, after {history_values}",
-            )
-            self.save_charge_details_last["history_values"] = history_values
+        result = self.settings_store.flush()
+        if not result:
+            # set error code, to show in the GUI that something is wrong
+            self.battery.manage_error_code(8)
 
         return result
 
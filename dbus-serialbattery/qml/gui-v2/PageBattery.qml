@@ -353,7 +353,7 @@ Page {
 
 			ListNavigation {
 				text: "Cell Voltages"
-				preferredVisible: cell3Voltage.isValid
+				preferredVisible: cell3Voltage.isValid || cellVoltagesArray.isValid
 				onClicked: {
 					Global.pageManager.pushPage("/pages/settings/devicelist/battery/PageBatteryCellVoltages.qml",
 							{ "title": text, "bindPrefix": root.bindPrefix })
@@ -363,6 +363,11 @@ Page {
 					id: cell3Voltage
 					uid: root.bindPrefix + "/Voltages/Cell3"
 				}
+
+				VeQuickItem {
+					id: cellVoltagesArray
+					uid: root.bindPrefix + "/Voltages/Array"
+				}
 			}
 
 			ListNavigation {
@@ -17,6 +17,25 @@ Page {
 	readonly property string batteryMaxCellVoltage: _batteryMaxCellVoltage.isValid ? _batteryMaxCellVoltage.value.toFixed(3) : "--"
 
 
+	// all cells in one path, used if available
+	readonly property VeQuickItem _batteryVoltagesArray: VeQuickItem { uid: root.bindPrefix + "/Voltages/Array" }
+	readonly property VeQuickItem _batteryBalancesArray: VeQuickItem { uid: root.bindPrefix + "/Balances/Array" }
+
+	function cellVoltageText(index, item) {
+		if (_batteryVoltagesArray.isValid) {
+			return index < _batteryVoltagesArray.value.length && _batteryVoltagesArray.value[index] > 0 ? _batteryVoltagesArray.value[index].toFixed(3) : "--"
+		}
+		return item.isValid ? item.value.toFixed(3) : "--"
+	}
+
+	function cellBalancing(index, item) {
+		if (_batteryBalancesArray.isValid) {
+			return index < _batteryBalancesArray.value.length && _batteryBalancesArray.value[index] == 1
+		}
+		return item.isValid && item.value == "1"
+	}
+
+
 	readonly property VeQuickItem _batteryVoltagesCell_1: VeQuickItem { uid: root.bindPrefix + "/Voltages/Cell1" }
 	readonly property VeQuickItem _batteryVoltagesCell_2: VeQuickItem { uid: root.bindPrefix + "/Voltages/Cell2" }
 	readonly property VeQuickItem _batteryVoltagesCell_3: VeQuickItem { uid: root.bindPrefix + "/Voltages/Cell3" }
@@ -51,38 +70,38 @@ Page {
 	readonly property VeQuickItem _batteryVoltagesCell_32: VeQuickItem { uid: root.bindPrefix + "/Voltages/Cell32" }
 
 
-	readonly property string batteryVoltagesCell_1: _batteryVoltagesCell_1.isValid ? _batteryVoltagesCell_1.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_2: _batteryVoltagesCell_2.isValid ? _batteryVoltagesCell_2.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_3: _batteryVoltagesCell_3.isValid ? _batteryVoltagesCell_3.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_4: _batteryVoltagesCell_4.isValid ? _batteryVoltagesCell_4.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_5: _batteryVoltagesCell_5.isValid ? _batteryVoltagesCell_5.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_6: _batteryVoltagesCell_6.isValid ? _batteryVoltagesCell_6.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_7: _batteryVoltagesCell_7.isValid ? _batteryVoltagesCell_7.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_8: _batteryVoltagesCell_8.isValid ? _batteryVoltagesCell_8.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_9: _batteryVoltagesCell_9.isValid ? _batteryVoltagesCell_9.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_10: _batteryVoltagesCell_10.isValid ? _batteryVoltagesCell_10.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_11: _batteryVoltagesCell_11.isValid ? _batteryVoltagesCell_11.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_12: _batteryVoltagesCell_12.isValid ? _batteryVoltagesCell_12.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_13: _batteryVoltagesCell_13.isValid ? _batteryVoltagesCell_13.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_14: _batteryVoltagesCell_14.isValid ? _batteryVoltagesCell_14.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_15: _batteryVoltagesCell_15.isValid ? _batteryVoltagesCell_15.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_16: _batteryVoltagesCell_16.isValid ? _batteryVoltagesCell_16.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_17: _batteryVoltagesCell_17.isValid ? _batteryVoltagesCell_17.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_18: _batteryVoltagesCell_18.isValid ? _batteryVoltagesCell_18.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_19: _batteryVoltagesCell_19.isValid ? _batteryVoltagesCell_19.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_20: _batteryVoltagesCell_20.isValid ? _batteryVoltagesCell_20.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_21: _batteryVoltagesCell_21.isValid ? _batteryVoltagesCell_21.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_22: _batteryVoltagesCell_22.isValid ? _batteryVoltagesCell_22.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_23: _batteryVoltagesCell_23.isValid ? _batteryVoltagesCell_23.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_24: _batteryVoltagesCell_24.isValid ? _batteryVoltagesCell_24.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_25: _batteryVoltagesCell_25.isValid ? _batteryVoltagesCell_25.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_26: _batteryVoltagesCell_26.isValid ? _batteryVoltagesCell_26.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_27: _batteryVoltagesCell_27.isValid ? _batteryVoltagesCell_27.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_28: _batteryVoltagesCell_28.isValid ? _batteryVoltagesCell_28.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_29: _batteryVoltagesCell_29.isValid ? _batteryVoltagesCell_29.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_30: _batteryVoltagesCell_30.isValid ? _batteryVoltagesCell_30.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_31: _batteryVoltagesCell_31.isValid ? _batteryVoltagesCell_31.value.toFixed(3) : "--"
-	readonly property string batteryVoltagesCell_32: _batteryVoltagesCell_32.isValid ? _batteryVoltagesCell_32.value.toFixed(3) : "--"
+	readonly property string batteryVoltagesCell_1: cellVoltageText(0, _batteryVoltagesCell_1)
+	readonly property string batteryVoltagesCell_2: cellVoltageText(1, _batteryVoltagesCell_2)
+	readonly property string batteryVoltagesCell_3: cellVoltageText(2, _batteryVoltagesCell_3)
+	readonly property string batteryVoltagesCell_4: cellVoltageText(3, _batteryVoltagesCell_4)
+	readonly property string batteryVoltagesCell_5: cellVoltageText(4, _batteryVoltagesCell_5)
+	readonly property string batteryVoltagesCell_6: cellVoltageText(5, _batteryVoltagesCell_6)
+	readonly property string batteryVoltagesCell_7: cellVoltageText(6, _batteryVoltagesCell_7)
+	readonly property string batteryVoltagesCell_8: cellVoltageText(7, _batteryVoltagesCell_8)
+	readonly property string batteryVoltagesCell_9: cellVoltageText(8, _batteryVoltagesCell_9)
+	readonly property string batteryVoltagesCell_10: cellVoltageText(9, _batteryVoltagesCell_10)
+	readonly property string batteryVoltagesCell_11: cellVoltageText(10, _batteryVoltagesCell_11)
+	readonly property string batteryVoltagesCell_12: cellVoltageText(11, _batteryVoltagesCell_12)
+	readonly property string batteryVoltagesCell_13: cellVoltageText(12, _batteryVoltagesCell_13)
+	readonly property string batteryVoltagesCell_14: cellVoltageText(13, _batteryVoltagesCell_14)
+	readonly property string batteryVoltagesCell_15: cellVoltageText(14, _batteryVoltagesCell_15)
+	readonly property string batteryVoltagesCell_16: cellVoltageText(15, _batteryVoltagesCell_16)
+	readonly property string batteryVoltagesCell_17: cellVoltageText(16, _batteryVoltagesCell_17)
+	readonly property string batteryVoltagesCell_18: cellVoltageText(17, _batteryVoltagesCell_18)
+	readonly property string batteryVoltagesCell_19: cellVoltageText(18, _batteryVoltagesCell_19)
+	readonly property string batteryVoltagesCell_20: cellVoltageText(19, _batteryVoltagesCell_20)
+	readonly property string batteryVoltagesCell_21: cellVoltageText(20, _batteryVoltagesCell_21)
+	readonly property string batteryVoltagesCell_22: cellVoltageText(21, _batteryVoltagesCell_22)
+	readonly property string batteryVoltagesCell_23: cellVoltageText(22, _batteryVoltagesCell_23)
+	readonly property string batteryVoltagesCell_24: cellVoltageText(23, _batteryVoltagesCell_24)
+	readonly property string batteryVoltagesCell_25: cellVoltageText(24, _batteryVoltagesCell_25)
+	readonly property string batteryVoltagesCell_26: cellVoltageText(25, _batteryVoltagesCell_26)
+	readonly property string batteryVoltagesCell_27: cellVoltageText(26, _batteryVoltagesCell_27)
+	readonly property string batteryVoltagesCell_28: cellVoltageText(27, _batteryVoltagesCell_28)
+	readonly property string batteryVoltagesCell_29: cellVoltageText(28, _batteryVoltagesCell_29)
+	readonly property string batteryVoltagesCell_30: cellVoltageText(29, _batteryVoltagesCell_30)
+	readonly property string batteryVoltagesCell_31: cellVoltageText(30, _batteryVoltagesCell_31)
+	readonly property string batteryVoltagesCell_32: cellVoltageText(31, _batteryVoltagesCell_32)
 
 
 	readonly property VeQuickItem _batteryBalancesCell_1: VeQuickItem { uid: root.bindPrefix + "/Balances/Cell1" }
@@ -119,38 +138,38 @@ Page {
 	readonly property VeQuickItem _batteryBalancesCell_32: VeQuickItem { uid: root.bindPrefix + "/Balances/Cell32" }
 
 
-	readonly property string cellTextColor1: _batteryBalancesCell_1.isValid && _batteryBalancesCell_1.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_1 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor2: _batteryBalancesCell_2.isValid && _batteryBalancesCell_2.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_2 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor3: _batteryBalancesCell_3.isValid && _batteryBalancesCell_3.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_3 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor4: _batteryBalancesCell_4.isValid && _batteryBalancesCell_4.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_4 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor5: _batteryBalancesCell_5.isValid && _batteryBalancesCell_5.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_5 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor6: _batteryBalancesCell_6.isValid && _batteryBalancesCell_6.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_6 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor7: _batteryBalancesCell_7.isValid && _batteryBalancesCell_7.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_7 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor8: _batteryBalancesCell_8.isValid && _batteryBalancesCell_8.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_8 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor9: _batteryBalancesCell_9.isValid && _batteryBalancesCell_9.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_9 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor10: _batteryBalancesCell_10.isValid && _batteryBalancesCell_10.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_10 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor11: _batteryBalancesCell_11.isValid && _batteryBalancesCell_11.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_11 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor12: _batteryBalancesCell_12.isValid && _batteryBalancesCell_12.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_12 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor13: _batteryBalancesCell_13.isValid && _batteryBalancesCell_13.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_13 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor14: _batteryBalancesCell_14.isValid && _batteryBalancesCell_14.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_14 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor15: _batteryBalancesCell_15.isValid && _batteryBalancesCell_15.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_15 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor16: _batteryBalancesCell_16.isValid && _batteryBalancesCell_16.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_16 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor17: _batteryBalancesCell_17.isValid && _batteryBalancesCell_17.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_17 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor18: _batteryBalancesCell_18.isValid && _batteryBalancesCell_18.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_18 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor19: _batteryBalancesCell_19.isValid && _batteryBalancesCell_19.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_19 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor20: _batteryBalancesCell_20.isValid && _batteryBalancesCell_20.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_20 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor21: _batteryBalancesCell_21.isValid && _batteryBalancesCell_21.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_21 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor22: _batteryBalancesCell_22.isValid && _batteryBalancesCell_22.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_22 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor23: _batteryBalancesCell_23.isValid && _batteryBalancesCell_23.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_23 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor24: _batteryBalancesCell_24.isValid && _batteryBalancesCell_24.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_24 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor25: _batteryBalancesCell_25.isValid && _batteryBalancesCell_25.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_25 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor26: _batteryBalancesCell_26.isValid && _batteryBalancesCell_26.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_26 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor27: _batteryBalancesCell_27.isValid && _batteryBalancesCell_27.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_27 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor28: _batteryBalancesCell_28.isValid && _batteryBalancesCell_28.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_28 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor29: _batteryBalancesCell_29.isValid && _batteryBalancesCell_29.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_29 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor30: _batteryBalancesCell_30.isValid && _batteryBalancesCell_30.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_30 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor31: _batteryBalancesCell_31.isValid && _batteryBalancesCell_31.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_31 ? "#387DC5" : "#b80101") : Theme.color_font_primary
-	readonly property string cellTextColor32: _batteryBalancesCell_32.isValid && _batteryBalancesCell_32.value == "1" ? (batteryMinCellVoltage == batteryVoltagesCell_32 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor1: cellBalancing(0, _batteryBalancesCell_1) ? (batteryMinCellVoltage == batteryVoltagesCell_1 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor2: cellBalancing(1, _batteryBalancesCell_2) ? (batteryMinCellVoltage == batteryVoltagesCell_2 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor3: cellBalancing(2, _batteryBalancesCell_3) ? (batteryMinCellVoltage == batteryVoltagesCell_3 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor4: cellBalancing(3, _batteryBalancesCell_4) ? (batteryMinCellVoltage == batteryVoltagesCell_4 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor5: cellBalancing(4, _batteryBalancesCell_5) ? (batteryMinCellVoltage == batteryVoltagesCell_5 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor6: cellBalancing(5, _batteryBalancesCell_6) ? (batteryMinCellVoltage == batteryVoltagesCell_6 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor7: cellBalancing(6, _batteryBalancesCell_7) ? (batteryMinCellVoltage == batteryVoltagesCell_7 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor8: cellBalancing(7, _batteryBalancesCell_8) ? (batteryMinCellVoltage == batteryVoltagesCell_8 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor9: cellBalancing(8, _batteryBalancesCell_9) ? (batteryMinCellVoltage == batteryVoltagesCell_9 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor10: cellBalancing(9, _batteryBalancesCell_10) ? (batteryMinCellVoltage == batteryVoltagesCell_10 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor11: cellBalancing(10, _batteryBalancesCell_11) ? (batteryMinCellVoltage == batteryVoltagesCell_11 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor12: cellBalancing(11, _batteryBalancesCell_12) ? (batteryMinCellVoltage == batteryVoltagesCell_12 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor13: cellBalancing(12, _batteryBalancesCell_13) ? (batteryMinCellVoltage == batteryVoltagesCell_13 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor14: cellBalancing(13, _batteryBalancesCell_14) ? (batteryMinCellVoltage == batteryVoltagesCell_14 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor15: cellBalancing(14, _batteryBalancesCell_15) ? (batteryMinCellVoltage == batteryVoltagesCell_15 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor16: cellBalancing(15, _batteryBalancesCell_16) ? (batteryMinCellVoltage == batteryVoltagesCell_16 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor17: cellBalancing(16, _batteryBalancesCell_17) ? (batteryMinCellVoltage == batteryVoltagesCell_17 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor18: cellBalancing(17, _batteryBalancesCell_18) ? (batteryMinCellVoltage == batteryVoltagesCell_18 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor19: cellBalancing(18, _batteryBalancesCell_19) ? (batteryMinCellVoltage == batteryVoltagesCell_19 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor20: cellBalancing(19, _batteryBalancesCell_20) ? (batteryMinCellVoltage == batteryVoltagesCell_20 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor21: cellBalancing(20, _batteryBalancesCell_21) ? (batteryMinCellVoltage == batteryVoltagesCell_21 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor22: cellBalancing(21, _batteryBalancesCell_22) ? (batteryMinCellVoltage == batteryVoltagesCell_22 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor23: cellBalancing(22, _batteryBalancesCell_23) ? (batteryMinCellVoltage == batteryVoltagesCell_23 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor24: cellBalancing(23, _batteryBalancesCell_24) ? (batteryMinCellVoltage == batteryVoltagesCell_24 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor25: cellBalancing(24, _batteryBalancesCell_25) ? (batteryMinCellVoltage == batteryVoltagesCell_25 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor26: cellBalancing(25, _batteryBalancesCell_26) ? (batteryMinCellVoltage == batteryVoltagesCell_26 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor27: cellBalancing(26, _batteryBalancesCell_27) ? (batteryMinCellVoltage == batteryVoltagesCell_27 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor28: cellBalancing(27, _batteryBalancesCell_28) ? (batteryMinCellVoltage == batteryVoltagesCell_28 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor29: cellBalancing(28, _batteryBalancesCell_29) ? (batteryMinCellVoltage == batteryVoltagesCell_29 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor30: cellBalancing(29, _batteryBalancesCell_30) ? (batteryMinCellVoltage == batteryVoltagesCell_30 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor31: cellBalancing(30, _batteryBalancesCell_31) ? (batteryMinCellVoltage == batteryVoltagesCell_31 ? "#387DC5" : "#b80101") : Theme.color_font_primary
+	readonly property string cellTextColor32: cellBalancing(31, _batteryBalancesCell_32) ? (batteryMinCellVoltage == batteryVoltagesCell_32 ? "#387DC5" : "#b80101") : Theme.color_font_primary
 
 	VeQuickItem {
 		id: _batteryCellVoltageSum
@@ -37,7 +37,7 @@ class DbusHelper:
         # This is called every battery.poll_interval milli second as set up per battery type to read and update the data
         try:
             # Call the battery's refresh_data function
-            result = self.battery.refresh_data()
+            result = self.battery.run_refresh_data()
             if result:
                 # reset error variables
                 self.error["count"] = 0
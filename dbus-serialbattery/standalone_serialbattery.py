@@ -88,70 +88,20 @@ from utils import (
     logger,
     BATTERY_ADDRESSES,
 )
-
-# import battery classes
-# TODO: import only the classes that are needed
-from bms.daly import Daly
-from bms.daren_485 import Daren485
-from bms.ecs import Ecs
-from bms.eg4_lifepower import EG4_Lifepower
-from bms.eg4_ll import EG4_LL
-from bms.felicity import Felicity
-from bms.heltecmodbus import HeltecModbus
-from bms.hlpdatabms4s import HLPdataBMS4S
-from bms.jkbms import Jkbms
-from bms.jkbms_pb import Jkbms_pb
-from bms.lltjbd import LltJbd
-from bms.pace import Pace
-from bms.renogy import Renogy
-from bms.seplos import Seplos
-from bms.seplosv3 import Seplosv3
+from utils_bms import get_bms_class, get_bms_type, get_expected_bms_types, get_supported_bms_types
 
 # add ext folder to sys.path
 sys.path.insert(1, os.path.join(os.path.dirname(__file__), "ext"))
 
-# enabled only if explicitly set in config under "BMS_TYPE"
-if "ANT" in BMS_TYPE:
-    from bms.ant import ANT
-if "MNB" in BMS_TYPE:
-    from bms.mnb import MNB
-if "Sinowealth" in BMS_TYPE:
-    from bms.sinowealth import Sinowealth
-
-supported_bms_types = [
-    {"bms": Daly, "baud": 9600, "address": b"\x40"},
-    {"bms": Daly, "baud": 9600, "address": b"\x80"},
-    {"bms": Daren485, "baud": 19200, "address": b"\x01"},
-    {"bms": Ecs, "baud": 19200},
-    {"bms": EG4_Lifepower, "baud": 9600, "address": b"\x01"},
-    {"bms": EG4_LL, "baud": 9600, "address": b"\x01"},
-    {"bms": Felicity, "baud": 9600, "address": b"\x01"},
-    {"bms": HeltecModbus, "baud": 9600, "address": b"\x01"},
-    {"bms": HLPdataBMS4S, "baud": 9600},
-    {"bms": Jkbms, "baud": 115200},
-    {"bms": Jkbms_pb, "baud": 115200, "address": b"\x01"},
-    {"bms": LltJbd, "baud": 9600, "address": b"\x00"},
-    {"bms": Pace, "baud": 9600, "address": b"\x00"},
-    {"bms": Renogy, "baud": 9600, "address": b"\x30"},
-    {"bms": Renogy, "baud": 9600, "address": b"\xF7"},
-    {"bms": Seplos, "baud": 19200, "address": b"\x00"},
-    {"bms": Seplosv3, "baud": 19200},
-]
-
-# enabled only if explicitly set in config under "BMS_TYPE"
-if "ANT" in BMS_TYPE:
-    supported_bms_types.append({"bms": ANT, "baud": 19200})
-if "MNB" in BMS_TYPE:
-    supported_bms_types.append({"bms": MNB, "baud": 9600})
-if "Sinowealth" in BMS_TYPE:
-    supported_bms_types.append({"bms": Sinowealth, "baud": 9600})
+# the battery classes are imported only when they are tested, see utils_bms
+supported_bms_types = get_supported_bms_types("serial")
 
 
 class standalone_serialbattery:
 
     def init_bms_types(self):
         self.supported_bms_types = supported_bms_types
-        self.expected_bms_types = [battery_type for battery_type in self.supported_bms_types if battery_type["bms"].__name__ in BMS_TYPE or len(BMS_TYPE) == 0]
+        self.expected_bms_types = get_expected_bms_types(self.supported_bms_types)
 
     def __init__(self, devpath, driverOption, devadr, loglevel):
         # init with default
@@ -197,13 +147,11 @@ class standalone_serialbattery:
                     else:
                         _bms_address = None
 
-                    logging.info(
-                        "Testing " + test["bms"].__name__ + (' at address "' + bytearray_to_string(_bms_address) + '"' if _bms_address is not None else "")
-                    )
-                    batteryClass = test["bms"]
+                    logging.info("Testing " + test["bms"] + (' at address "' + bytearray_to_string(_bms_address) + '"' if _bms_address is not None else ""))
+                    batteryClass = get_bms_class(test)
                     baud = test["baud"] if "baud" in test else None
                     battery: Battery = batteryClass(port=_port, baud=baud, address=_bms_address)
-                    if battery.test_connection() and battery.validate_data():
+                    if battery.run_test_connection() and battery.validate_data():
                         logging.info("-- Connection established to " + battery.__class__.__name__)
                         return battery
                 except KeyboardInterrupt:
@@ -246,10 +194,10 @@ class standalone_serialbattery:
 
         if len(bms_types) > 0:
             for bms_type in bms_types:
-                if bms_type not in [bms["bms"].__name__ for bms in supported_bms_types]:
+                if bms_type not in [bms["bms"] for bms in supported_bms_types]:
                     logger.error(
                         f'ERROR >>> BMS type "{bms_type}" is not supported. Supported BMS types are: '
-                        + f"{', '.join([bms['bms'].__name__ for bms in supported_bms_types])}"
+                        + f"{', '.join(dict.fromkeys(bms['bms'] for bms in supported_bms_types))}"
                         + "; Disabled by default: ANT, MNB, Sinowealth"
                     )
                     raise (None, None, 1)
@@ -258,10 +206,10 @@ class standalone_serialbattery:
         # check if BMS_TYPE is not empty and all BMS types in the list are supported
         # if len(BMS_TYPE) > 0:
         #     for bms_type in BMS_TYPE:
-        #         if bms_type not in [bms["bms"].__name__ for bms in self.supported_bms_types]:
+        #         if bms_type not in [bms["bms"] for bms in self.supported_bms_types]:
         #             logging.error(
         #                 f'ERROR >>> BMS type "{bms_type}" is not supported. Supported BMS types are: '
-        #                 + f"{', '.join([bms['bms'].__name__ for bms in self.supported_bms_types])}"
+        #                 + f"{', '.join(dict.fromkeys(bms['bms'] for bms in self.supported_bms_types))}"
         #                 + "; Disabled by default: ANT, MNB, Sinowealth"
         #             )
         #             raise Exception("BMS DEVICE NOT IN SUPPORTED LIST")
@@ -274,39 +222,18 @@ class standalone_serialbattery:
             if self.driveroption <= 4:  # bluetooth
                 logging.info("open bluetooth interface")
 
-                if self.driveroption == 1:  # "Jkbms_Ble":
-                    # noqa: F401 --> ignore flake "imported but unused" error
-                    from bms.jkbms_ble import Jkbms_Ble  # noqa: F401
-
-                    batteryClass = Jkbms_Ble
-
-                if self.driveroption == 2:  # "LltJbd_Ble":
-                    # noqa: F401 --> ignore flake "imported but unused" error
-                    from bms.lltjbd_ble import LltJbd_Ble  # noqa: F401
-
-                    batteryClass = LltJbd_Ble
-
-                if self.driveroption == 3:  # "LiTime_Ble":
-                    # noqa: F401 --> ignore flake "imported but unused" error
-                    from bms.litime_ble import LiTime_Ble  # noqa: F401
-
-                    batteryClass = LiTime_Ble
-
-                if self.driveroption == 4:  # "Renogy_Ble":
-                    # noqa: F401 --> ignore flake "imported but unused" error
-                    from bms.renogy_ble import Renogy_Ble  # noqa: F401
-
-                    batteryClass = Renogy_Ble
+                # driverOption 1 to 4, see the explanations above
+                batteryClass = get_bms_class(get_bms_type({1: "Jkbms_Ble", 2: "LltJbd_Ble", 3: "LiTime_Ble", 4: "Renogy_Ble"}[self.driveroption]))
 
                 battery: Battery = batteryClass(self.devpath, -1, self.devadr)
-                if battery.test_connection() and battery.validate_data():
+                if battery.run_test_connection() and battery.validate_data():
                     logging.info("-- Connection established to " + battery.__class__.__name__)
 
                     # check if BATTERY_ADDRESSES is not empty
                     if BATTERY_ADDRESSES:
                         for address in BATTERY_ADDRESSES:
                             battery.address = address
-                            battery.refresh_data()
+                            battery.run_refresh_data()
                             if battery.hardware_version is not None:
                                 self.battery[address] = battery
                                 logger.info(f"Successful battery connection at {self.devpath} and this address {address}")
@@ -325,20 +252,12 @@ class standalone_serialbattery:
                 vecan: Newer Venus GX devices
                 vcan: Virtual CAN interface for testing
                 """
-                from bms.daly_can import Daly_Can
-                from bms.jkbms_can import Jkbms_Can
-
                 logging.info("open CAN interface")
 
                 # only try CAN BMS on CAN port
-                self.supported_bms_types = [
-                    {"bms": Daly_Can},
-                    {"bms": Jkbms_Can},
-                ]
-
-                self.expected_bms_types = [
-                    battery_type for battery_type in self.supported_bms_types if battery_type["bms"].__name__ in BMS_TYPE or len(BMS_TYPE) == 0
-                ]
+                self.supported_bms_types = get_supported_bms_types("can")
+
+                self.expected_bms_types = get_expected_bms_types(self.supported_bms_types)
 
                 # If no BMS type is supported, use all supported BMS types
 
@@ -4,6 +4,7 @@ import bisect
 import configparser
 import logging
 import sys
+from collections import deque
 from pathlib import Path
 from struct import unpack_from
 from time import sleep
@@ -122,6 +123,83 @@ def check_config_issue(condition: bool, message: str):
         errors_in_config.append(f"**CONFIG ISSUE**: {message}")
 
 
+class LookupTable:
+    """
+    Piecewise table, which maps an input value to an output value, e.g. the cell voltage to the maximum charge current.
+
+    The arrays are normalized to ascending input values and the slopes of the segments are calculated once,
+    when the config is loaded. A lookup is then only a bisect and a multiplication.
+    It returns the same values as `calc_linear_relationship()` and `calc_step_relationship()`.
+
+    :param in_array: Input array
+    :param out_array: Output array
+    """
+
+    def __init__(self, in_array: List[float], out_array: List[float]):
+        self.in_array: List[float] = list(in_array)
+        """
+        Input values in ascending order
+        """
+
+        self.out_array: List[float] = list(out_array)
+        """
+        Output values in the order of `in_array`
+        """
+
+        # Change compare-direction in array
+        if len(self.in_array) > 0 and self.in_array[0] > self.in_array[-1]:
+            self.in_array.reverse()
+            self.out_array.reverse()
+
+        self.slopes: List[float] = []
+        """
+        Slopes of the segments, `slopes[i]` is the slope between `in_array[i]` and `in_array[i + 1]`
+        """
+
+        for i in range(min(len(self.in_array), len(self.out_array)) - 1):
+            in_diff = self.in_array[i + 1] - self.in_array[i]
+            self.slopes.append((self.out_array[i + 1] - self.out_array[i]) / in_diff if in_diff != 0 else 0)
+
+    def get_linear(self, in_value: float) -> float:
+        """
+        Get the linear interpolated output value.
+
+        :param in_value: Input value
+        :return: Calculated value
+        """
+        # Handle out of bounds
+        if in_value <= self.in_array[0]:
+            return self.out_array[0]
+        if in_value >= self.in_array[-1]:
+            return self.out_array[-1]
+
+        # Calculate linear value between the setpoints
+        idx = bisect.bisect(self.in_array, in_value) - 1
+        return constrain(
+            self.out_array[idx] + (in_value - self.in_array[idx]) * self.slopes[idx],
+            self.out_array[idx],
+            self.out_array[idx + 1],
+        )
+
+    def get_step(self, in_value: float, return_lower: bool) -> float:
+        """
+        Get the output value of the step the input value is in.
+
+        :param in_value: Input value
+        :param return_lower: Return lower value if True, else return higher value
+        :return: Calculated value
+        """
+        # Handle out of bounds
+        if in_value <= self.in_array[0]:
+            return self.out_array[0]
+        if in_value >= self.in_array[-1]:
+            return self.out_array[-1]
+
+        # Get index between the setpoints
+        idx = bisect.bisect(self.in_array, in_value)
+        return self.out_array[idx] if return_lower else self.out_array[idx - 1]
+
+
 # SAVE CONFIG VALUES to constants
 # --------- Battery Current Limits ---------
 MAX_BATTERY_CHARGE_CURRENT: float = get_float_from_config("DEFAULT", "MAX_BATTERY_CHARGE_CURRENT")
@@ -194,6 +272,24 @@ CURRENT_MEASURED_BY_USER: list = get_list_from_config("DEFAULT", "CURRENT_MEASUR
 # check if lists are different
 # this allows to calculate linear relationship between the two lists only if needed
 CURRENT_CORRECTION: bool = CURRENT_REPORTED_BY_BMS != CURRENT_MEASURED_BY_USER
+CURRENT_CORRECTION_TABLE: LookupTable = LookupTable(CURRENT_REPORTED_BY_BMS, CURRENT_MEASURED_BY_USER)
+"""
+Compiled table to correct the current reported by the BMS
+"""
+
+# --------- Bluetooth reconnect ---------
+BLUETOOTH_RECONNECT_DELAY_MIN: float = get_float_from_config("DEFAULT", "BLUETOOTH_RECONNECT_DELAY_MIN", 2)
+"""
+Delay in seconds before the first reconnect attempt after a Bluetooth connection was lost.
+"""
+BLUETOOTH_RECONNECT_DELAY_MAX: float = get_float_from_config("DEFAULT", "BLUETOOTH_RECONNECT_DELAY_MAX", 60)
+"""
+Maximum delay in seconds between two reconnect attempts.
+"""
+BLUETOOTH_RESET_AFTER_FAILED_RECONNECTS: int = get_int_from_config("DEFAULT", "BLUETOOTH_RESET_AFTER_FAILED_RECONNECTS", 10)
+"""
+Number of failed reconnects in a row after which the Bluetooth stack is reset. `0` disables the reset.
+"""
 
 
 # --------- Daisy Chain Configuration (Multiple BMS on one cable) ---------
@@ -293,6 +389,16 @@ Discharge current control management referring to cell-voltage
 """
 CELL_VOLTAGES_WHILE_CHARGING: List[float] = get_list_from_config("DEFAULT", "CELL_VOLTAGES_WHILE_CHARGING", float)
 MAX_CHARGE_CURRENT_CV: List[float] = get_list_from_config("DEFAULT", "MAX_CHARGE_CURRENT_CV_FRACTION", lambda v: MAX_BATTERY_CHARGE_CURRENT * float(v))
+MAX_CHARGE_CURRENT_CV_TABLE: LookupTable = LookupTable(CELL_VOLTAGES_WHILE_CHARGING, MAX_CHARGE_CURRENT_CV)
+"""
+Compiled table of the maximum charge current by the highest cell voltage
+"""
+
+check_config_issue(
+    len(CELL_VOLTAGES_WHILE_CHARGING) != len(MAX_CHARGE_CURRENT_CV),
+    f"CELL_VOLTAGES_WHILE_CHARGING ({len(CELL_VOLTAGES_WHILE_CHARGING)} values) and MAX_CHARGE_CURRENT_CV_FRACTION ({len(MAX_CHARGE_CURRENT_CV)} values) "
+    "must have the same number of values. Please check the configuration.",
+)
 
 
 # Common configuration checks
@@ -316,6 +422,16 @@ check_config_issue(
 
 CELL_VOLTAGES_WHILE_DISCHARGING: List[float] = get_list_from_config("DEFAULT", "CELL_VOLTAGES_WHILE_DISCHARGING", float)
 MAX_DISCHARGE_CURRENT_CV: List[float] = get_list_from_config("DEFAULT", "MAX_DISCHARGE_CURRENT_CV_FRACTION", lambda v: MAX_BATTERY_DISCHARGE_CURRENT * float(v))
+MAX_DISCHARGE_CURRENT_CV_TABLE: LookupTable = LookupTable(CELL_VOLTAGES_WHILE_DISCHARGING, MAX_DISCHARGE_CURRENT_CV)
+"""
+Compiled table of the maximum discharge current by the lowest cell voltage
+"""
+
+check_config_issue(
+    len(CELL_VOLTAGES_WHILE_DISCHARGING) != len(MAX_DISCHARGE_CURRENT_CV),
+    f"CELL_VOLTAGES_WHILE_DISCHARGING ({len(CELL_VOLTAGES_WHILE_DISCHARGING)} values) and MAX_DISCHARGE_CURRENT_CV_FRACTION ({len(MAX_DISCHARGE_CURRENT_CV)} values) "
+    "must have the same number of values. Please check the configuration.",
+)
 
 check_config_issue(
     CELL_VOLTAGES_WHILE_DISCHARGING[0] > MIN_CELL_VOLTAGE and MAX_DISCHARGE_CURRENT_CV[0] == 0,
@@ -340,6 +456,16 @@ Discharge current control management referring to temperature
 """
 TEMPERATURES_WHILE_CHARGING: List[float] = get_list_from_config("DEFAULT", "TEMPERATURES_WHILE_CHARGING", float)
 MAX_CHARGE_CURRENT_T: List[float] = get_list_from_config("DEFAULT", "MAX_CHARGE_CURRENT_T_FRACTION", lambda v: MAX_BATTERY_CHARGE_CURRENT * float(v))
+MAX_CHARGE_CURRENT_T_TABLE: LookupTable = LookupTable(TEMPERATURES_WHILE_CHARGING, MAX_CHARGE_CURRENT_T)
+"""
+Compiled table of the maximum charge current by temperature
+"""
+
+check_config_issue(
+    len(TEMPERATURES_WHILE_CHARGING) != len(MAX_CHARGE_CURRENT_T),
+    f"TEMPERATURES_WHILE_CHARGING ({len(TEMPERATURES_WHILE_CHARGING)} values) and MAX_CHARGE_CURRENT_T_FRACTION ({len(MAX_CHARGE_CURRENT_T)} values) "
+    "must have the same number of values. Please check the configuration.",
+)
 
 check_config_issue(
     MAX_BATTERY_CHARGE_CURRENT not in MAX_CHARGE_CURRENT_T,
@@ -349,6 +475,16 @@ check_config_issue(
 
 TEMPERATURES_WHILE_DISCHARGING: List[float] = get_list_from_config("DEFAULT", "TEMPERATURES_WHILE_DISCHARGING", float)
 MAX_DISCHARGE_CURRENT_T: List[float] = get_list_from_config("DEFAULT", "MAX_DISCHARGE_CURRENT_T_FRACTION", lambda v: MAX_BATTERY_DISCHARGE_CURRENT * float(v))
+MAX_DISCHARGE_CURRENT_T_TABLE: LookupTable = LookupTable(TEMPERATURES_WHILE_DISCHARGING, MAX_DISCHARGE_CURRENT_T)
+"""
+Compiled table of the maximum discharge current by temperature
+"""
+
+check_config_issue(
+    len(TEMPERATURES_WHILE_DISCHARGING) != len(MAX_DISCHARGE_CURRENT_T),
+    f"TEMPERATURES_WHILE_DISCHARGING ({len(TEMPERATURES_WHILE_DISCHARGING)} values) and MAX_DISCHARGE_CURRENT_T_FRACTION ({len(MAX_DISCHARGE_CURRENT_T)} values) "
+    "must have the same number of values. Please check the configuration.",
+)
 
 check_config_issue(
     MAX_BATTERY_DISCHARGE_CURRENT not in MAX_DISCHARGE_CURRENT_T,
@@ -367,6 +503,16 @@ Discharge current control management referring to SoC
 """
 SOC_WHILE_CHARGING: List[float] = get_list_from_config("DEFAULT", "SOC_WHILE_CHARGING", float)
 MAX_CHARGE_CURRENT_SOC: List[float] = get_list_from_config("DEFAULT", "MAX_CHARGE_CURRENT_SOC_FRACTION", lambda v: MAX_BATTERY_CHARGE_CURRENT * float(v))
+MAX_CHARGE_CURRENT_SOC_TABLE: LookupTable = LookupTable(SOC_WHILE_CHARGING, MAX_CHARGE_CURRENT_SOC)
+"""
+Compiled table of the maximum charge current by SoC
+"""
+
+check_config_issue(
+    len(SOC_WHILE_CHARGING) != len(MAX_CHARGE_CURRENT_SOC),
+    f"SOC_WHILE_CHARGING ({len(SOC_WHILE_CHARGING)} values) and MAX_CHARGE_CURRENT_SOC_FRACTION ({len(MAX_CHARGE_CURRENT_SOC)} values) "
+    "must have the same number of values. Please check the configuration.",
+)
 
 check_config_issue(
     MAX_BATTERY_CHARGE_CURRENT not in MAX_CHARGE_CURRENT_SOC,
@@ -378,6 +524,16 @@ SOC_WHILE_DISCHARGING: List[float] = get_list_from_config("DEFAULT", "SOC_WHILE_
 MAX_DISCHARGE_CURRENT_SOC: List[float] = get_list_from_config(
     "DEFAULT", "MAX_DISCHARGE_CURRENT_SOC_FRACTION", lambda v: MAX_BATTERY_DISCHARGE_CURRENT * float(v)
 )
+MAX_DISCHARGE_CURRENT_SOC_TABLE: LookupTable = LookupTable(SOC_WHILE_DISCHARGING, MAX_DISCHARGE_CURRENT_SOC)
+"""
+Compiled table of the maximum discharge current by SoC
+"""
+
+check_config_issue(
+    len(SOC_WHILE_DISCHARGING) != len(MAX_DISCHARGE_CURRENT_SOC),
+    f"SOC_WHILE_DISCHARGING ({len(SOC_WHILE_DISCHARGING)} values) and MAX_DISCHARGE_CURRENT_SOC_FRACTION ({len(MAX_DISCHARGE_CURRENT_SOC)} values) "
+    "must have the same number of values. Please check the configuration.",
+)
 
 check_config_issue(
     MAX_BATTERY_DISCHARGE_CURRENT not in MAX_DISCHARGE_CURRENT_SOC,
@@ -409,15 +565,74 @@ TIME_TO_SOC_INC_FROM: bool = get_bool_from_config("DEFAULT", "TIME_TO_SOC_INC_FR
 # --------- History ---------
 HISTORY_ENABLE: bool = get_bool_from_config("DEFAULT", "HISTORY_ENABLE")
 
+# --------- Publishing profile ---------
+PUBLISH_PROFILE: str = config["DEFAULT"].get("PUBLISH_PROFILE", "standard").strip().lower()
+"""
+Publishing profile, which defines the registered dbus paths: minimal, standard or full
+"""
+check_config_issue(
+    PUBLISH_PROFILE not in ("minimal", "standard", "full"),
+    f"PUBLISH_PROFILE ({PUBLISH_PROFILE}) must be one of: minimal, standard, full",
+)
+PUBLISH_DEBUG_ON_DEMAND_TIMEOUT: int = get_int_from_config("DEFAULT", "PUBLISH_DEBUG_ON_DEMAND_TIMEOUT", 0)
+"""
+Seconds the driver debug info is calculated after it was read the last time, 0 to always calculate it
+"""
+
 # --------- Additional settings ---------
 BMS_TYPE: List[str] = get_list_from_config("DEFAULT", "BMS_TYPE", str)
 EXCLUDED_DEVICES: List[str] = get_list_from_config("DEFAULT", "EXCLUDED_DEVICES", str)
+SUPERVISOR_PORTS: List[str] = get_list_from_config("DEFAULT", "SUPERVISOR_PORTS", str)
+"""
+Ports hosted by one driver process started with `--supervisor`
+"""
+SUPERVISOR_PROCESS_WORKERS: bool = get_bool_from_config("DEFAULT", "SUPERVISOR_PROCESS_WORKERS")
+"""
+Read the batteries of each serial port of `SUPERVISOR_PORTS` in its own process
+"""
 POLL_INTERVAL: Union[float, None] = float(config["DEFAULT"]["POLL_INTERVAL"]) * 1000 if config["DEFAULT"]["POLL_INTERVAL"] else None
 """
 Poll interval in milliseconds
 """
+POLL_INTERVAL_ADAPTIVE: bool = get_bool_from_config("DEFAULT", "POLL_INTERVAL_ADAPTIVE")
+"""
+Adapt the poll interval to the activity of the battery
+"""
+POLL_INTERVAL_MAX: float = get_float_from_config("DEFAULT", "POLL_INTERVAL_MAX", 10) * 1000
+"""
+Maximum poll interval in milliseconds, when the battery is idle
+"""
+POLL_INTERVAL_IDLE_CURRENT: float = get_float_from_config("DEFAULT", "POLL_INTERVAL_IDLE_CURRENT", 1)
+"""
+Absolute current in A, below which the battery is idle
+"""
+POLL_INTERVAL_CURRENT_CHANGE: float = get_float_from_config("DEFAULT", "POLL_INTERVAL_CURRENT_CHANGE", 5)
+"""
+Change of the current in A between two polls, which switches back to the shortest poll interval
+"""
+POLL_IN_WORKER_THREAD: bool = get_bool_from_config("DEFAULT", "POLL_IN_WORKER_THREAD")
+"""
+Read the BMS in a worker thread per battery, so that the main loop is not blocked by a slow BMS
+"""
+REFRESH_MEDIUM_INTERVAL: float = get_float_from_config("DEFAULT", "REFRESH_MEDIUM_INTERVAL", 0)
+"""
+Interval in seconds in which the BMS commands of the medium refresh class are read
+"""
+REFRESH_SLOW_INTERVAL: float = get_float_from_config("DEFAULT", "REFRESH_SLOW_INTERVAL", 60)
+"""
+Interval in seconds in which the BMS commands of the slow refresh class are read
+"""
+CALLBACK_MIN_PUBLISH_INTERVAL: float = get_float_from_config("DEFAULT", "CALLBACK_MIN_PUBLISH_INTERVAL", 1)
+"""
+Minimum publish interval in seconds for batteries that provide value updates on their own
+"""
+SAVE_BATTERY_STATE_INTERVAL: int = get_int_from_config("DEFAULT", "SAVE_BATTERY_STATE_INTERVAL", 15)
+"""
+Interval in seconds in which changed battery states are saved to the settings
+"""
 PUBLISH_CONFIG_VALUES: bool = get_bool_from_config("DEFAULT", "PUBLISH_CONFIG_VALUES")
-PUBLISH_BATTERY_DATA_AS_JSON: bool = get_bool_from_config("DEFAULT", "PUBLISH_BATTERY_DATA_AS_JSON")
+PUBLISH_BATTERY_DATA_AS_JSON: bool = PUBLISH_PROFILE != "minimal" and get_bool_from_config("DEFAULT", "PUBLISH_BATTERY_DATA_AS_JSON")
+PUBLISH_BATTERY_DATA_AS_JSON_COMPACT: bool = PUBLISH_BATTERY_DATA_AS_JSON and get_bool_from_config("DEFAULT", "PUBLISH_BATTERY_DATA_AS_JSON_COMPACT")
 BATTERY_CELL_DATA_FORMAT: int = get_int_from_config("DEFAULT", "BATTERY_CELL_DATA_FORMAT")
 MIDPOINT_ENABLE: bool = get_bool_from_config("DEFAULT", "MIDPOINT_ENABLE")
 TEMPERATURE_SOURCE_BATTERY: int = get_int_from_config("DEFAULT", "TEMPERATURE_SOURCE_BATTERY")
@@ -427,11 +642,125 @@ TEMPERATURE_3_NAME: str = config["DEFAULT"]["TEMPERATURE_3_NAME"]
 TEMPERATURE_4_NAME: str = config["DEFAULT"]["TEMPERATURE_4_NAME"]
 GUI_PARAMETERS_SHOW_ADDITIONAL_INFO: bool = get_bool_from_config("DEFAULT", "GUI_PARAMETERS_SHOW_ADDITIONAL_INFO")
 TELEMETRY: bool = get_bool_from_config("DEFAULT", "TELEMETRY")
+REFRESH_CACHE_VERIFY: bool = get_bool_from_config("DEFAULT", "REFRESH_CACHE_VERIFY")
+"""
+Verify the values cached per refresh against a new calculation
+"""
+
+# --------- Publish deadband ---------
+PUBLISH_DEADBAND_CELL_VOLTAGE: float = get_float_from_config("DEFAULT", "PUBLISH_DEADBAND_CELL_VOLTAGE", 0)
+"""
+Minimum change of a cell voltage in V to publish it
+"""
+PUBLISH_DEADBAND_TEMPERATURE: float = get_float_from_config("DEFAULT", "PUBLISH_DEADBAND_TEMPERATURE", 0)
+"""
+Minimum change of a temperature in °C to publish it
+"""
+PUBLISH_DEADBAND_POWER: float = get_float_from_config("DEFAULT", "PUBLISH_DEADBAND_POWER", 0)
+"""
+Minimum change of the power in W to publish it
+"""
+
+
+def get_deadband_paths_from_config() -> dict:
+    """
+    Get the deadbands by path from the config file.
+
+    :return: Dictionary with the path as key and the deadband as value
+    """
+    deadband_paths = {}
+    for entry in get_list_from_config("DEFAULT", "PUBLISH_DEADBAND_PATHS", str):
+        try:
+            path, deadband = entry.rsplit(":", 1)
+            deadband_paths[path.strip()] = float(deadband)
+        except ValueError:
+            check_config_issue(True, f'PUBLISH_DEADBAND_PATHS contains the invalid entry "{entry}". The format is <path>:<deadband>.')
+    return deadband_paths
+
+
+PUBLISH_DEADBAND_PATHS: dict = get_deadband_paths_from_config()
+"""
+Minimum change to publish a value by path. A path ending with `*` matches all paths starting with it.
+"""
+PUBLISH_DEADBAND_MAX_AGE: float = get_float_from_config("DEFAULT", "PUBLISH_DEADBAND_MAX_AGE", 30)
+"""
+Publish a value at least every x seconds, even if it changed less than its deadband
+"""
 
 
 # --------- Voltage drop ---------
 VOLTAGE_DROP: float = get_float_from_config("DEFAULT", "VOLTAGE_DROP")
 
+# --------- Diagnostics ---------
+DIAGNOSTICS_TIMING_ENABLE: bool = PUBLISH_PROFILE != "minimal" and get_bool_from_config("DEFAULT", "DIAGNOSTICS_TIMING_ENABLE")
+"""
+Measure the duration of each stage of the poll cycle and publish the percentiles to "/Diagnostics/Timing/"
+"""
+DIAGNOSTICS_TIMING_INTERVAL: int = get_int_from_config("DEFAULT", "DIAGNOSTICS_TIMING_INTERVAL")
+"""
+Interval in seconds over which the durations are collected before they are published
+"""
+DIAGNOSTICS_TIMING_LOG: bool = get_bool_from_config("DEFAULT", "DIAGNOSTICS_TIMING_LOG")
+"""
+Write a summary line of the measured durations to the log after each interval
+"""
+
+check_config_issue(
+    DIAGNOSTICS_TIMING_INTERVAL < 10,
+    f"DIAGNOSTICS_TIMING_INTERVAL ({DIAGNOSTICS_TIMING_INTERVAL}) must be at least 10 seconds",
+)
+
+# -- CPU profiler
+PROFILER_MODE: str = config["DEFAULT"].get("PROFILER_MODE", "sampler").strip().lower()
+"""
+Mode of the profiler when started by `SIGUSR1`, either `cprofile` or `sampler`
+"""
+PROFILER_DURATION: int = get_int_from_config("DEFAULT", "PROFILER_DURATION")
+"""
+Duration in seconds after which the profile is stopped and written
+"""
+PROFILER_SAMPLE_INTERVAL: int = get_int_from_config("DEFAULT", "PROFILER_SAMPLE_INTERVAL")
+"""
+Interval in ms in which the sampler collects the stacks
+"""
+PROFILER_DIRECTORY: str = config["DEFAULT"]["PROFILER_DIRECTORY"]
+"""
+Directory the profiles are written to
+"""
+
+check_config_issue(
+    PROFILER_MODE not in ("cprofile", "sampler"),
+    f"PROFILER_MODE ({PROFILER_MODE}) must be one of: cprofile, sampler",
+)
+
+# -- Memory watchdog
+MEMORY_WATCHDOG_ENABLE: bool = get_bool_from_config("DEFAULT", "MEMORY_WATCHDOG_ENABLE")
+"""
+Track the memory usage, publish it to "/Diagnostics/Memory/" and log the allocation sites that grew the most
+"""
+MEMORY_WATCHDOG_SAMPLE_INTERVAL: int = get_int_from_config("DEFAULT", "MEMORY_WATCHDOG_SAMPLE_INTERVAL")
+"""
+Interval in seconds in which the memory usage is read and published
+"""
+MEMORY_WATCHDOG_INTERVAL: int = get_int_from_config("DEFAULT", "MEMORY_WATCHDOG_INTERVAL")
+"""
+Interval in seconds in which the allocation sites that grew the most are logged
+"""
+MEMORY_WATCHDOG_TOP: int = get_int_from_config("DEFAULT", "MEMORY_WATCHDOG_TOP")
+"""
+Number of allocation sites logged
+"""
+MEMORY_WATCHDOG_FRAMES: int = get_int_from_config("DEFAULT", "MEMORY_WATCHDOG_FRAMES")
+"""
+Number of frames stored per allocation by tracemalloc
+"""
+
+check_config_issue(
+    MEMORY_WATCHDOG_ENABLE and (MEMORY_WATCHDOG_SAMPLE_INTERVAL < 1 or MEMORY_WATCHDOG_INTERVAL < 60),
+    f"MEMORY_WATCHDOG_SAMPLE_INTERVAL ({MEMORY_WATCHDOG_SAMPLE_INTERVAL}) must be at least 1 second "
+    + f"and MEMORY_WATCHDOG_INTERVAL ({MEMORY_WATCHDOG_INTERVAL}) at least 60 seconds",
+)
+
 # --------- BMS specific settings ---------
 USE_PORT_AS_UNIQUE_ID: bool = get_bool_from_config("DEFAULT", "USE_PORT_AS_UNIQUE_ID")
 BATTERY_CAPACITY: float = get_float_from_config("DEFAULT", "BATTERY_CAPACITY")
@@ -548,6 +877,210 @@ def calc_step_relationship(in_value: float, in_array: List[float], out_array: Li
     return out_array[idx] if return_lower else out_array[idx - 1]
 
 
+class RollingWindow:
+    """
+    Rolling window over the last `size` values, e.g. to average or smooth noisy values.
+
+    The values are kept in a preallocated ring buffer. Adding a value and getting the mean,
+    minimum and maximum is O(1), since the sum is updated on every value and the minimum and
+    maximum are tracked with monotonic deques.
+
+    :param size: Number of values to keep
+    :param ema_alpha: Smoothing factor of the exponential moving average (0 < alpha <= 1), `None` to disable it
+    """
+
+    def __init__(self, size: int, ema_alpha: float = None):
+        self.size: int = size
+        """
+        Number of values to keep
+        """
+
+        self.ema_alpha: float = ema_alpha
+        """
+        Smoothing factor of the exponential moving average
+        """
+
+        self.clear()
+
+    def clear(self) -> None:
+        """
+        Remove all values from the window.
+        """
+        self.values: List[float] = [0.0] * self.size
+        """
+        Ring buffer with the values, `self.index` is the position of the next value
+        """
+
+        self.count: int = 0
+        """
+        Number of values in the window
+        """
+
+        self.index: int = 0
+        self.sum: float = 0.0
+        self.ema: Union[float, None] = None
+        """
+        Exponential moving average of all added values, if `ema_alpha` is set
+        """
+
+        # total number of added values, used to drop the minimum and maximum that left the window
+        self._added: int = 0
+        self._min_deque: deque = deque()
+        self._max_deque: deque = deque()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def is_full(self) -> bool:
+        """
+        Check if the window contains `size` values.
+
+        :return: True if the window is full
+        """
+        return self.count == self.size
+
+    def append(self, value: float) -> None:
+        """
+        Add a value to the window and drop the oldest value, if the window is full.
+
+        :param value: Value to add
+        """
+        if self.count == self.size:
+            self.sum -= self.values[self.index]
+        else:
+            self.count += 1
+
+        self.values[self.index] = value
+        self.sum += value
+        self.index = (self.index + 1) % self.size
+
+        # recalculate the sum once per round to avoid the accumulation of floating point errors
+        if self.index == 0:
+            self.sum = sum(self.values)
+
+        self._added += 1
+        oldest_added = self._added - self.size
+
+        while self._min_deque and self._min_deque[-1][1] >= value:
+            self._min_deque.pop()
+        self._min_deque.append((self._added, value))
+        if self._min_deque[0][0] <= oldest_added:
+            self._min_deque.popleft()
+
+        while self._max_deque and self._max_deque[-1][1] <= value:
+            self._max_deque.pop()
+        self._max_deque.append((self._added, value))
+        if self._max_deque[0][0] <= oldest_added:
+            self._max_deque.popleft()
+
+        if self.ema_alpha is not None:
+            self.ema = value if self.ema is None else self.ema + self.ema_alpha * (value - self.ema)
+
+    def get_oldest(self) -> Union[float, None]:
+        """
+        Get the oldest value in the window.
+
+        :return: Oldest value or None, if the window is empty
+        """
+        if self.count == 0:
+            return None
+        return self.values[(self.index - self.count) % self.size]
+
+    def get_newest(self) -> Union[float, None]:
+        """
+        Get the newest value in the window.
+
+        :return: Newest value or None, if the window is empty
+        """
+        if self.count == 0:
+            return None
+        return self.values[self.index - 1]
+
+    def get_mean(self) -> Union[float, None]:
+        """
+        Get the mean of the values in the window.
+
+        :return: Mean value or None, if the window is empty
+        """
+        if self.count == 0:
+            return None
+        return self.sum / self.count
+
+    def get_min(self) -> Union[float, None]:
+        """
+        Get the minimum of the values in the window.
+
+        :return: Minimum value or None, if the window is empty
+        """
+        return self._min_deque[0][1] if self._min_deque else None
+
+    def get_max(self) -> Union[float, None]:
+        """
+        Get the maximum of the values in the window.
+
+        :return: Maximum value or None, if the window is empty
+        """
+        return self._max_deque[0][1] if self._max_deque else None
+
+
+class LatencyHistogram:
+    """
+    Histogram of durations with fixed buckets, cheap enough to record every poll cycle.
+
+    The percentiles are interpolated linearly inside the bucket they fall into, between the bounds of the bucket.
+    The upper bound is limited to the maximum recorded duration, so a single slow stage is not rounded up to the bucket.
+    """
+
+    BUCKETS: List[float] = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000]
+    """
+    Upper bounds of the buckets in ms, longer durations are counted in an additional bucket
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Remove all recorded durations.
+        """
+        self.counts: List[int] = [0] * (len(self.BUCKETS) + 1)
+        self.count: int = 0
+        self.max: float = 0
+
+    def record(self, duration: float) -> None:
+        """
+        Record a duration.
+
+        :param duration: Duration in seconds
+        """
+        duration_ms = duration * 1000
+        self.counts[bisect.bisect_left(self.BUCKETS, duration_ms)] += 1
+        self.count += 1
+        if duration_ms > self.max:
+            self.max = duration_ms
+
+    def get_percentile(self, percent: float) -> Union[float, None]:
+        """
+        Get the approximated percentile of the recorded durations.
+
+        :param percent: Percentile to get, e.g. 95
+        :return: Duration in ms or None, if nothing was recorded
+        """
+        if self.count == 0:
+            return None
+
+        rank = max(1, round(self.count * percent / 100))
+        cumulative = 0
+        for idx, count in enumerate(self.counts):
+            if count > 0 and cumulative + count >= rank:
+                lower = self.BUCKETS[idx - 1] if idx > 0 else 0
+                upper = min(self.BUCKETS[idx], self.max) if idx < len(self.BUCKETS) else self.max
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+
+        return self.max
+
+
 def is_bit_set(value: Any) -> bool:
     """
     Check if a bit is set high or low.
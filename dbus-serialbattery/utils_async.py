@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+import sys
+from struct import pack, unpack_from
+from typing import Union
+
+import serial
+
+from utils import logger
+
+
+def modbus_crc16(data: bytes) -> bytes:
+    """
+    Calculate the Modbus RTU CRC16 of the data.
+
+    :param data: Data to calculate the CRC for
+    :return: The CRC as 2 bytes, low byte first
+    """
+    crc = 0xFFFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+    return pack("<H", crc)
+
+
+class AsyncSerial:
+    """
+    asyncio transport for a serial port, used by drivers based on `AsyncBattery`.
+
+    The port is configured by pyserial, but read and written on its non-blocking file descriptor. One request/reply
+    exchange is on the bus at the same time: the lock is held until the reply is complete, so concurrent requests,
+    e.g. started with `asyncio.gather()`, run one after the other.
+
+    :param port: Serial port
+    :param baud: Baud rate
+    :param timeout: Time in seconds to wait for a complete reply
+    """
+
+    def __init__(self, port: str, baud: int, timeout: float = 0.5):
+        self.port: str = port
+        self.baud: int = baud
+        self.timeout: float = timeout
+        self.serial: serial.Serial = None
+        self._lock: asyncio.Lock = None
+
+    def open(self) -> bool:
+        """
+        Open the serial port, if not already open.
+
+        :return: True if the port is open, otherwise False
+        """
+        if self.serial is not None:
+            return True
+
+        try:
+            self.serial = serial.Serial(self.port, baudrate=self.baud, timeout=0)
+            os.set_blocking(self.serial.fileno(), False)
+            return True
+        except serial.SerialException as e:
+            logger.error(e)
+            self.serial = None
+            return False
+
+    def close(self) -> None:
+        """
+        Close the serial port.
+
+        :return: None
+        """
+        if self.serial is not None:
+            self.serial.close()
+            self.serial = None
+
+    async def _wait(self, writable: bool) -> None:
+        """
+        Wait until the file descriptor is readable or writable.
+
+        :param writable: Wait until writable, otherwise until readable
+        :return: None
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        fd = self.serial.fileno()
+
+        def ready() -> None:
+            if not future.done():
+                future.set_result(None)
+
+        if writable:
+            loop.add_writer(fd, ready)
+        else:
+            loop.add_reader(fd, ready)
+
+        try:
+            await future
+        finally:
+            if writable:
+                loop.remove_writer(fd)
+            else:
+                loop.remove_reader(fd)
+
+    async def write(self, data: bytes) -> None:
+        """
+        Write all data to the serial port.
+
+        :param data: Data to write
+        :return: None
+        """
+        view = memoryview(data)
+        while len(view) > 0:
+            try:
+                view = view[os.write(self.serial.fileno(), view) :]
+            except BlockingIOError:
+                await self._wait(True)
+
+    async def read_exactly(self, length: int, deadline: float) -> Union[bytearray, bool]:
+        """
+        Read a number of bytes from the serial port.
+
+        :param length: Number of bytes to read
+        :param deadline: Time of the event loop until the bytes have to be read
+        :return: Data read from the serial port or False on timeout
+        """
+        loop = asyncio.get_running_loop()
+        data = bytearray()
+
+        while len(data) < length:
+            try:
+                chunk = os.read(self.serial.fileno(), length - len(data))
+            except BlockingIOError:
+                chunk = b""
+
+            if len(chunk) > 0:
+                data.extend(chunk)
+                continue
+
+            try:
+                await asyncio.wait_for(self._wait(False), deadline - loop.time())
+            except asyncio.TimeoutError:
+                return False
+
+        return data
+
+    def read_available(self) -> bytearray:
+        """
+        Read the bytes that are already received, without waiting.
+
+        :return: Data read from the serial port
+        """
+        data = bytearray()
+        while True:
+            try:
+                chunk = os.read(self.serial.fileno(), 1024)
+            except BlockingIOError:
+                break
+
+            if len(chunk) == 0:
+                break
+            data.extend(chunk)
+
+        return data
+
+    async def request(
+        self,
+        command: bytes,
+        length_pos: int,
+        length_check: int,
+        length_fixed: Union[int, None] = None,
+        length_size: str = "B",
+    ) -> Union[bytearray, bool]:
+        """
+        Send a command and read the reply, the async counterpart of `utils.read_serialport_data()`.
+        Like there, at least `length + length_check + 1` bytes are read and additionally all bytes already received.
+
+        :param command: Command to send
+        :param length_pos: Position of the length byte
+        :param length_check: Length of the checksum
+        :param length_fixed: Fixed length of the data, if not set it will be read from the data
+        :param length_size: Size of the length byte, can be "B", "H", "I" or "L"
+        :return: Data read from the serial port or False if failed
+        """
+        length_byte_size = {"B": 1, "H": 2, "I": 4, "L": 4}[length_size.upper()]
+
+        return await self._exchange(
+            command,
+            length_pos + length_byte_size,
+            lambda header: (length_fixed if length_fixed is not None else unpack_from(">" + length_size, header, length_pos)[0]) + length_check + 1,
+        )
+
+    async def modbus_read_registers(self, address: int, register: int, count: int, function: int = 0x03) -> Union[bytearray, bool]:
+        """
+        Read registers with a Modbus RTU request.
+
+        :param address: Modbus address of the device
+        :param register: Address of the first register
+        :param count: Number of registers to read
+        :param function: Modbus function code, 0x03 for holding or 0x04 for input registers
+        :return: The register data without header and CRC or False if failed
+        """
+        command = pack(">BBHH", address, function, register, count)
+
+        def get_length(header: bytearray) -> int:
+            # an exception reply has no byte count, but an exception code with the same size
+            return 3 + (header[2] if header[1] == function else 0) + 2
+
+        data = await self._exchange(command + modbus_crc16(command), 3, get_length)
+
+        if data is False:
+            return False
+
+        # ignore bytes received after the reply
+        data = data[: get_length(data)]
+
+        if data[1] != function:
+            logger.error(f">>> ERROR: Modbus exception {data[2]} for function {function} at address {address}")
+            return False
+
+        if modbus_crc16(data[:-2]) != data[-2:]:
+            logger.error(">>> ERROR: Modbus CRC mismatch - returning")
+            return False
+
+        return data[3:-2]
+
+    async def _exchange(self, command: bytes, header_length: int, get_length) -> Union[bytearray, bool]:
+        """
+        Send a command and read the reply, while no other exchange is on the bus.
+
+        :param command: Command to send
+        :param header_length: Number of bytes needed to get the length of the reply
+        :param get_length: Returns the total length of the reply from the header
+        :return: The complete reply or False if failed
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        try:
+            async with self._lock:
+                if not self.open():
+                    return False
+
+                self.serial.reset_input_buffer()
+                await self.write(command)
+
+                deadline = asyncio.get_running_loop().time() + self.timeout
+                header = await self.read_exactly(header_length, deadline)
+                if header is False:
+                    logger.error(">>> ERROR: No reply - returning")
+                    return False
+
+                rest = await self.read_exactly(get_length(header) - header_length, deadline)
+                if rest is False:
+                    logger.error(">>> ERROR: No reply - returning [len:" + str(len(header)) + "]")
+                    return False
+
+                return header + rest + self.read_available()
+
+        except (serial.SerialException, OSError) as e:
+            logger.error(e)
+            # reopen the port with the next request
+            self.close()
+            return False
+
+        except Exception:
+            (
+                exception_type,
+                exception_object,
+                exception_traceback,
+            ) = sys.exc_info()
+            file = exception_traceback.tb_frame.f_code.co_filename
+            line = exception_traceback.tb_lineno
+            logger.error(f"Exception occurred: {repr(exception_object)} of type {exception_type} in {file} line #{line}")
+            return False
@@ -1,7 +1,9 @@
-from utils import logger
+from utils import logger, BLUETOOTH_RECONNECT_DELAY_MIN, BLUETOOTH_RECONNECT_DELAY_MAX, BLUETOOTH_RESET_AFTER_FAILED_RECONNECTS
 import threading
 import asyncio
 from bleak import BleakClient
+from time import monotonic, sleep
+from typing import Callable, Union
 
 
 # Class that enables synchronous writing and reading to a bluetooh device
@@ -96,3 +98,146 @@ class Syncron_Ble:
     def send_data(self, data):
         data = asyncio.run(self.send_coroutine_to_ble_thread_and_wait_for_result(self.ble_thread_send_com(data)))
         return data
+
+
+class BleReconnectManager:
+    """
+    Manages the reconnects of a Bluetooth LE connection.
+
+    A lost connection is re-established on the existing adapter. Failed reconnects are retried with an
+    exponential backoff and only after `BLUETOOTH_RESET_AFTER_FAILED_RECONNECTS` failed reconnects in a row
+    the Bluetooth stack is reset, since a reset interrupts all other Bluetooth devices of the GX device.
+
+    A reconnect counts as successful as soon as data is received again, since a connection that does not deliver
+    data is not worth more than no connection at all.
+    """
+
+    def __init__(self, name: str, reset_callback: Union[Callable[[], None], None] = None):
+        """
+        :param name: Name of the connection used in the log messages
+        :param reset_callback: Function that resets the Bluetooth stack
+        """
+        self.name = name
+        self.reset_callback = reset_callback
+
+        self.delay_min = max(BLUETOOTH_RECONNECT_DELAY_MIN, 0.1)
+        self.delay_max = max(BLUETOOTH_RECONNECT_DELAY_MAX, self.delay_min)
+        self.reset_after = BLUETOOTH_RESET_AFTER_FAILED_RECONNECTS
+
+        self.online: bool = False
+        """
+        `True` if data was received since the last (re)connect
+        """
+        self.disconnected_since: Union[float, None] = None
+        """
+        Monotonic timestamp of the last connection loss, `None` while online
+        """
+        self.failed_attempts: int = 0
+        """
+        Failed reconnects in a row, used for the backoff and the stack reset
+        """
+
+        # metrics
+        self.reconnects: int = 0
+        self.reconnects_failed: int = 0
+        self.stack_resets: int = 0
+        self.latency_last: Union[float, None] = None
+        self.latency_max: Union[float, None] = None
+        self.latency_sum: float = 0
+
+    def data_received(self) -> None:
+        """
+        Has to be called every time data is received. Cheap, if the connection is already online.
+
+        :return: None
+        """
+        if self.online:
+            return
+
+        self.online = True
+
+        # initial connection
+        if self.disconnected_since is None:
+            return
+
+        latency = monotonic() - self.disconnected_since
+        self.reconnects += 1
+        self.latency_last = latency
+        self.latency_max = latency if self.latency_max is None else max(self.latency_max, latency)
+        self.latency_sum += latency
+
+        logger.info(
+            f"{self.name}: Reconnected after {latency:.1f} s and {self.failed_attempts} failed attempts "
+            + f"(reconnects: {self.reconnects}, failed: {self.reconnects_failed}, stack resets: {self.stack_resets}, "
+            + f"latency avg: {self.latency_sum / self.reconnects:.1f} s, max: {self.latency_max:.1f} s)"
+        )
+
+        self.disconnected_since = None
+        self.failed_attempts = 0
+
+    def connection_lost(self) -> None:
+        """
+        Has to be called every time a connection or a connection attempt ended.
+
+        :return: None
+        """
+        if self.disconnected_since is None:
+            self.disconnected_since = monotonic()
+
+        if self.online:
+            self.online = False
+            logger.warning(f"{self.name}: Connection lost, reconnecting")
+        else:
+            self.failed_attempts += 1
+            self.reconnects_failed += 1
+            logger.warning(f"{self.name}: Reconnect failed ({self.failed_attempts} in a row)")
+
+    def get_delay(self) -> float:
+        """
+        Get the delay before the next reconnect attempt.
+
+        :return: Delay in seconds
+        """
+        return min(self.delay_min * 2 ** min(self.failed_attempts, 16), self.delay_max)
+
+    def reset_required(self) -> bool:
+        """
+        Check if the Bluetooth stack should be reset, since reconnecting failed too many times in a row.
+
+        :return: True if the stack should be reset, else False
+        """
+        return self.reset_after > 0 and self.reset_callback is not None and self.failed_attempts >= self.reset_after
+
+    def wait_for_reconnect(self) -> None:
+        """
+        Block until the next reconnect attempt is due. Resets the Bluetooth stack, if required.
+        Has to be called from the thread that handles the reconnects and never from the main thread.
+
+        :return: None
+        """
+        if self.reset_required():
+            logger.error(f"{self.name}: Reconnect failed {self.failed_attempts} times in a row. Resetting the Bluetooth stack.")
+            self.stack_resets += 1
+            self.failed_attempts = 0
+            self.reset_callback()
+
+        delay = self.get_delay()
+        logger.debug(f"{self.name}: Next reconnect attempt in {delay:.1f} s")
+        sleep(delay)
+
+    def get_metrics(self) -> dict:
+        """
+        Get the reconnect metrics.
+
+        :return: Dictionary with the reconnect metrics
+        """
+        return {
+            "online": self.online,
+            "reconnects": self.reconnects,
+            "reconnects_failed": self.reconnects_failed,
+            "failed_attempts": self.failed_attempts,
+            "stack_resets": self.stack_resets,
+            "latency_last": self.latency_last,
+            "latency_avg": self.latency_sum / self.reconnects if self.reconnects > 0 else None,
+            "latency_max": self.latency_max,
+        }
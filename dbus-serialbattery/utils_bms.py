@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+import importlib
+from typing import List, Union
+
+from utils import BMS_TYPE
+
+
+BMS_TYPES: List[dict] = [
+    # serial
+    {"bms": "Daly", "module": "bms.daly", "transport": "serial", "baud": 9600, "address": b"\x40"},
+    {"bms": "Daly", "module": "bms.daly", "transport": "serial", "baud": 9600, "address": b"\x80"},
+    {"bms": "Daren485", "module": "bms.daren_485", "transport": "serial", "baud": 19200, "address": b"\x01"},
+    {"bms": "Ecs", "module": "bms.ecs", "transport": "serial", "baud": 19200},
+    {"bms": "EG4_Lifepower", "module": "bms.eg4_lifepower", "transport": "serial", "baud": 9600, "address": b"\x01"},
+    {"bms": "EG4_LL", "module": "bms.eg4_ll", "transport": "serial", "baud": 9600, "address": b"\x01"},
+    {"bms": "Felicity", "module": "bms.felicity", "transport": "serial", "baud": 9600, "address": b"\x01"},
+    {"bms": "HeltecModbus", "module": "bms.heltecmodbus", "transport": "serial", "baud": 9600, "address": b"\x01"},
+    {"bms": "HLPdataBMS4S", "module": "bms.hlpdatabms4s", "transport": "serial", "baud": 9600},
+    {"bms": "Jkbms", "module": "bms.jkbms", "transport": "serial", "baud": 115200},
+    {"bms": "Jkbms_pb", "module": "bms.jkbms_pb", "transport": "serial", "baud": 115200, "address": b"\x01"},
+    {"bms": "LltJbd", "module": "bms.lltjbd", "transport": "serial", "baud": 9600, "address": b"\x00"},
+    {"bms": "Pace", "module": "bms.pace", "transport": "serial", "baud": 9600, "address": b"\x00"},
+    {"bms": "Renogy", "module": "bms.renogy", "transport": "serial", "baud": 9600, "address": b"\x30"},
+    {"bms": "Renogy", "module": "bms.renogy", "transport": "serial", "baud": 9600, "address": b"\xF7"},
+    {"bms": "Seplos", "module": "bms.seplos", "transport": "serial", "baud": 19200, "address": b"\x00"},
+    {"bms": "Seplosv3", "module": "bms.seplosv3", "transport": "serial", "baud": 19200},
+    # enabled only if explicitly set in config under "BMS_TYPE"
+    {"bms": "ANT", "module": "bms.ant", "transport": "serial", "baud": 19200, "opt_in": True},
+    {"bms": "MNB", "module": "bms.mnb", "transport": "serial", "baud": 9600, "opt_in": True},
+    {"bms": "Sinowealth", "module": "bms.sinowealth", "transport": "serial", "baud": 9600, "opt_in": True},
+    # CAN
+    {"bms": "Daly_Can", "module": "bms.daly_can", "transport": "can"},
+    {"bms": "Jkbms_Can", "module": "bms.jkbms_can", "transport": "can"},
+    # Bluetooth
+    {"bms": "Jkbms_Ble", "module": "bms.jkbms_ble", "transport": "ble"},
+    {"bms": "LiTime_Ble", "module": "bms.litime_ble", "transport": "ble"},
+    {"bms": "LltJbd_Ble", "module": "bms.lltjbd_ble", "transport": "ble"},
+    {"bms": "Renogy_Ble", "module": "bms.renogy_ble", "transport": "ble"},
+]
+"""
+Registry of the BMS drivers, in the order they are tested.
+
+The module of a driver is imported only when the driver is tested, see `get_bms_class()`.
+This keeps the startup time and the memory of the driver low, e.g. if `BMS_TYPE` is set.
+
+- `bms`: Name of the battery class, as used in `BMS_TYPE`
+- `module`: Module that contains the battery class
+- `transport`: `serial`, `can` or `ble`
+- `baud`: Baud rate (optional)
+- `address`: Default address to test (optional)
+- `opt_in`: Only supported, if set in `BMS_TYPE` (optional)
+"""
+
+
+def get_supported_bms_types(transport: str) -> List[dict]:
+    """
+    Get the supported BMS types of a transport, without importing their modules.
+
+    :param transport: `serial`, `can` or `ble`
+    :return: The BMS types from the registry
+    """
+    return [bms_type for bms_type in BMS_TYPES if bms_type["transport"] == transport and (not bms_type.get("opt_in", False) or bms_type["bms"] in BMS_TYPE)]
+
+
+def get_expected_bms_types(supported_bms_types: List[dict]) -> List[dict]:
+    """
+    Get the BMS types to test, which are the ones set in `BMS_TYPE` or all if it is empty.
+
+    :param supported_bms_types: The supported BMS types
+    :return: The BMS types to test
+    """
+    return [bms_type for bms_type in supported_bms_types if bms_type["bms"] in BMS_TYPE or len(BMS_TYPE) == 0]
+
+
+def get_bms_class(bms_type: dict) -> type:
+    """
+    Import the module of a BMS type and get its battery class.
+    Imported modules are cached by Python, so the module is only loaded once.
+
+    :param bms_type: The BMS type from the registry
+    :return: The battery class
+    """
+    return getattr(importlib.import_module(bms_type["module"]), bms_type["bms"])
+
+
+def get_bms_type(name: str) -> Union[dict, None]:
+    """
+    Get a BMS type from the registry by the name of its battery class.
+
+    :param name: Name of the battery class, e.g. `Jkbms_Ble`
+    :return: The BMS type or None, if there is no driver with this name
+    """
+    return next((bms_type for bms_type in BMS_TYPES if bms_type["bms"] == name), None)
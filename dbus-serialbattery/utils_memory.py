@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import tracemalloc
+from typing import Callable, List, Union
+
+from gi.repository import GLib as gobject
+
+import utils
+from utils import logger
+
+
+class MemoryWatchdog:
+    """
+    Watchdog for the memory growth of the driver process.
+
+    Every `MEMORY_WATCHDOG_SAMPLE_INTERVAL` seconds the RSS of the process and the size of the Python heap
+    traced by tracemalloc are read and passed to the `on_update` callbacks, which publish them to `/Diagnostics/Memory/`.
+    Every `MEMORY_WATCHDOG_INTERVAL` seconds a tracemalloc snapshot is taken and the allocation sites that grew
+    the most since the last snapshot are logged.
+    """
+
+    _instance = None
+
+    def __init__(self):
+        # singleton
+        if MemoryWatchdog._instance is not None:
+            raise Exception("Instance already exists!")
+
+        self.rss: Union[int, None] = None
+        """
+        Resident set size of the process in bytes
+        """
+        self.rss_start: Union[int, None] = None
+        """
+        Resident set size of the process in bytes, when the watchdog was started
+        """
+        self.heap: Union[int, None] = None
+        """
+        Size of the Python heap traced by tracemalloc in bytes
+        """
+        self.on_update: List[Callable[["MemoryWatchdog"], None]] = []
+        """
+        Called with the watchdog, after the memory usage was read
+        """
+        self._snapshot: tracemalloc.Snapshot = None
+        self._snapshot_rss: Union[int, None] = None
+        self._page_size: int = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+        MemoryWatchdog._instance = self
+
+    @classmethod
+    def get_instance(cls) -> "MemoryWatchdog":
+        """
+        Get the instance of the memory watchdog
+
+        :return: instance of the memory watchdog
+        """
+        if cls._instance is None:
+            cls()
+        return cls._instance
+
+    def start(self) -> None:
+        """
+        Start tracing the allocations and the timers of the watchdog.
+
+        :return: None
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(utils.MEMORY_WATCHDOG_FRAMES)
+
+        self.sample()
+        self.rss_start = self.rss
+        self._snapshot = self.take_snapshot()
+        self._snapshot_rss = self.rss
+
+        gobject.timeout_add_seconds(utils.MEMORY_WATCHDOG_SAMPLE_INTERVAL, self.sample)
+        gobject.timeout_add_seconds(utils.MEMORY_WATCHDOG_INTERVAL, self.compare_snapshot)
+        logger.info(f"Memory watchdog started, RSS {self.format_size(self.rss)}")
+
+    def read_rss(self) -> Union[int, None]:
+        """
+        Read the resident set size of the process from `/proc/self/statm`.
+
+        :return: Resident set size in bytes or None, if not available
+        """
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * self._page_size
+        except (OSError, IndexError, ValueError):
+            return None
+
+    def sample(self) -> bool:
+        """
+        Read the memory usage and call the `on_update` callbacks.
+
+        :return: True, to keep the timer running
+        """
+        self.rss = self.read_rss()
+        self.heap = tracemalloc.get_traced_memory()[0]
+
+        for callback in self.on_update:
+            callback(self)
+
+        return True
+
+    def take_snapshot(self) -> tracemalloc.Snapshot:
+        """
+        Take a tracemalloc snapshot without the allocations of tracemalloc and the import system.
+
+        :return: The filtered snapshot
+        """
+        return tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+                tracemalloc.Filter(False, "<unknown>"),
+            )
+        )
+
+    def compare_snapshot(self) -> bool:
+        """
+        Take a snapshot and log the allocation sites that grew the most since the last snapshot.
+
+        :return: True, to keep the timer running
+        """
+        try:
+            snapshot = self.take_snapshot()
+            statistics = [stat for stat in snapshot.compare_to(self._snapshot, "lineno") if stat.size_diff > 0]
+            self.sample()
+
+            logger.info(
+                f"Memory: RSS {self.format_size(self.rss)} "
+                + f"({self.format_size(self.rss - self._snapshot_rss, True) if self.rss is not None and self._snapshot_rss is not None else '---'} "
+                + f"since last check, {self.format_size(self.rss - self.rss_start, True) if self.rss is not None and self.rss_start is not None else '---'} "
+                + f"since start), Python heap {self.format_size(self.heap)}"
+            )
+            for stat in statistics[: utils.MEMORY_WATCHDOG_TOP]:
+                frame = stat.traceback[0]
+                logger.info(
+                    f"|- {os.path.basename(frame.filename)}:{frame.lineno}: {self.format_size(stat.size_diff, True)} "
+                    + f"({stat.count_diff:+d} blocks), total {self.format_size(stat.size)}"
+                )
+
+            self._snapshot = snapshot
+            self._snapshot_rss = self.rss
+
+        except Exception:
+            exception_type, exception_object, exception_traceback = sys.exc_info()
+            file = exception_traceback.tb_frame.f_code.co_filename
+            line = exception_traceback.tb_lineno
+            logger.error("Non blocking exception occurred: " + f"{repr(exception_object)} of type {exception_type} in {file} line #{line}")
+
+        return True
+
+    @staticmethod
+    def format_size(size: Union[int, None], sign: bool = False) -> str:
+        """
+        Format a size in bytes as kB or MB.
+
+        :param size: The size in bytes
+        :param sign: Show the sign also for positive sizes
+        :return: The formatted size
+        """
+        if size is None:
+            return "---"
+
+        if abs(size) >= 1024 * 1024:
+            return f"{size / 1024 / 1024:{'+' if sign else ''}.1f} MB"
+
+        return f"{size / 1024:{'+' if sign else ''}.1f} kB"
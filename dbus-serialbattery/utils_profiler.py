@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+import cProfile
+import os
+import sys
+import threading
+from collections import defaultdict
+from time import strftime
+from typing import Callable, List
+
+from gi.repository import GLib as gobject
+
+import utils
+from utils import logger
+
+
+class Profiler:
+    """
+    On demand CPU profiler of the running driver.
+
+    It is started with `SIGUSR1` or by writing to the dbus path `/Diagnostics/Profile`, collects for
+    `PROFILER_DURATION` seconds and writes the result to `PROFILER_DIRECTORY`. Nothing is hooked while it is off.
+
+    Modes:
+        - `CPROFILE`: deterministic profile of the main thread, written as pstats file.
+          Can be viewed with `python -m pstats <file>`
+        - `SAMPLER`: samples the stacks of all threads (main loop, CAN and BLE threads) every
+          `PROFILER_SAMPLE_INTERVAL` ms, written as collapsed stacks for flame graphs
+    """
+
+    _instance = None
+
+    OFF = 0
+    CPROFILE = 1
+    SAMPLER = 2
+
+    def __init__(self):
+        # singleton
+        if Profiler._instance is not None:
+            raise Exception("Instance already exists!")
+
+        self.name: str = "dbus-serialbattery"
+        """
+        Prefix of the written files, e.g. `dbus-serialbattery.ttyUSB0`
+        """
+        self.mode: int = Profiler.OFF
+        """
+        Mode of the running profile, `OFF` if not running
+        """
+        self.on_change: List[Callable[[int], None]] = []
+        """
+        Called with the new mode, when a profile is started or stopped
+        """
+        self._profile: cProfile.Profile = None
+        self._sampler: threading.Thread = None
+        self._sampler_stop: threading.Event = None
+        self._samples: dict = None
+        """
+        Number of samples by collapsed stack
+        """
+        self._timeout_id: int = None
+        Profiler._instance = self
+
+    @classmethod
+    def get_instance(cls) -> "Profiler":
+        """
+        Get the instance of the profiler
+
+        :return: instance of the profiler
+        """
+        if cls._instance is None:
+            cls()
+        return cls._instance
+
+    def signal_handler(self, sig, frame) -> None:
+        """
+        Start a profile with `PROFILER_MODE` or stop the running one.
+        Handles the signal `SIGUSR1`.
+
+        :return: None
+        """
+        if self.mode == Profiler.OFF:
+            self.start(Profiler.SAMPLER if utils.PROFILER_MODE == "sampler" else Profiler.CPROFILE)
+        else:
+            self.stop()
+
+    def set_mode(self, mode: int) -> bool:
+        """
+        Start a profile with the given mode or stop the running one with `OFF`.
+
+        :param mode: One of `OFF`, `CPROFILE` or `SAMPLER`
+        :return: True if the mode is valid, otherwise False
+        """
+        if mode not in (Profiler.OFF, Profiler.CPROFILE, Profiler.SAMPLER):
+            return False
+
+        if mode == self.mode:
+            return True
+
+        if self.mode != Profiler.OFF:
+            self.stop()
+
+        if mode != Profiler.OFF:
+            self.start(mode)
+
+        return True
+
+    def start(self, mode: int) -> None:
+        """
+        Start collecting and stop automatically after `PROFILER_DURATION` seconds.
+        Has to be called from the main thread, since cProfile only profiles the calling thread.
+
+        :param mode: `CPROFILE` or `SAMPLER`
+        :return: None
+        """
+        if self.mode != Profiler.OFF:
+            return
+
+        if mode == Profiler.CPROFILE:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._samples = defaultdict(int)
+            self._sampler_stop = threading.Event()
+            self._sampler = threading.Thread(target=self._sample, args=(self._sampler_stop,), name="ProfilerSampler", daemon=True)
+            self._sampler.start()
+
+        self.mode = mode
+        self._timeout_id = gobject.timeout_add_seconds(utils.PROFILER_DURATION, self._timeout)
+        logger.info(f"Profiler started in {'cProfile' if mode == Profiler.CPROFILE else 'sampler'} mode for {utils.PROFILER_DURATION} s")
+        self._notify()
+
+    def stop(self) -> None:
+        """
+        Stop collecting and write the result.
+
+        :return: None
+        """
+        if self.mode == Profiler.OFF:
+            return
+
+        if self._timeout_id is not None:
+            gobject.source_remove(self._timeout_id)
+            self._timeout_id = None
+
+        try:
+            if self.mode == Profiler.CPROFILE:
+                self._profile.disable()
+                file = self._get_file("pstats")
+                self._profile.dump_stats(file)
+                self._profile = None
+            else:
+                self._sampler_stop.set()
+                self._sampler.join()
+                file = self._get_file("folded")
+                with open(file, "w") as f:
+                    for stack, count in sorted(self._samples.items(), key=lambda item: item[1], reverse=True):
+                        f.write(f"{stack} {count}\n")
+                self._sampler = None
+                self._samples = None
+
+            logger.info(f"Profiler stopped, written to {file}")
+
+        except Exception:
+            exception_type, exception_object, exception_traceback = sys.exc_info()
+            file = exception_traceback.tb_frame.f_code.co_filename
+            line = exception_traceback.tb_lineno
+            logger.error("Non blocking exception occurred: " + f"{repr(exception_object)} of type {exception_type} in {file} line #{line}")
+
+        self.mode = Profiler.OFF
+        self._notify()
+
+    def _timeout(self) -> bool:
+        """
+        Stop the profile after `PROFILER_DURATION` seconds.
+
+        :return: False, to remove the timeout
+        """
+        self._timeout_id = None
+        self.stop()
+        return False
+
+    def _sample(self, stop: threading.Event) -> None:
+        """
+        Sample the stacks of all threads until stopped.
+        The stacks are counted in collapsed form, e.g. `MainThread;dbushelper.py:publish_battery;battery.py:refresh_data`.
+
+        :param stop: Event to stop sampling
+        :return: None
+        """
+        own_ident = threading.get_ident()
+        interval = utils.PROFILER_SAMPLE_INTERVAL / 1000
+
+        while not stop.wait(interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+
+                stack = []
+                while frame is not None:
+                    stack.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+                    frame = frame.f_back
+
+                stack.append(names.get(ident, str(ident)))
+                self._samples[";".join(reversed(stack))] += 1
+
+    def _get_file(self, extension: str) -> str:
+        """
+        Get the path of the file to write.
+
+        :param extension: File extension without dot
+        :return: The path of the file
+        """
+        os.makedirs(utils.PROFILER_DIRECTORY, exist_ok=True)
+        return os.path.join(utils.PROFILER_DIRECTORY, f"{self.name}.{strftime('%Y%m%d-%H%M%S')}.{extension}")
+
+    def _notify(self) -> None:
+        """
+        Call the `on_change` callbacks with the current mode.
+
+        :return: None
+        """
+        for callback in self.on_change:
+            callback(self.mode)
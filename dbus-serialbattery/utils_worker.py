@@ -0,0 +1,476 @@
+# -*- coding: utf-8 -*-
+import importlib
+import math
+import multiprocessing
+import pickle
+import sys
+from multiprocessing import shared_memory
+from struct import Struct
+from time import monotonic, sleep
+from typing import List, Union
+
+from battery import Battery, CellStore
+import utils
+from utils import logger
+
+
+PROTECTION_FIELDS = (
+    "high_voltage",
+    "high_cell_voltage",
+    "low_voltage",
+    "low_cell_voltage",
+    "low_soc",
+    "high_charge_current",
+    "high_discharge_current",
+    "cell_imbalance",
+    "internal_failure",
+    "high_charge_temperature",
+    "low_charge_temperature",
+    "high_temperature",
+    "low_temperature",
+    "high_internal_temperature",
+    "fuse_blown",
+)
+"""
+Alarm states of `Protection` contained in a snapshot
+"""
+
+VALUE_FIELDS = (
+    "voltage",
+    "current",
+    "soc",
+    "capacity_remain",
+    "temperature_mos",
+    "temperature_1",
+    "temperature_2",
+    "temperature_3",
+    "temperature_4",
+)
+"""
+Float values of the battery contained in a snapshot
+"""
+
+FET_FIELDS = ("charge_fet", "discharge_fet", "balance_fet")
+"""
+FET states of the battery contained in a snapshot
+"""
+
+
+class SnapshotRing:
+    """
+    Ring of fixed-layout battery snapshots in shared memory, written by a worker process and read by the publisher.
+
+    A snapshot contains the values that change with every refresh: cells, voltage, current, SoC, temperatures,
+    FETs and alarms. Each slot is framed by its sequence number, so a slot that is read while it is written is detected.
+    `None` is stored as NaN for floats, -1 for flags and `CellStore.NO_VOLTAGE` for cell voltages.
+
+    :param name: Name of an existing shared memory block, None to create a new one
+    """
+
+    SLOTS = 4
+
+    MAX_CELLS = 48
+
+    HEADER = Struct("<I")
+    """
+    Index of the latest complete slot
+    """
+
+    SLOT = Struct(
+        "<I"  # sequence number
+        + "d"  # monotonic timestamp of the refresh
+        + "b"  # result of the refresh
+        + "H"  # cell count
+        + "d" * len(VALUE_FIELDS)
+        + "b" * len(FET_FIELDS)
+        + "b" * len(PROTECTION_FIELDS)
+        + "H" * MAX_CELLS  # cell voltages in mV
+        + "Q"  # cells with balance state
+        + "Q"  # cells that are balancing
+        + "I"  # sequence number
+    )
+
+    def __init__(self, name: str = None):
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.HEADER.size + self.SLOTS * self.SLOT.size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name: str = self.shm.name
+        self.sequence: int = 0
+        """
+        Sequence number of the last written or read snapshot
+        """
+
+    def write(self, battery: Battery, result: bool) -> None:
+        """
+        Write a snapshot of the battery to the next slot.
+
+        :param battery: The battery to write
+        :param result: The result of the refresh
+        :return: None
+        """
+        self.sequence += 1
+        slot = self.sequence % self.SLOTS
+        cells: CellStore = battery.cells
+        count = min(len(cells), self.MAX_CELLS)
+
+        voltages = [int(cells.voltages[i]) for i in range(count)] + [CellStore.NO_VOLTAGE] * (self.MAX_CELLS - count)
+        balances_set = 0
+        balances = 0
+        for i in range(count):
+            balance = cells.get_balance(i)
+            if balance is not None:
+                balances_set |= 1 << i
+                if balance:
+                    balances |= 1 << i
+
+        self.SLOT.pack_into(
+            self.shm.buf,
+            self.HEADER.size + slot * self.SLOT.size,
+            self.sequence,
+            monotonic(),
+            1 if result else 0,
+            count,
+            *[float("nan") if getattr(battery, field) is None else getattr(battery, field) for field in VALUE_FIELDS],
+            *[-1 if getattr(battery, field) is None else int(getattr(battery, field)) for field in FET_FIELDS],
+            *[-1 if getattr(battery.protection, field) is None else getattr(battery.protection, field) for field in PROTECTION_FIELDS],
+            *voltages,
+            balances_set,
+            balances,
+            self.sequence,
+        )
+        self.HEADER.pack_into(self.shm.buf, 0, slot)
+
+    def read(self, battery: Battery) -> Union[tuple, None]:
+        """
+        Apply the latest snapshot to the battery, if there is a new one.
+
+        :param battery: The battery to update
+        :return: Tuple with the result and the monotonic timestamp of the refresh, None if there is no new snapshot
+        """
+        slot = self.HEADER.unpack_from(self.shm.buf, 0)[0]
+        values = self.SLOT.unpack_from(self.shm.buf, self.HEADER.size + slot * self.SLOT.size)
+
+        # skip a slot that is not written completely or was already read
+        if values[0] != values[-1] or values[0] == self.sequence:
+            return None
+
+        self.sequence = values[0]
+        timestamp, result, count = values[1:4]
+        pos = 4
+
+        for field in VALUE_FIELDS:
+            setattr(battery, field, None if math.isnan(values[pos]) else values[pos])
+            pos += 1
+
+        for field in FET_FIELDS:
+            setattr(battery, field, None if values[pos] == -1 else bool(values[pos]))
+            pos += 1
+
+        for field in PROTECTION_FIELDS:
+            setattr(battery.protection, field, None if values[pos] == -1 else values[pos])
+            pos += 1
+
+        cells: CellStore = battery.cells
+        balances_set, balances = values[pos + self.MAX_CELLS : pos + self.MAX_CELLS + 2]
+        for i in range(min(count, len(cells))):
+            voltage = values[pos + i]
+            cells.set_voltage(i, None if voltage == CellStore.NO_VOLTAGE else voltage / 1000)
+            cells.set_balance(i, bool(balances >> i & 1) if balances_set >> i & 1 else None)
+
+        return bool(result), timestamp
+
+    def get_written_sequence(self) -> int:
+        """
+        Get the sequence number of the latest snapshot, without applying it.
+
+        :return: The sequence number of the latest complete slot
+        """
+        slot = self.HEADER.unpack_from(self.shm.buf, 0)[0]
+        return self.SLOT.unpack_from(self.shm.buf, self.HEADER.size + slot * self.SLOT.size)[0]
+
+    def close(self) -> None:
+        """
+        Detach from the shared memory.
+
+        :return: None
+        """
+        self.shm.close()
+
+
+def get_static_values(battery: Battery) -> dict:
+    """
+    Get the values of the battery, that the publisher needs besides the snapshots.
+    These are all attributes that can be pickled and the values of the methods, that drivers override.
+
+    :param battery: The battery
+    :return: The values by attribute name
+    """
+    values = {}
+    for name, value in battery.__dict__.items():
+        try:
+            pickle.dumps(value)
+            values[name] = value
+        except Exception:
+            pass
+
+    values["_unique_identifier"] = battery.unique_identifier()
+    values["_connection_name"] = battery.connection_name()
+    values["_custom_name"] = battery.custom_name()
+    values["_product_name"] = battery.product_name()
+
+    return values
+
+
+def run_worker(specs: List[tuple], ring_names: List[str], conn) -> None:
+    """
+    Main function of a worker process, that reads the batteries of one port.
+
+    The batteries are created and connected again, then their static values are sent to the publisher once
+    and afterwards a snapshot is written after each refresh.
+
+    :param specs: Module, class, port, baud rate and address of each battery
+    :param ring_names: Name of the shared memory of each battery
+    :param conn: Connection to the publisher
+    :return: None
+    """
+    batteries = []
+    for (module, class_name, port, baud, address), ring_name in zip(specs, ring_names):
+        battery: Battery = getattr(importlib.import_module(module), class_name)(port=port, baud=baud, address=address)
+        if utils.POLL_INTERVAL is not None:
+            battery.poll_interval = utils.POLL_INTERVAL
+        # the shared memory is owned and unlinked by the publisher
+        ring = SnapshotRing(ring_name)
+
+        if not battery.run_test_connection() or not battery.get_settings():
+            logger.error(f"ERROR >>> Worker could not connect to {class_name} at {port}")
+            sys.exit(1)
+
+        batteries.append((battery, ring))
+
+    deadline = monotonic()
+    while True:
+        for battery, ring in batteries:
+            try:
+                result = battery.run_refresh_data()
+            except Exception:
+                (
+                    exception_type,
+                    exception_object,
+                    exception_traceback,
+                ) = sys.exc_info()
+                file = exception_traceback.tb_frame.f_code.co_filename
+                line = exception_traceback.tb_lineno
+                logger.error(f"Exception occurred: {repr(exception_object)} of type {exception_type} in {file} line #{line}")
+                result = False
+
+            ring.write(battery, result)
+
+        # send the static values once, after the first refresh, when all values are set
+        if conn is not None:
+            conn.send([get_static_values(battery) for battery, _ in batteries])
+            conn.close()
+            conn = None
+
+        deadline += min(battery.poll_interval for battery, _ in batteries) / 1000
+        if deadline < monotonic():
+            deadline = monotonic()
+        sleep(deadline - monotonic())
+
+
+class PortWorker:
+    """
+    Worker process, that reads the batteries of one serial port.
+    The batteries are read in the worker and published by `WorkerBattery` instances in the driver process.
+    A worker that exited is started again. A worker that hangs, e.g. in a blocking serial read, is detected by
+    its snapshots that stopped advancing and is killed and started again.
+
+    :param port: The serial port
+    :param batteries: The batteries detected at the port by address
+    """
+
+    RESTART_INTERVAL = 30
+    """
+    Seconds to wait before a worker that exited is started again
+    """
+
+    STALL_TIMEOUT = 120
+    """
+    Seconds without a new snapshot, after which a running worker is restarted. This includes the connection test after a start
+    """
+
+    def __init__(self, port: str, batteries: dict):
+        self.port: str = port
+        self.addresses: list = list(batteries.keys())
+        self.specs: List[tuple] = [
+            (battery.__class__.__module__, battery.__class__.__name__, battery.port, battery.baud_rate, battery.address) for battery in batteries.values()
+        ]
+        self.rings: List[SnapshotRing] = [SnapshotRing() for _ in self.specs]
+        self.process: multiprocessing.Process = None
+        self.started_last_time: float = None
+        self.sequences_last: List[int] = None
+        """
+        Sequence numbers of the latest snapshots, when they last advanced
+        """
+        self.advanced_last_time: float = None
+        """
+        Last time a snapshot was written by the worker
+        """
+        # spawn instead of fork, since the driver process has open dbus connections
+        self._context = multiprocessing.get_context("spawn")
+
+    def start(self, conn=None) -> None:
+        """
+        Start the worker process.
+
+        :param conn: Connection to receive the static values, None on a restart
+        :return: None
+        """
+        self.started_last_time = monotonic()
+        self.advanced_last_time = self.started_last_time
+        self.process = self._context.Process(
+            target=run_worker,
+            args=(self.specs, [ring.name for ring in self.rings], conn),
+            name="PortWorker-" + self.port,
+            daemon=True,
+        )
+        self.process.start()
+
+    def start_batteries(self) -> Union[dict, None]:
+        """
+        Start the worker process and create the batteries, that publish its snapshots.
+
+        :return: The `WorkerBattery` instances by address or None, if the worker did not start
+        """
+        parent_conn, child_conn = self._context.Pipe(duplex=False)
+        self.start(child_conn)
+        child_conn.close()
+
+        static_values = None
+        # wait for the first refresh of all batteries
+        try:
+            if parent_conn.poll(120):
+                static_values = parent_conn.recv()
+        except EOFError:
+            pass
+        parent_conn.close()
+
+        if static_values is None:
+            logger.error(f"ERROR >>> Worker for {self.port} did not start")
+            self.stop()
+            return None
+
+        return {address: WorkerBattery(self, index, static_values[index]) for index, address in enumerate(self.addresses)}
+
+    def check(self) -> None:
+        """
+        Start the worker again, if it exited or did not write a snapshot for `STALL_TIMEOUT` seconds.
+
+        :return: None
+        """
+        if self.process is None:
+            return
+
+        now = monotonic()
+        sequences = [ring.get_written_sequence() for ring in self.rings]
+        if sequences != self.sequences_last:
+            self.sequences_last = sequences
+            self.advanced_last_time = now
+
+        if self.process.is_alive():
+            if now - self.advanced_last_time < self.STALL_TIMEOUT:
+                return
+
+            logger.error(f"Worker for {self.port} did not write a snapshot for {now - self.advanced_last_time:.0f} s, starting it again")
+            self.terminate()
+
+        elif now - self.started_last_time >= self.RESTART_INTERVAL:
+            logger.error(f"Worker for {self.port} exited with code {self.process.exitcode}, starting it again")
+
+        else:
+            return
+
+        self.start()
+
+    def terminate(self) -> None:
+        """
+        Terminate the worker process and kill it, if it does not exit in time.
+
+        :return: None
+        """
+        if self.process is not None and self.process.is_alive():
+            self.process.terminate()
+            self.process.join(2)
+
+            if self.process.is_alive():
+                self.process.kill()
+                self.process.join(2)
+
+    def stop(self) -> None:
+        """
+        Stop the worker process and free the shared memory.
+
+        :return: None
+        """
+        self.terminate()
+
+        for ring in self.rings:
+            ring.close()
+            ring.shm.unlink()
+
+
+class WorkerBattery(Battery):
+    """
+    Battery in the driver process, that publishes the snapshots of a battery read by a `PortWorker`.
+
+    It is created from the static values of the battery in the worker, so it has the same settings.
+    `refresh_data()` applies the latest snapshot and fails, if the worker did not write one for
+    `WORKER_STALE_CYCLES` poll intervals.
+
+    :param worker: The worker, that reads the battery
+    :param index: Index of the battery in the worker
+    :param static_values: The static values of the battery, see `get_static_values()`
+    """
+
+    WORKER_STALE_CYCLES = 10
+
+    def __init__(self, worker: PortWorker, index: int, static_values: dict):
+        super().__init__(static_values["port"], static_values["baud_rate"], static_values["address"])
+        self.__dict__.update(static_values)
+        # the control requests are not forwarded to the worker, so do not export them
+        self.available_callbacks: List[str] = []
+        self.has_settings: bool = False
+        self.worker: PortWorker = worker
+        self.ring: SnapshotRing = worker.rings[index]
+        self.refreshed_last_time: float = monotonic()
+
+    def test_connection(self) -> bool:
+        return True
+
+    def get_settings(self) -> bool:
+        return True
+
+    def refresh_data(self) -> bool:
+        self.worker.check()
+        snapshot = self.ring.read(self)
+
+        if snapshot is not None:
+            self.refreshed_last_time = snapshot[1]
+            return snapshot[0]
+
+        return monotonic() - self.refreshed_last_time < self.WORKER_STALE_CYCLES * self.poll_interval / 1000
+
+    def unique_identifier(self) -> str:
+        return self._unique_identifier
+
+    def connection_name(self) -> str:
+        return self._connection_name
+
+    def custom_name(self) -> str:
+        return self._custom_name
+
+    def product_name(self) -> str:
+        return self._product_name
+
+    def use_callback(self, callback) -> bool:
+        return False